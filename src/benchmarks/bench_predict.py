@@ -0,0 +1,317 @@
+# Benchmark de latência e throughput do LLM Matchmaker.
+#
+# Reexecuta cenários (aleatórios a partir dos enums ou lidos de um CSV/NDJSON) contra:
+#   api       -> GET /predict-match de uma API em execução
+#   mcp       -> tool get_llm_recommendation do MCP server (via FastMCP.call_tool, em processo)
+#   inprocess -> services.predicts.predict_match, com o modelo carregado no próprio processo
+#
+# Para cada nível de concorrência informa throughput e latências p50/p95/p99; o alvo inprocess
+# também detalha o tempo por etapa (validação, montagem da entrada, predição, serialização).
+# O resultado é gravado em JSON (com o commit atual) para comparar execuções entre commits:
+#
+#   python src/benchmarks/bench_predict.py --target inprocess --concurrency 1,4,16 --requests 5000
+#   python src/benchmarks/bench_predict.py --target api --url http://localhost:8080 --compare bench_results/anterior.json
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+API_DIR = SRC_DIR / "llm_matchmaker" / "apipredict"
+MCP_DIR = SRC_DIR / "mcp_server"
+
+PARAM_NAMES = [
+    "task_type",
+    "domain",
+    "input_language",
+    "privacy_requirement",
+    "hardware_available",
+    "hallucination_tolerance",
+    "determinism_needed",
+    "temperature_preference",
+    "output_style",
+]
+
+# Colunas do CSV de treino que têm outro nome na API
+CSV_ALIASES = {"temperature_pref": "temperature_preference"}
+
+
+def param_enums() -> dict:
+    from enums.params import TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, DeterminismNeeded, TemperaturePreference, OutputStyle
+
+    return dict(zip(PARAM_NAMES, (TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, DeterminismNeeded, TemperaturePreference, OutputStyle)))
+
+
+def load_scenarios(path: str | None, n: int, seed: int) -> list[dict]:
+    """Returns n scenarios as raw API parameter dicts, replayed from path or drawn from the enums."""
+    rng = random.Random(seed)
+    if path is None:
+        values = {name: [member.value for member in enum] for name, enum in param_enums().items()}
+        return [{name: rng.choice(options) for name, options in values.items()} for _ in range(n)]
+
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            recorded = [{CSV_ALIASES.get(k, k): v for k, v in row.items() if CSV_ALIASES.get(k, k) in PARAM_NAMES} for row in csv.DictReader(f)]
+    else:
+        with open(path) as f:
+            recorded = [json.loads(line) for line in f if line.strip()]
+    for scenario in recorded:
+        scenario["determinism_needed"] = int(scenario["determinism_needed"])
+    # Reaproveita a gravação em ciclo até completar n cenários, na ordem original
+    return [recorded[i % len(recorded)] for i in range(n)]
+
+
+def summarize(latencies_ns: list[int], elapsed_s: float, errors: int) -> dict:
+    latencies_ms = np.array(latencies_ns, dtype=np.float64) / 1e6
+    return {
+        "requests": len(latencies_ns),
+        "errors": errors,
+        "elapsed_s": elapsed_s,
+        "throughput_rps": len(latencies_ns) / elapsed_s if elapsed_s else 0.0,
+        "mean_ms": float(latencies_ms.mean()),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "max_ms": float(latencies_ms.max()),
+    }
+
+
+async def run_async_level(call, scenarios: list[dict], concurrency: int) -> dict:
+    """Runs every scenario through an async call with `concurrency` concurrent workers."""
+    latencies: list[int] = []
+    errors = 0
+    position = iter(scenarios)
+
+    async def worker():
+        nonlocal errors
+        for scenario in position:
+            start = time.perf_counter_ns()
+            try:
+                ok = await call(scenario)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter_ns() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+def run_thread_level(call, scenarios: list[dict], concurrency: int) -> dict:
+    """Runs every scenario through a sync call on `concurrency` threads."""
+    def timed(scenario):
+        start = time.perf_counter_ns()
+        try:
+            ok = call(scenario)
+        except Exception:
+            ok = False
+        return time.perf_counter_ns() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, scenarios))
+    return summarize([r[0] for r in results], time.perf_counter() - start, sum(not r[1] for r in results))
+
+
+class ApiTarget:
+    def __init__(self, args):
+        self.url = args.url
+        self.client = None
+
+    async def call(self, scenario: dict) -> bool:
+        response = await self.client.get("/predict-match", params=scenario)
+        return response.status_code == 200
+
+    def run_level(self, scenarios, concurrency):
+        return asyncio.run(self._run_level(scenarios, concurrency))
+
+    async def _run_level(self, scenarios, concurrency):
+        import httpx
+
+        # Um cliente por nível: cada asyncio.run abre um novo event loop
+        async with httpx.AsyncClient(base_url=self.url, timeout=30, limits=httpx.Limits(max_connections=concurrency)) as self.client:
+            return await run_async_level(self.call, scenarios, concurrency)
+
+
+class McpTarget:
+    def __init__(self, args):
+        if not args.mcp_cache:
+            os.environ["MATCHMAKER_CACHE_SIZE"] = "0"
+        import matchmaker_server
+
+        # O FastMCP liga logs INFO, inclusive uma linha do httpx por requisição
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        self.server = matchmaker_server
+        self.enums = param_enums()
+
+    async def call(self, scenario: dict) -> bool:
+        result = await self.server.mcp.call_tool("get_llm_recommendation", scenario)
+        return "prediction" in json.dumps(result, default=str)
+
+    def run_level(self, scenarios, concurrency):
+        async def level():
+            try:
+                return await run_async_level(self.call, scenarios, concurrency)
+            finally:
+                await self.server.close_backend()
+
+        return asyncio.run(level())
+
+
+class InprocessTarget:
+    def __init__(self, args):
+        from services.predicts import predict_match
+        from utils.models_loader import load_models
+
+        load_models()
+        self.predict_match = predict_match
+        self.enums = param_enums()
+        self.logger = logging.getLogger("bench")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.WARNING)
+
+    def call(self, scenario: dict) -> bool:
+        args = [enum(scenario[name]) for name, enum in self.enums.items()]
+        result = self.predict_match(*args, self.logger)
+        return bool(result.model_dump_json())
+
+    def run_level(self, scenarios, concurrency):
+        return run_thread_level(self.call, scenarios, concurrency)
+
+    def stages(self, scenarios: list[dict]) -> dict:
+        """Times each stage of the prediction path sequentially, mirroring services.predicts."""
+        from schemas.scenario import Scenario
+        from results.match_result import ModelResult
+        from utils.features import codes_to_frame, feature_codes, grid_index
+        from utils.predictors import LLM_CLASSES
+        import utils.models_loader as models
+
+        bundle = models.bundle
+        timings = {"validation": [], "build": [], "predict": [], "serialization": []}
+        for raw in scenarios:
+            t0 = time.perf_counter_ns()
+            scenario = Scenario.model_validate(raw)
+            values = (scenario.task_type, scenario.domain, scenario.input_language, scenario.privacy_requirement, scenario.hardware_available, scenario.hallucination_tolerance, scenario.temperature_preference, scenario.output_style)
+            t1 = time.perf_counter_ns()
+            if bundle.answer_table is not None:
+                model_input = grid_index(*values)
+            else:
+                model_input = np.array([feature_codes(*values)], dtype=np.uint8)
+                if bundle.predictor.kind == "pipeline":
+                    # Etapa que o pipeline sklearn repete internamente a cada chamada
+                    codes_to_frame(model_input)
+            t2 = time.perf_counter_ns()
+            if bundle.answer_table is not None:
+                prediction = bundle.answer_table[model_input]
+            else:
+                prediction = bundle.predictor.predict_codes(model_input)[0]
+            t3 = time.perf_counter_ns()
+            ModelResult(prediction=LLM_CLASSES[prediction], model_version=bundle.version).model_dump_json()
+            t4 = time.perf_counter_ns()
+            for stage, elapsed in zip(timings, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+                timings[stage].append(elapsed)
+
+        report = {}
+        for stage, values in timings.items():
+            values_us = np.array(values, dtype=np.float64) / 1e3
+            report[stage] = {"mean_us": float(values_us.mean()), "p50_us": float(np.percentile(values_us, 50)), "p99_us": float(np.percentile(values_us, 99))}
+        report["predict_mode"] = "table" if bundle.answer_table is not None else bundle.predictor.kind
+        return report
+
+
+TARGETS = {"api": (ApiTarget, API_DIR), "mcp": (McpTarget, MCP_DIR), "inprocess": (InprocessTarget, API_DIR)}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {level["concurrency"]: level for level in baseline["levels"]}
+    print(f"\nComparison with {baseline_path} (commit {baseline.get('commit')}):")
+    for level in current["levels"]:
+        old = previous.get(level["concurrency"])
+        if old is None:
+            continue
+        deltas = ", ".join(f"{key} {100 * (level[key] - old[key]) / old[key]:+.1f}%" for key in ("throughput_rps", "p50_ms", "p99_ms") if old[key])
+        print(f"  concurrency {level['concurrency']:>4}: {deltas}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latência/throughput do /predict-match, da tool MCP e do predict_match em processo")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="inprocess")
+    parser.add_argument("--url", default="http://localhost:8080", help="URL da API (alvo api)")
+    parser.add_argument("--concurrency", default="1,4,16", help="Níveis de concorrência, separados por vírgula")
+    parser.add_argument("--requests", type=int, default=2000, help="Requisições por nível")
+    parser.add_argument("--warmup", type=int, default=100, help="Requisições de aquecimento antes de medir")
+    parser.add_argument("--scenarios", help="CSV (formato do dataset) ou NDJSON de cenários gravados; padrão: aleatórios")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mcp-cache", action="store_true", help="Mantém o cache de resultados do MCP server ligado (alvo mcp)")
+    parser.add_argument("--output", help="Arquivo JSON de saída; padrão: bench_results/<data>_<commit>_<alvo>.json")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+
+    target_cls, target_dir = TARGETS[args.target]
+    sys.path.insert(0, str(target_dir))
+    target = target_cls(args)
+
+    scenarios = load_scenarios(args.scenarios, args.requests, args.seed)
+    if args.warmup:
+        target.run_level(scenarios[:args.warmup], 1)
+
+    commit = git_commit()
+    report = {
+        "target": args.target,
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "requests_per_level": args.requests,
+        "scenarios": args.scenarios or f"random(seed={args.seed})",
+        "levels": [],
+    }
+    print(f"{'concurrency':>11} {'rps':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for concurrency in args.concurrency:
+        level = {"concurrency": concurrency, **target.run_level(scenarios, concurrency)}
+        report["levels"].append(level)
+        print(f"{concurrency:>11} {level['throughput_rps']:>10.1f} {level['p50_ms']:>9.3f} {level['p95_ms']:>9.3f} {level['p99_ms']:>9.3f} {level['errors']:>7}")
+
+    if isinstance(target, InprocessTarget):
+        report["stages"] = target.stages(scenarios)
+        print("\nPer-stage time (us):")
+        for stage, values in report["stages"].items():
+            if isinstance(values, dict):
+                print(f"  {stage:<14} mean {values['mean_us']:>9.2f}  p50 {values['p50_us']:>9.2f}  p99 {values['p99_us']:>9.2f}")
+
+    output = args.output or os.path.join("bench_results", f"{datetime.now():%Y%m%d-%H%M%S}_{commit or 'nocommit'}_{args.target}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
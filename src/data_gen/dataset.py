@@ -0,0 +1,216 @@
+# Formato colunar do dataset do LLM Matchmaker: Parquet particionado (um arquivo por bloco de linhas), com as
+# colunas de enum gravadas como dicionário/categórico na ordem dos enums da API. CSV continua aceito na leitura
+# e como caminho de importação/exportação.
+#
+#   python src/data_gen/dataset.py import data/llm_matchmaker_dataset_1000.csv data/llm_matchmaker_dataset_1000.parquet
+#   python src/data_gen/dataset.py export data/llm_matchmaker_dataset_1000.parquet data/llm_matchmaker_dataset_1000.csv
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+
+import pandas as pd
+
+sys.path.append("src/llm_matchmaker/apipredict")
+from results.match_result import LLMs
+from utils.artifacts import file_sha256
+from utils.features import feature_schema
+
+TARGET = "best_model"
+SCORE_PREFIX = "score_"
+PART_FORMAT = "part-{:05d}.parquet"
+DEFAULT_ROWS_PER_PART = 1_000_000
+
+# Valores de cada coluna categórica, na ordem dos enums: o código do categórico é o ordinal usado pela API
+CATEGORIES = {**feature_schema(), TARGET: [llm.value for llm in LLMs]}
+DTYPES = {
+    **{name: pd.CategoricalDtype(values) for name, values in CATEGORIES.items()},
+    "determinism_needed": "int8",
+}
+SCORE_DTYPE = "float32"
+
+
+def is_score_column(name: str) -> bool:
+    return name.startswith(SCORE_PREFIX)
+
+
+def to_dataset_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Casts a frame with the dataset columns (e.g. read from CSV) to the shared dtypes.
+
+    Enum columns become categoricals whose categories follow the enum order, determinism_needed
+    becomes int8 and score_* columns become float32. Other columns are kept as they are.
+
+    Raises:
+        ValueError: If an enum column holds a value that is not part of its enum.
+    """
+    columns = {}
+    for name in df.columns:
+        column = df[name]
+        if name in DTYPES:
+            cast = column.astype(DTYPES[name])
+            if name in CATEGORIES and (cast.isna() & column.notna()).any():
+                raise ValueError(f"Column {name} has values outside {CATEGORIES[name]}")
+            column = cast
+        elif is_score_column(name):
+            column = column.astype(SCORE_DTYPE)
+        columns[name] = column
+    return pd.DataFrame(columns)
+
+
+def _projection(names: list[str], columns: list[str] | None, scores: bool) -> list[str]:
+    if columns is not None:
+        return list(columns)
+    return [name for name in names if scores or not is_score_column(name)]
+
+
+def read_dataset(path: str, columns: list[str] | None = None, scores: bool = False) -> pd.DataFrame:
+    """Reads the dataset from a Parquet file or partitioned directory, or from CSV.
+
+    Only the requested columns are read; by default every column except the score_* ones.
+
+    Args:
+        path (str): Parquet file, directory of Parquet parts or .csv file.
+        columns (list[str] | None): Columns to read, in this order.
+        scores (bool): Also read the score_* columns when columns is None.
+
+    Returns:
+        pd.DataFrame: Frame with the shared dtypes (see to_dataset_frame).
+    """
+    if path.endswith(".csv"):
+        names = pd.read_csv(path, nrows=0).columns.tolist()
+        usecols = _projection(names, columns, scores)
+        dtypes = {name: ("object" if name in CATEGORIES else dtype) for name, dtype in DTYPES.items() if name in usecols}
+        df = pd.read_csv(path, usecols=usecols, dtype=dtypes)[usecols]
+        return to_dataset_frame(df)
+
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format="parquet")
+    table = dataset.to_table(columns=_projection(dataset.schema.names, columns, scores))
+    # Todas as partes gravam o dicionário completo do enum, então os categóricos já saem na ordem dos enums
+    return to_dataset_frame(table.to_pandas())
+
+
+def iter_batches(path: str, columns: list[str] | None = None, batch_rows: int = 100_000, scores: bool = False):
+    """Streams the dataset in row order as frames of at most batch_rows rows.
+
+    Memory stays bounded by the batch size whatever the size of the dataset. Arguments
+    are the same as read_dataset's.
+
+    Yields:
+        pd.DataFrame: Consecutive batches with the shared dtypes (see to_dataset_frame).
+    """
+    if path.endswith(".csv"):
+        names = pd.read_csv(path, nrows=0).columns.tolist()
+        usecols = _projection(names, columns, scores)
+        dtypes = {name: ("object" if name in CATEGORIES else dtype) for name, dtype in DTYPES.items() if name in usecols}
+        for chunk in pd.read_csv(path, usecols=usecols, dtype=dtypes, chunksize=batch_rows):
+            yield to_dataset_frame(chunk[usecols])
+        return
+
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format="parquet")
+    for batch in dataset.to_batches(columns=_projection(dataset.schema.names, columns, scores), batch_size=batch_rows):
+        if batch.num_rows:
+            yield to_dataset_frame(batch.to_pandas())
+
+
+def write_part(df: pd.DataFrame, directory: str, part: int) -> str:
+    """Writes one part of a partitioned dataset (directory/part-NNNNN.parquet)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = os.path.join(directory, PART_FORMAT.format(part))
+    pq.write_table(pa.Table.from_pandas(to_dataset_frame(df), preserve_index=False), path, compression="zstd")
+    return path
+
+
+def write_dataset(df: pd.DataFrame, path: str, rows_per_part: int = DEFAULT_ROWS_PER_PART):
+    """Writes a frame as a partitioned Parquet dataset, replacing path when complete."""
+    staging = staging_dir(path)
+    for part, start in enumerate(range(0, max(len(df), 1), rows_per_part)):
+        write_part(df.iloc[start:start + rows_per_part], staging, part)
+    publish_dir(staging, path)
+
+
+def staging_dir(path: str) -> str:
+    """Creates an empty staging directory next to path, where the parts are written before publish_dir."""
+    staging = f"{path}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    return staging
+
+
+def publish_dir(staging: str, path: str):
+    """Moves a fully written staging directory to path, replacing the previous dataset."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+    os.rename(staging, path)
+
+
+def import_csv(csv_path: str, path: str, rows_per_part: int = DEFAULT_ROWS_PER_PART) -> int:
+    """Converts a CSV dataset into a partitioned Parquet dataset, one part per rows_per_part rows.
+
+    Returns:
+        int: Number of rows imported.
+    """
+    staging = staging_dir(path)
+    dtypes = {name: ("object" if name in CATEGORIES else dtype) for name, dtype in DTYPES.items()}
+    rows = 0
+    for part, chunk in enumerate(pd.read_csv(csv_path, dtype=dtypes, chunksize=rows_per_part)):
+        write_part(chunk, staging, part)
+        rows += len(chunk)
+    publish_dir(staging, path)
+    return rows
+
+
+def export_csv(path: str, csv_path: str) -> int:
+    """Writes a Parquet dataset back to CSV, one record batch at a time.
+
+    Returns:
+        int: Number of rows exported.
+    """
+    import pyarrow.dataset as ds
+
+    rows = 0
+    tmp_path = f"{csv_path}.tmp"
+    with open(tmp_path, "w", newline="") as f:
+        for batch in ds.dataset(path, format="parquet").to_batches():
+            batch.to_pandas().to_csv(f, index=False, header=rows == 0)
+            rows += batch.num_rows
+    os.replace(tmp_path, csv_path)
+    return rows
+
+
+def dataset_sha256(path: str) -> str:
+    """SHA-256 identifying a dataset: of the file, or of the part names and digests of a directory."""
+    if not os.path.isdir(path):
+        return file_sha256(path)
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(path)):
+        digest.update(f"{name}:{file_sha256(os.path.join(path, name))}\n".encode())
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa/exporta o dataset do LLM Matchmaker entre CSV e Parquet")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="CSV -> Parquet particionado")
+    import_parser.add_argument("csv")
+    import_parser.add_argument("parquet")
+    import_parser.add_argument("--rows-per-part", type=int, default=DEFAULT_ROWS_PER_PART)
+    export_parser = commands.add_parser("export", help="Parquet -> CSV")
+    export_parser.add_argument("parquet")
+    export_parser.add_argument("csv")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        rows = import_csv(args.csv, args.parquet, args.rows_per_part)
+        print(f"Imported {rows} rows into {args.parquet}")
+    else:
+        rows = export_csv(args.parquet, args.csv)
+        print(f"Exported {rows} rows to {args.csv}")
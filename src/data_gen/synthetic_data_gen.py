@@ -1,18 +1,28 @@
-# %%
 # Creating a synthetic dataset for the "LLM Matchmaker" project:
-# - 1000 rows
+# - N rows (1000 by default, tens of millions are fine)
 # - 5 candidate models
 # - Target: best_model (classification)
-# %%
-import random
+#
+# Every feature is drawn as an array of categorical codes and the heuristic scores of all
+# models are computed at once from per-feature score tables. Rows are produced in fixed-size
+# chunks, generated in parallel and written in order; each chunk has its own seed derived from
+# (--seed, chunk index), so the output only depends on --seed, --rows and --chunk-size, not on --workers.
+# Output is a partitioned Parquet dataset (one part per chunk, see dataset.py) or, for a .csv path, CSV.
+#
+#   python src/data_gen/synthetic_data_gen.py [--rows 10000000] [--chunk-size 250000] [--workers -1] [--seed 42]
+import argparse
+import os
+import time
+
 import numpy as np
 import pandas as pd
-from pathlib import Path
+from joblib import Parallel, delayed
 
-random.seed(42)
-np.random.seed(42)
+from dataset import publish_dir, staging_dir, write_part
 
-N = 1000
+DEFAULT_ROWS = 1000
+DEFAULT_CHUNK_SIZE = 250_000
+DEFAULT_SEED = 42
 
 # Candidate models
 models = [
@@ -32,6 +42,7 @@ privacy_opts = ["cloud", "local", "hybrid"]  # local => prefers local models
 hallucination_levels = ["low", "medium", "high"]
 determinism_opts = [0, 1]  # 1 => determinism needed
 temperature_prefs = ["low", "medium", "high"]
+output_styles = ["creative", "formal", "precise", "factual"]
 
 # Model capabilities (meta) — simplified and hypothetical
 model_meta = {
@@ -77,118 +88,213 @@ model_meta = {
     }
 }
 
-rows = []
-for i in range(N):
-    task_type = random.choice(task_types)
-    domain = random.choice(domains)
-    input_language = random.choice(languages)
-    # avg_input_length and n_samples removed
-    privacy_requirement = random.choices(["cloud","local","hybrid"], weights=[0.6,0.25,0.15])[0]
-    # max_latency_ms and max_cost_per_1k removed
-    hardware_available = random.choices(hardware_opts, weights=[0.25,0.45,0.2,0.1])[0]
-    hallucination_tolerance = random.choice(hallucination_levels)
-    determinism_needed = random.choice(determinism_opts)
-    temperature_pref = random.choice(temperature_prefs)
-
-    # Derived features
-    input_type = "text"
-    structured_input = 0  # mostly text tasks here
-    output_style = random.choice(["creative","formal","precise","factual"])
-
-    # Now score each model according to heuristics and pick best
-    scores = {}
-    for m in models:
-        meta = model_meta[m]
-        score = 0.0
-
-        # Task match: if model lists task_type as strength
-        if task_type in meta["strengths"]:
-            score += 2.0
-        # Domain sensitivity (simple): legal/medical prefer Claude/GPT-4 for reasoning/classification
-        if domain in ["legal","medical","finance"]:
-            if m in ["Gemini","Claude-2"]:
-                score += 1.5
-            if m in ["Llama-3-70B","Deepseek"]:
-                score += 0.5
-        # Language support
-        if input_language in meta["languages"]:
-            score += 1.0
+# Columns in output order: (name, categories, sampling weights or None for uniform)
+FEATURES = [
+    ("task_type", task_types, None),
+    ("domain", domains, None),
+    ("input_language", languages, None),
+    ("privacy_requirement", privacy_opts, [0.6, 0.25, 0.15]),
+    ("hardware_available", hardware_opts, [0.25, 0.45, 0.2, 0.1]),
+    ("hallucination_tolerance", hallucination_levels, None),
+    ("determinism_needed", determinism_opts, None),
+    ("temperature_pref", temperature_prefs, None),
+    ("output_style", output_styles, None),
+]
+NOISE_STD = 0.2
+
+
+def _model_scores(value, rule) -> list[float]:
+    return [rule(value, m, model_meta[m]) for m in models]
+
+
+def _task_score(task_type, m, meta):
+    # Task match: if model lists task_type as strength
+    return 2.0 if task_type in meta["strengths"] else 0.0
+
+
+def _domain_score(domain, m, meta):
+    # Domain sensitivity (simple): legal/medical prefer Claude/GPT-4 for reasoning/classification
+    if domain in ["legal","medical","finance"]:
+        if m in ["Gemini","Claude-2"]:
+            return 1.5
+        if m in ["Llama-3-70B","Deepseek"]:
+            return 0.5
+    return 0.0
+
+
+def _language_score(input_language, m, meta):
+    # Language support
+    return 1.0 if input_language in meta["languages"] else -0.5
+
+
+def _privacy_score(privacy_requirement, m, meta):
+    if privacy_requirement == "local":
+        return 2.0 if meta["offline"] else -2.0
+    if privacy_requirement == "hybrid" and meta["offline"]:
+        return 0.8
+    return 0.0
+
+
+def _hardware_score(hardware_available, m, meta):
+    # Hardware: if edge or cpu, favor smaller models
+    if hardware_available == "edge":
+        return 1.5 if m in ["Deepseek"] else -1.0
+    if hardware_available == "cpu":
+        return 0.8 if m in ["Deepseek","Llama-3-70B"] else -0.8
+    return 0.0
+
+
+def _hallucination_score(hallucination_tolerance, m, meta):
+    if hallucination_tolerance == "low":
+        return 1.0 if m in ["Gemini","Claude-2"] else -0.5
+    return 0.0
+
+
+def _output_style_score(output_style, m, meta):
+    # favor models with matching strengths to output style
+    if output_style in ["creative"] and m in ["GPT-4o","Deepseek"]:
+        return 0.7
+    if output_style in ["precise","factual"] and m in ["Claude-2","Gemini"]:
+        return 0.7
+    return 0.0
+
+
+SCORE_RULES = {
+    "task_type": _task_score,
+    "domain": _domain_score,
+    "input_language": _language_score,
+    "privacy_requirement": _privacy_score,
+    "hardware_available": _hardware_score,
+    "hallucination_tolerance": _hallucination_score,
+    "output_style": _output_style_score,
+}
+
+# Score tables: SCORE_TABLES[feature][code] is the score every model gets for that value (n_values x n_models)
+SCORE_TABLES = {
+    name: np.array([_model_scores(value, SCORE_RULES[name]) for value in categories])
+    for name, categories, _ in FEATURES if name in SCORE_RULES
+}
+# Determinism needed with a low temperature preference: same bonus for every model
+DETERMINISM_LOW_TEMPERATURE_BONUS = 0.3
+
+
+def draw_codes(rng: np.random.Generator, n: int) -> dict[str, np.ndarray]:
+    """Draws n rows of every feature as uint8 category codes."""
+    codes = {}
+    for name, categories, weights in FEATURES:
+        if weights is None:
+            codes[name] = rng.integers(0, len(categories), size=n, dtype=np.uint8)
         else:
-            score -= 0.5
-
-        # Latency and cost constraints removed
-
-        # Privacy
-        if privacy_requirement == "local":
-            if meta["offline"]:
-                score += 2.0
-            else:
-                score -= 2.0
-        elif privacy_requirement == "hybrid":
-            if meta["offline"]:
-                score += 0.8
-
-        # Hardware: if edge or cpu, favor smaller models
-        if hardware_available == "edge":
-            if m in ["Deepseek"]:
-                score += 1.5
-            elif m in ["Llama-3-70B","Gemini","Claude-2","GPT-4o"]:
-                score -= 1.0
-        if hardware_available == "cpu":
-            if m in ["Deepseek","Llama-3-70B"]:
-                score += 0.8
-            else:
-                score -= 0.8
-
-        # Hallucination tolerance / determinism
-        if hallucination_tolerance == "low":
-            if m in ["Gemini","Claude-2"]:
-                score += 1.0
-            else:
-                score -= 0.5
-        if determinism_needed == 1:
-            if temperature_pref == "low":
-                score += 0.3
-
-        # favor models with matching strengths to output style
-        if output_style in ["creative"] and m in ["GPT-4o","Deepseek"]:
-            score += 0.7
-        if output_style in ["precise","factual"] and m in ["Claude-2","Gemini"]:
-            score += 0.7
-
-        # slight bias for larger models on very large sample sizes for fine-tuning scenarios removed
-
-        # add small random noise to avoid ties
-        score += np.random.normal(0, 0.2)
-        scores[m] = score
-
-    # Choose best model (argmax)
-    best_model = max(scores.items(), key=lambda x: x[1])[0]
-
-    row = {
-        "task_type": task_type,
-        "domain": domain,
-        "input_language": input_language,
-        "privacy_requirement": privacy_requirement,
-        "hardware_available": hardware_available,
-        "hallucination_tolerance": hallucination_tolerance,
-        "determinism_needed": determinism_needed,
-        "temperature_pref": temperature_pref,
-        "output_style": output_style,
-        "best_model": best_model
-    }
-    # also include model score columns (optional) for transparency
-    for m in models:
-        row[f"score_{m}"] = round(scores[m], 3)
-    rows.append(row)
+            codes[name] = rng.choice(len(categories), size=n, p=weights).astype(np.uint8)
+    return codes
+
+
+def score_matrix(codes: dict[str, np.ndarray], rng: np.random.Generator) -> np.ndarray:
+    """Heuristic score of every model for every row (n x n_models), with gaussian noise to avoid ties."""
+    n = len(codes["task_type"])
+    scores = rng.normal(0, NOISE_STD, size=(n, len(models)))
+    for name, table in SCORE_TABLES.items():
+        scores += table[codes[name]]
+    determinism_low_temperature = (codes["determinism_needed"] == 1) & (codes["temperature_pref"] == temperature_prefs.index("low"))
+    scores += DETERMINISM_LOW_TEMPERATURE_BONUS * determinism_low_temperature[:, None]
+    return scores
+
+
+def chunk_seed(seed: int, chunk: int) -> np.random.SeedSequence:
+    """Seed of one chunk: depends only on the base seed and the chunk index."""
+    return np.random.SeedSequence(seed, spawn_key=(chunk,))
+
+
+def generate_chunk(seed: int, chunk: int, n: int) -> pd.DataFrame:
+    """Generates the rows of one chunk as a DataFrame with categorical columns."""
+    rng = np.random.default_rng(chunk_seed(seed, chunk))
+    codes = draw_codes(rng, n)
+    scores = score_matrix(codes, rng)
+    best = scores.argmax(axis=1)
+
+    columns = {}
+    for name, categories, _ in FEATURES:
+        if name == "determinism_needed":
+            columns[name] = codes[name]
+        else:
+            columns[name] = pd.Categorical.from_codes(codes[name], categories=categories)
+    columns["best_model"] = pd.Categorical.from_codes(best, categories=models)
+    # also include model score columns for transparency
+    rounded = scores.round(3)
+    for j, m in enumerate(models):
+        columns[f"score_{m}"] = rounded[:, j]
+    return pd.DataFrame(columns)
+
+
+def _best_model_counts(df: pd.DataFrame) -> np.ndarray:
+    return np.bincount(df["best_model"].cat.codes, minlength=len(models))
+
+
+def _render_chunk(seed: int, chunk: int, n: int, header: bool) -> tuple[str, np.ndarray]:
+    # Formatting the CSV text is the expensive part, so it happens in the worker too
+    df = generate_chunk(seed, chunk, n)
+    return df.to_csv(index=False, header=header), _best_model_counts(df)
+
+
+def _write_chunk(seed: int, chunk: int, n: int, directory: str) -> tuple[None, np.ndarray]:
+    # Each worker writes its own Parquet part; only the counts travel back
+    df = generate_chunk(seed, chunk, n)
+    write_part(df, directory, chunk)
+    return None, _best_model_counts(df)
+
+
+def generate(out_path: str, rows: int, chunk_size: int = DEFAULT_CHUNK_SIZE, seed: int = DEFAULT_SEED, workers: int = -1) -> np.ndarray:
+    """Writes a synthetic dataset of the given number of rows.
+
+    Chunks are generated in parallel, with at most a few chunks held in memory at a time. For
+    Parquet every chunk becomes one part of the dataset; for CSV they are appended in chunk order.
+    The output is written under a temporary name and renamed when complete.
+
+    Args:
+        out_path (str): Output path: a .csv file, or the Parquet dataset directory otherwise.
+        rows (int): Number of rows.
+        chunk_size (int): Rows per chunk; part of what defines the output together with seed and rows.
+        seed (int): Base seed.
+        workers (int): Parallel worker processes (joblib n_jobs; -1 uses every CPU).
+
+    Returns:
+        np.ndarray: Number of rows per best_model, in the order of models.
+    """
+    sizes = [min(chunk_size, rows - start) for start in range(0, rows, chunk_size)]
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    counts = np.zeros(len(models), dtype=np.int64)
+
+    if not out_path.endswith(".csv"):
+        staging = staging_dir(out_path)
+        jobs = (delayed(_write_chunk)(seed, chunk, n, staging) for chunk, n in enumerate(sizes))
+        for _, chunk_counts in Parallel(n_jobs=workers, return_as="generator_unordered", pre_dispatch="2*n_jobs")(jobs):
+            counts += chunk_counts
+        publish_dir(staging, out_path)
+        return counts
+
+    jobs = (delayed(_render_chunk)(seed, chunk, n, chunk == 0) for chunk, n in enumerate(sizes))
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, "w", newline="") as f:
+        for text, chunk_counts in Parallel(n_jobs=workers, return_as="generator", pre_dispatch="2*n_jobs")(jobs):
+            f.write(text)
+            counts += chunk_counts
+    os.replace(tmp_path, out_path)
+    return counts
 
-df = pd.DataFrame(rows)
 
-# Save CSV
-out_path = Path("data/llm_matchmaker_dataset_1000.csv")
-df.to_csv(out_path, index=False)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera o dataset sintético do LLM Matchmaker")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Linhas por bloco; junto com --seed define o resultado")
+    parser.add_argument("--workers", type=int, default=-1, help="Processos em paralelo (-1 usa todas as CPUs); não altera o resultado")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="Diretório Parquet de saída, ou arquivo .csv (padrão: data/llm_matchmaker_dataset_<rows>.parquet)")
+    args = parser.parse_args()
 
-print(f"Synthetic dataset saved to: {out_path.resolve()}")
-print(df["best_model"].value_counts())
-df.sample(5, random_state=42)
+    out_path = args.output or f"data/llm_matchmaker_dataset_{args.rows}.parquet"
+    start = time.perf_counter()
+    counts = generate(out_path, args.rows, args.chunk_size, args.seed, args.workers)
+    seconds = time.perf_counter() - start
 
+    print(f"Synthetic dataset saved to: {os.path.abspath(out_path)} ({args.rows} rows in {seconds:.1f}s)")
+    print(pd.Series(counts, index=models, name="best_model").sort_values(ascending=False))
@@ -0,0 +1,26 @@
+import gc
+import os
+
+# Servidor multi-worker: gunicorn gerencia N processos uvicorn que compartilham a porta.
+# A app é importada e os modelos carregados uma vez no master; os workers herdam tudo via fork,
+# e os arrays em memory-map (tabela de respostas, preditor nativo) ficam em uma única cópia física.
+
+bind = os.getenv("BIND", "0.0.0.0:80")
+# Número de workers (padrão: um por CPU do container)
+workers = int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = 30
+accesslog = None
+
+
+def when_ready(server):
+    from utils.logs import configure_logging
+    from utils.models_loader import load_models
+
+    configure_logging()
+    load_models()
+    # Objetos criados até aqui nunca mais são visitados pelo GC, evitando escrever (e copiar) páginas herdadas do master
+    gc.freeze()
+    server.log.info("Models loaded in master, forking %d workers", workers)
@@ -1,15 +1,64 @@
+# Primeiro import da app: marca o início da fase de importações do log de startup
+from utils import startup
+
+import asyncio
+import logging
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from routers import predicts
+from routers import admin, health, metrics as metrics_router, predicts
+from services.drift import watch_drift
+from services.models import warm_executor, watch_registry
+from utils import audit, config, metrics
+import utils.models_loader as models
 from utils.models_loader import load_models
+from utils.execution import start_executor, shutdown_executor
+from utils.logs import configure_logging, stop_logging
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    with startup.phase("logging"):
+        configure_logging()
+    # Sem efeito quando o gunicorn já carregou os modelos no master (preload) antes do fork
     load_models()
 
+    logger = logging.getLogger(__name__)
+    with startup.phase("executor"):
+        start_executor()
+    if config.WARMUP_ROWS > 0:
+        with startup.phase("warmup"):
+            await warm_executor(logger)
+    startup.set_ready(True)
+
+    memory = metrics.process_memory()
+    logger.info(
+        "Worker ready", extra={"pid": os.getpid(), "model_version": models.bundle.version, "predictor": models.bundle.predictor.kind, **startup.summary(), "rss_bytes": memory["Rss"], "pss_bytes": memory["Pss"]}
+    )
+
+    # Troca o modelo em segundo plano quando uma nova versão é ativada no registro
+    watcher = asyncio.create_task(watch_registry(config.MODEL_WATCH_INTERVAL, logger)) if config.MODEL_WATCH_INTERVAL > 0 else None
+    # Agrega as amostras do tráfego e compara com o perfil do dataset de treino
+    drift_watcher = asyncio.create_task(watch_drift(config.DRIFT_INTERVAL, logger)) if config.DRIFT_SAMPLE_RATE > 0 and config.DRIFT_INTERVAL > 0 else None
+    # Grava em lotes, em segundo plano, o registro de auditoria das recomendações
+    audit_writer = None
+    if config.AUDIT_DB_PATH:
+        audit.log.open()
+        audit_writer = asyncio.create_task(audit.log.run(config.AUDIT_FLUSH_INTERVAL))
+
     yield
 
+    # /readyz volta a 503 para o balanceador parar de enviar tráfego durante o desligamento
+    startup.set_ready(False)
+    for task in (watcher, drift_watcher, audit_writer):
+        if task is not None:
+            task.cancel()
+    shutdown_executor()
+    # Grava o que ainda estava no buffer antes de sair
+    await audit.log.close()
+    stop_logging()
+
 app = FastAPI(
     title="LLM Matchmaker API",
     docs_url="/docs",  # URL para disponibilização do Swagger UI
@@ -25,4 +74,13 @@ app.add_middleware(
     allow_headers=['*']
 )
 
-app.include_router(predicts.router)
\ No newline at end of file
+# Contagem, latência e requisições em andamento por rota, expostas em /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+app.include_router(predicts.router)
+app.include_router(metrics_router.router)
+app.include_router(admin.router)
+app.include_router(health.router)
+
+metrics.register_routes(app)
+startup.imports_done()
\ No newline at end of file
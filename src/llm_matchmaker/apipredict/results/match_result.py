@@ -1,6 +1,8 @@
 from pydantic import BaseModel
 from enum import Enum
 
+from schemas.scenario import Scenario
+
 class LLMs(Enum):
     GEMINI = "Gemini"
     DEEPSEEK = "Deepseek"
@@ -8,6 +10,36 @@ class LLMs(Enum):
     CLAUDE_2 = "Claude-2"
     GPT_4O = "GPT-4o"
 
+class LLMScore(BaseModel):
+    llm: LLMs
+    score: float
+    # Preenchidos pelo /predict-match/budget: custo de serviço usado nos filtros de orçamento
+    latency_ms: float | None = None
+    cost_per_1k: float | None = None
+
 class ModelResult(BaseModel):
     prediction: LLMs
+    model_version: str | None = None
+    # Presente quando a requisição pede top_k: LLMs ordenados pela probabilidade do modelo
+    ranking: list[LLMScore] | None = None
+
+
+class TextMatchResult(ModelResult):
+    # Cenário extraído do texto livre e campos que não apareceram no texto (preenchidos com o padrão)
+    scenario: Scenario
+    defaults: list[str]
+
+
+class ScenarioResult(BaseModel):
+    # Posição do cenário na lista enviada; os cenários inválidos trazem error no lugar da predição
+    index: int
+    prediction: LLMs | None = None
+    ranking: list[LLMScore] | None = None
+    error: list[dict] | None = None
+
 
+class ScenariosResult(BaseModel):
+    model_version: str
+    # Cenários distintos efetivamente avaliados pelo modelo, depois de remover os repetidos
+    unique_scenarios: int
+    results: list[ScenarioResult]
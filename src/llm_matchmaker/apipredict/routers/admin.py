@@ -0,0 +1,80 @@
+import asyncio
+import csv
+import io
+import json
+import secrets
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from results.match_result import LLMs
+from utils import audit, config, registry
+from utils.dependencies import get_logger
+from services.models import reload_model
+import utils.models_loader as models
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
+
+@router.get("/models", summary='Versões de modelo no registro')
+async def List_Models():
+    return {
+        "serving": models.bundle.version,
+        "current": registry.current_version(),
+        "versions": registry.list_versions(),
+    }
+
+@router.post("/reload", summary='Carrega e ativa uma versão de modelo sem reiniciar')
+async def Reload_Model(version: str | None = None, logger = Depends(get_logger)):
+    bundle = await reload_model(version, logger)
+    return {"model_version": bundle.version, "metadata": bundle.metadata}
+
+def _audit_filters(since: datetime | None = Query(None, description="Registros a partir deste instante (ISO 8601; sem fuso = UTC)"),
+                   until: datetime | None = Query(None, description="Registros anteriores a este instante"),
+                   route: str | None = Query(None, description="Ex.: /predict-match"),
+                   prediction: LLMs | None = None,
+                   model_version: str | None = None) -> dict:
+    if not audit.log.enabled:
+        raise HTTPException(status_code=404, detail="Audit log is disabled (AUDIT_DB_PATH not set)")
+    return {"since": since, "until": until, "route": route, "prediction": prediction.value if prediction else None, "model_version": model_version}
+
+@router.get("/audit", summary='Consulta o registro de auditoria das recomendações, mais recentes primeiro')
+async def Audit_Records(filters: dict = Depends(_audit_filters), limit: int = Query(100, ge=1, le=10000), offset: int = Query(0, ge=0)):
+    # Grava antes o buffer deste worker; os dos demais chegam ao banco em até AUDIT_FLUSH_INTERVAL
+    await audit.log.flush()
+    records = await asyncio.to_thread(audit.query, config.AUDIT_DB_PATH, limit=limit, offset=offset, **filters)
+    return {"count": len(records), "records": records}
+
+@router.get("/audit/export", summary='Exporta o registro de auditoria (NDJSON ou CSV), mais antigos primeiro')
+async def Audit_Export(filters: dict = Depends(_audit_filters), format: Literal["ndjson", "csv"] = "ndjson"):
+    await audit.log.flush()
+    conn, cursor = await asyncio.to_thread(audit.export_cursor, config.AUDIT_DB_PATH, **filters)
+
+    async def rows():
+        # Lê em blocos fora do event loop: a exportação não carrega o banco inteiro em memória
+        try:
+            if format == "csv":
+                yield _csv_line(audit.COLUMNS)
+            while block := await asyncio.to_thread(cursor.fetchmany, 1000):
+                if format == "csv":
+                    # Colunas como gravadas (params e response em texto), só a data convertida para ISO 8601
+                    yield "".join(_csv_line((row[0], audit.iso_timestamp(row[1])) + row[2:]) for row in block)
+                else:
+                    yield "".join(json.dumps(audit.decode_row(row)) + "\n" for row in block)
+        finally:
+            conn.close()
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(rows(), media_type=media_type, headers={"Content-Disposition": f'attachment; filename="audit.{format}"'})
+
+def _csv_line(row) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(row)
+    return buffer.getvalue()
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from utils import execution, startup
+import utils.models_loader as models
+
+router = APIRouter(tags=["Health"])
+
+@router.get("/healthz", summary='Liveness: o processo responde')
+async def Healthz():
+    return {"status": "ok"}
+
+@router.get("/readyz", summary='Readiness: modelo carregado e aquecido, pronto para receber tráfego')
+async def Readyz():
+    # 503 até o fim do startup (modelo, aquecimento e executor) e de novo a partir do início do shutdown
+    if not startup.ready or models.bundle is None or execution.predict_executor is None:
+        return JSONResponse({"status": "not_ready"}, status_code=503)
+    return {"status": "ready", "model_version": models.bundle.version}
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
+
+from services.drift import refresh_drift
+from utils import drift, metrics
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", summary='Métricas no formato Prometheus', response_class=PlainTextResponse)
+async def Metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/drift", summary='Distribuição do tráfego do /predict-match e divergência em relação ao dataset de treino')
+async def Drift(refresh: bool = Query(False, description="Agrega as amostras pendentes agora em vez de devolver o último cálculo periódico")):
+    # Contagens por worker: cada processo do gunicorn amostra o tráfego que ele mesmo atende
+    if refresh or drift.monitor.snapshot is None:
+        return await refresh_drift()
+    return drift.monitor.snapshot
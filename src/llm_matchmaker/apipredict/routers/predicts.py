@@ -1,11 +1,194 @@
-from fastapi import APIRouter, Depends
+import json
+from typing import Any, AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from utils import config
 from utils.dependencies import get_logger
-from services.predicts import predict_match
-from results.match_result import ModelResult
+from utils import audit, drift, execution, http_cache
+import utils.models_loader as models
+from utils.responses import RequestStreamingResponse
+from services.predicts import predict_match, predict_ranking, predict_scenarios, predict_within_budget
+from services.batch import stream_batch_predictions, stream_text_predictions
+from results.match_result import LLMs, ModelResult, ScenarioResult, ScenariosResult, TextMatchResult
+from schemas.batch import RankedScenario
+from utils.text_parser import normalize, parse_text
+from utils.constraints import feasible_mask, mask_codes
+from pydantic import ValidationError
 from enums.params import TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, DeterminismNeeded, TemperaturePreference, OutputStyle
 
 router = APIRouter(tags=["Predicts"])
 
-@router.get("/predict-match", summary='Predicão com Melhor LLM', response_model=ModelResult)
-async def Predict_Match(task_type: TaskType, domain: Domain, input_language: InputLanguage, privacy_requirement: PrivacyRequirement, hardware_available: HardwareAvailable, hallucination_tolerance: HallucinationTolerance, determinism_needed: DeterminismNeeded, temperature_preference: TemperaturePreference, output_style: OutputStyle, logger = Depends(get_logger)):
-    return predict_match(task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, determinism_needed, temperature_preference, output_style, logger)
\ No newline at end of file
+_BATCH_BODY_DOC = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+            "application/x-ndjson": {"schema": {"type": "string", "description": "Um cenário JSON por linha"}},
+        },
+    }
+}
+
+_TEXT_BATCH_BODY_DOC = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {"schema": {"type": "array", "items": {"type": "string"}}},
+            "application/x-ndjson": {"schema": {"type": "string", "description": "Um texto (string JSON) por linha"}},
+        },
+    }
+}
+
+_CACHED_RESPONSES_DOC = {304: {"description": "O If-None-Match corresponde ao ETag atual; nenhuma inferência é executada"}}
+
+@router.get("/predict-match", summary='Predicão com Melhor LLM', response_model=ModelResult, response_model_exclude_none=True, responses=_CACHED_RESPONSES_DOC)
+async def Predict_Match(request: Request, task_type: TaskType, domain: Domain, input_language: InputLanguage, privacy_requirement: PrivacyRequirement, hardware_available: HardwareAvailable, hallucination_tolerance: HallucinationTolerance, determinism_needed: DeterminismNeeded, temperature_preference: TemperaturePreference, output_style: OutputStyle,
+                        top_k: int | None = Query(None, ge=1, le=len(LLMs), description="Devolve os top_k LLMs ordenados pela probabilidade do modelo"),
+                        exclude: list[LLMs] = Query([], description="LLMs que não podem ser recomendados (aplicado antes do top_k)"),
+                        logger = Depends(get_logger)):
+    # Amostra o cenário antes do cache: o monitor de drift vê todo o tráfego, inclusive respostas 304 e do cache
+    drift.monitor.record(task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, temperature_preference, output_style)
+    canonical = http_cache.canonical_query(task_type=task_type, domain=domain, input_language=input_language, privacy_requirement=privacy_requirement, hardware_available=hardware_available, hallucination_tolerance=hallucination_tolerance, determinism_needed=determinism_needed, temperature_preference=temperature_preference, output_style=output_style, top_k=top_k, exclude=exclude)
+    return await _cached_response(request, "/predict-match", canonical, lambda: _predict_scenario(task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, determinism_needed, temperature_preference, output_style, top_k, exclude, logger))
+
+async def _cached_response(request: Request, route: str, canonical: str, compute) -> Response:
+    # A resposta é função só dos parâmetros e do modelo: o ETag combina os dois, e um If-None-Match
+    # igual ou uma entrada no cache de respostas dispensam a inferência e a serialização
+    bundle = models.bundle
+    tag = http_cache.etag(bundle.model_sha256, route, canonical)
+    headers = http_cache.cache_headers(tag, bundle.version)
+    if http_cache.not_modified(request.headers.get("if-none-match"), tag):
+        http_cache.RESPONSE_CACHE_TOTAL.inc(http_cache.CACHE_NOT_MODIFIED)
+        return Response(status_code=304, headers=headers)
+    body = http_cache.response_cache.get(tag)
+    if body is not None:
+        http_cache.RESPONSE_CACHE_TOTAL.inc(http_cache.CACHE_HIT)
+        # Respostas do cache também são recomendações servidas; o 304 não, o cliente já tem a que foi registrada
+        await audit.log.record(route, request.scope["query_string"], body, bundle.version)
+        return Response(body, media_type="application/json", headers=headers)
+
+    result = await compute()
+    http_cache.RESPONSE_CACHE_TOTAL.inc(http_cache.CACHE_MISS)
+    body = result.model_dump_json(exclude_none=True).encode()
+    await audit.log.record(route, request.scope["query_string"], body, result.model_version)
+    if result.model_version != bundle.version:
+        # O modelo foi trocado durante a predição: a resposta não corresponde ao ETag calculado
+        return Response(body, media_type="application/json", headers={"X-Model-Version": result.model_version, "Cache-Control": "no-cache"})
+    http_cache.response_cache.put(tag, bundle.model_sha256, body)
+    return Response(body, media_type="application/json", headers=headers)
+
+async def _predict_scenario(task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, determinism_needed, temperature_preference, output_style, top_k: int | None, exclude: list[LLMs], logger) -> ModelResult:
+    if top_k is None and not exclude:
+        return await execution.predict_executor.run(predict_match, task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, determinism_needed, temperature_preference, output_style, logger)
+    if len(set(exclude)) == len(LLMs):
+        raise HTTPException(status_code=422, detail="exclude removes every LLM")
+    result = await execution.predict_executor.run(predict_ranking, task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, determinism_needed, temperature_preference, output_style, top_k or 1, exclude, logger)
+    if top_k is None:
+        # Só a exclusão foi pedida: devolve apenas o melhor LLM restante
+        result.ranking = None
+    return result
+
+@router.get("/predict-match/text", summary='Melhor LLM a partir de uma descrição em texto livre (PT ou EN)', response_model=TextMatchResult, response_model_exclude_none=True, responses=_CACHED_RESPONSES_DOC)
+async def Predict_Match_Text(request: Request,
+                             text: str = Query(..., min_length=1, max_length=config.TEXT_MAX_LENGTH, description="Ex.: Preciso gerar resumos jurídicos em português com baixa taxa de alucinação"),
+                             top_k: int | None = Query(None, ge=1, le=len(LLMs), description="Devolve os top_k LLMs ordenados pela probabilidade do modelo"),
+                             exclude: list[LLMs] = Query([], description="LLMs que não podem ser recomendados (aplicado antes do top_k)"),
+                             logger = Depends(get_logger)):
+    # Parser local e determinístico (autômato de frases + cache LRU): microssegundos, sem chamada a LLM
+    parsed = parse_text(text)
+    scenario = parsed.scenario
+    drift.monitor.record(scenario.task_type, scenario.domain, scenario.input_language, scenario.privacy_requirement, scenario.hardware_available, scenario.hallucination_tolerance, scenario.temperature_preference, scenario.output_style)
+
+    async def compute() -> TextMatchResult:
+        result = await _predict_scenario(scenario.task_type, scenario.domain, scenario.input_language, scenario.privacy_requirement, scenario.hardware_available, scenario.hallucination_tolerance, scenario.determinism_needed, scenario.temperature_preference, scenario.output_style, top_k, exclude, logger)
+        return TextMatchResult(prediction=result.prediction, model_version=result.model_version, ranking=result.ranking, scenario=scenario, defaults=list(parsed.defaults))
+
+    # A resposta só depende do texto normalizado, então variações de caixa, acentos e pontuação compartilham o ETag
+    canonical = http_cache.canonical_query(text=" ".join(normalize(text)), top_k=top_k, exclude=exclude)
+    return await _cached_response(request, "/predict-match/text", canonical, compute)
+
+@router.get("/predict-match/budget", summary='Melhor LLM dentro dos orçamentos de latência e custo', response_model=ModelResult, response_model_exclude_none=True, responses=_CACHED_RESPONSES_DOC)
+async def Predict_Match_Budget(request: Request, task_type: TaskType, domain: Domain, input_language: InputLanguage, privacy_requirement: PrivacyRequirement, hardware_available: HardwareAvailable, hallucination_tolerance: HallucinationTolerance, determinism_needed: DeterminismNeeded, temperature_preference: TemperaturePreference, output_style: OutputStyle,
+                               max_latency_ms: float | None = Query(None, gt=0, description="Latência máxima aceita, em ms"),
+                               max_cost_per_1k: float | None = Query(None, ge=0, description="Custo máximo aceito por 1k tokens"),
+                               top_k: int | None = Query(None, ge=1, le=len(LLMs), description="Devolve os top_k LLMs viáveis ordenados pela probabilidade do modelo"),
+                               exclude: list[LLMs] = Query([], description="LLMs que não podem ser recomendados"),
+                               logger = Depends(get_logger)):
+    # Filtros rígidos antes de qualquer inferência: LLMs fora do orçamento nunca chegam ao modelo
+    feasible = mask_codes(feasible_mask(max_latency_ms, max_cost_per_1k, exclude))
+    if not feasible:
+        raise HTTPException(status_code=422, detail="No LLM fits the latency and cost budgets")
+    drift.monitor.record(task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, temperature_preference, output_style)
+    # Orçamentos que deixam os mesmos LLMs viáveis têm a mesma resposta e compartilham o ETag
+    canonical = http_cache.canonical_query(task_type=task_type, domain=domain, input_language=input_language, privacy_requirement=privacy_requirement, hardware_available=hardware_available, hallucination_tolerance=hallucination_tolerance, determinism_needed=determinism_needed, temperature_preference=temperature_preference, output_style=output_style, top_k=top_k, feasible=feasible)
+    return await _cached_response(request, "/predict-match/budget", canonical, lambda: execution.predict_executor.run(predict_within_budget, task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, determinism_needed, temperature_preference, output_style, feasible, top_k, logger))
+
+async def _iter_ndjson(request: Request) -> AsyncIterator[Any]:
+    # Decodifica o corpo linha a linha conforme chega, sem carregá-lo inteiro em memória
+    pending = b""
+    async for block in request.stream():
+        pending += block
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _decode_line(line)
+    if pending.strip():
+        yield _decode_line(pending)
+
+def _decode_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        # Linha inválida segue adiante e é reportada como erro daquele item
+        return line.decode(errors="replace")
+
+async def _iter_list(scenarios: list) -> AsyncIterator[Any]:
+    for scenario in scenarios:
+        yield scenario
+
+async def _batch_items(request: Request) -> AsyncIterator[Any]:
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return _iter_ndjson(request)
+    try:
+        items = json.loads(await request.body())
+    except ValueError:
+        items = None
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    return _iter_list(items)
+
+@router.post("/predict-match/batch", summary='Predição em lote (JSON array ou NDJSON) com resposta NDJSON', openapi_extra=_BATCH_BODY_DOC)
+async def Predict_Match_Batch(request: Request, chunk_size: int = Query(config.BATCH_CHUNK_SIZE, ge=1, le=config.BATCH_CHUNK_SIZE), logger = Depends(get_logger)):
+    return RequestStreamingResponse(stream_batch_predictions(await _batch_items(request), chunk_size, logger, "/predict-match/batch"), media_type="application/x-ndjson", headers={"X-Model-Version": models.bundle.version})
+
+@router.post("/predict-match/text/batch", summary='Predição em lote a partir de textos livres (JSON array ou NDJSON de strings) com resposta NDJSON', openapi_extra=_TEXT_BATCH_BODY_DOC)
+async def Predict_Match_Text_Batch(request: Request, chunk_size: int = Query(config.BATCH_CHUNK_SIZE, ge=1, le=config.BATCH_CHUNK_SIZE), logger = Depends(get_logger)):
+    return RequestStreamingResponse(stream_text_predictions(await _batch_items(request), chunk_size, logger, "/predict-match/text/batch"), media_type="application/x-ndjson", headers={"X-Model-Version": models.bundle.version})
+
+@router.post("/predict-match/scenarios", summary='Vários cenários de uma vez, cada um com top_k e exclude, avaliados em uma única predição', response_model=ScenariosResult, response_model_exclude_none=True, openapi_extra=_BATCH_BODY_DOC)
+async def Predict_Match_Scenarios(request: Request, response: Response, logger = Depends(get_logger)):
+    items = [item async for item in await _batch_items(request)]
+    if len(items) > config.BATCH_CHUNK_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {config.BATCH_CHUNK_SIZE} scenarios per request; use /predict-match/batch for larger inputs")
+
+    # Cenários inválidos viram erro na própria posição, sem impedir a predição dos demais
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            scenario = RankedScenario.model_validate(item)
+        except ValidationError as e:
+            errors.append(ScenarioResult(index=index, error=e.errors(include_url=False, include_context=False, include_input=False)))
+        else:
+            valid.append((index, scenario))
+            drift.monitor.record(scenario.task_type, scenario.domain, scenario.input_language, scenario.privacy_requirement, scenario.hardware_available, scenario.hallucination_tolerance, scenario.temperature_preference, scenario.output_style)
+
+    if valid:
+        result = await execution.predict_executor.run(predict_scenarios, valid, logger)
+    else:
+        result = ScenariosResult(model_version=models.bundle.version, unique_scenarios=0, results=[])
+    scenarios = dict(valid)
+    for entry in result.results:
+        await audit.log.record("/predict-match/scenarios", scenarios[entry.index], entry, result.model_version)
+    result.results = sorted(result.results + errors, key=lambda entry: entry.index)
+    response.headers["X-Model-Version"] = result.model_version
+    return result
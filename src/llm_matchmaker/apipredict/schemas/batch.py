@@ -0,0 +1,15 @@
+from pydantic import Field, model_validator
+
+from results.match_result import LLMs
+from schemas.scenario import Scenario
+
+class RankedScenario(Scenario):
+    """Scenario of POST /predict-match/scenarios, with the per-scenario top_k and exclude of /predict-match."""
+    top_k: int | None = Field(None, ge=1, le=len(LLMs))
+    exclude: list[LLMs] = []
+
+    @model_validator(mode="after")
+    def _keeps_one_llm(self):
+        if len(set(self.exclude)) == len(LLMs):
+            raise ValueError("exclude removes every LLM")
+        return self
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+
+from enums.params import TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, DeterminismNeeded, TemperaturePreference, OutputStyle
+
+class Scenario(BaseModel):
+    """One prediction scenario, with the same fields as the /predict-match query parameters."""
+    task_type: TaskType
+    domain: Domain
+    input_language: InputLanguage
+    privacy_requirement: PrivacyRequirement
+    hardware_available: HardwareAvailable
+    hallucination_tolerance: HallucinationTolerance
+    determinism_needed: DeterminismNeeded
+    temperature_preference: TemperaturePreference
+    output_style: OutputStyle
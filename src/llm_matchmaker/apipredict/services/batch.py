@@ -0,0 +1,114 @@
+import json
+from typing import Any, AsyncIterator
+
+import numpy as np
+from pydantic import ValidationError
+
+from schemas.scenario import Scenario
+from services.predicts import predict_match_codes
+from utils.predictors import LLM_CLASSES
+from utils.features import MODEL_PARAMS, feature_codes
+from utils.text_parser import parse_text
+from utils import audit, config, drift, execution
+import utils.models_loader as models
+
+# Respostas já serializadas por classe, para não chamar json.dumps no valor da predição
+_PREDICTION_JSON = tuple(json.dumps(llm.value) for llm in LLM_CLASSES)
+
+
+async def _flush(codes: np.ndarray, lines: list[str | None], slots: list[int], start: int, route: str, params: list, extras: list[str] | None = None) -> bytes:
+    # Preenche as posições dos cenários válidos; as de erro já vêm serializadas
+    if slots:
+        drift.monitor.record_codes(codes[:len(slots)])
+        model_version = models.bundle.version
+        # Com o stream já aberto não dá mais para responder 503: aguarda vaga no executor
+        predictions = await execution.predict_executor.run(predict_match_codes, codes[:len(slots)].copy(), reject_when_full=False)
+        for i, (slot, code) in enumerate(zip(slots, predictions)):
+            extra = f", {extras[i]}" if extras else ""
+            lines[slot] = f'{{"index": {start + slot}, "prediction": {_PREDICTION_JSON[code]}{extra}}}'
+            await audit.log.record(route, params[i], lines[slot], model_version)
+    return ("\n".join(lines) + "\n").encode()
+
+
+async def stream_batch_predictions(items: AsyncIterator[Any], chunk_size: int, logger, route: str) -> AsyncIterator[bytes]:
+    """Validates and predicts scenarios block by block, yielding NDJSON lines in input order.
+
+    At most chunk_size scenarios are held in memory at a time, whatever the size of the input.
+
+    Args:
+        items (AsyncIterator[Any]): Decoded JSON scenarios, in input order.
+        chunk_size (int): Maximum number of scenarios per model call.
+        logger: Request logger.
+        route (str): Route recorded with each prediction in the audit log.
+
+    Yields:
+        bytes: NDJSON block with one {"index", "prediction"} or {"index", "error"} object per scenario.
+    """
+    codes = np.empty((chunk_size, len(MODEL_PARAMS)), dtype=np.uint8)
+    lines: list[str | None] = []
+    slots: list[int] = []
+    scenarios: list[Scenario] = []
+    start = 0
+    total = 0
+
+    async for item in items:
+        index = total
+        total += 1
+        try:
+            scenario = Scenario.model_validate(item)
+        except ValidationError as e:
+            error = json.dumps(e.errors(include_url=False, include_context=False, include_input=False))
+            lines.append(f'{{"index": {index}, "error": {error}}}')
+        else:
+            codes[len(slots)] = feature_codes(scenario.task_type, scenario.domain, scenario.input_language, scenario.privacy_requirement, scenario.hardware_available, scenario.hallucination_tolerance, scenario.temperature_preference, scenario.output_style)
+            slots.append(len(lines))
+            scenarios.append(scenario)
+            lines.append(None)
+
+        if len(lines) >= chunk_size:
+            yield await _flush(codes, lines, slots, start, route, scenarios)
+            start = total
+            lines, slots, scenarios = [], [], []
+
+    if lines:
+        yield await _flush(codes, lines, slots, start, route, scenarios)
+
+    logger.info("Predict Match batch called with %d scenarios", total)
+
+
+async def stream_text_predictions(items: AsyncIterator[Any], chunk_size: int, logger, route: str) -> AsyncIterator[bytes]:
+    """Parses free-text requests (see utils.text_parser) and predicts them block by block, in input order.
+
+    Yields:
+        bytes: NDJSON block with one {"index", "prediction", "scenario", "defaults"} or {"index", "error"} object per text.
+    """
+    codes = np.empty((chunk_size, len(MODEL_PARAMS)), dtype=np.uint8)
+    lines: list[str | None] = []
+    slots: list[int] = []
+    extras: list[str] = []
+    texts: list[dict] = []
+    start = 0
+    total = 0
+
+    async for item in items:
+        index = total
+        total += 1
+        if not isinstance(item, str) or not item.strip() or len(item) > config.TEXT_MAX_LENGTH:
+            lines.append(f'{{"index": {index}, "error": {json.dumps(f"Expected a non-empty string of at most {config.TEXT_MAX_LENGTH} characters")}}}')
+        else:
+            parsed = parse_text(item)
+            codes[len(slots)] = parsed.codes
+            slots.append(len(lines))
+            extras.append(parsed.json)
+            texts.append({"text": item})
+            lines.append(None)
+
+        if len(lines) >= chunk_size:
+            yield await _flush(codes, lines, slots, start, route, texts, extras)
+            start = total
+            lines, slots, extras, texts = [], [], [], []
+
+    if lines:
+        yield await _flush(codes, lines, slots, start, route, texts, extras)
+
+    logger.info("Predict Match text batch called with %d texts", total)
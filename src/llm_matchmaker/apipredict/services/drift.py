@@ -0,0 +1,37 @@
+import asyncio
+
+from utils import drift
+import utils.models_loader as models
+
+
+async def refresh_drift() -> dict:
+    """Folds the pending samples into the monitor's counters and recomputes the divergence.
+
+    The buffer is drained on the event loop, where the request path writes to it; the
+    aggregation (and, outside table mode, the prediction of the sampled scenarios) runs
+    in a worker thread.
+    """
+    bundle = models.bundle
+    indices = drift.monitor.take()
+    return await asyncio.to_thread(_aggregate, indices, bundle)
+
+
+def _aggregate(indices, bundle) -> dict:
+    drift.monitor.add(indices, bundle)
+    return drift.monitor.report(bundle)
+
+
+async def watch_drift(interval: float, logger):
+    """Refreshes the drift snapshot every interval seconds, logging when the status changes."""
+    status = None
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            snapshot = await refresh_drift()
+        except Exception as e:
+            logger.error("Drift monitor refresh failed: %s", str(e))
+            continue
+        if snapshot["status"] != status:
+            status = snapshot["status"]
+            log = logger.warning if status == drift.STATUS_DRIFT else logger.info
+            log("Traffic drift status changed", extra={"status": status, "drifted": snapshot.get("drifted", []), "samples": snapshot["samples"], "model_version": snapshot["model_version"]})
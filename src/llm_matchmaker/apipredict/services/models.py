@@ -0,0 +1,89 @@
+import asyncio
+import functools
+
+from fastapi import HTTPException
+
+from enums.params import TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, DeterminismNeeded, TemperaturePreference, OutputStyle
+from results.match_result import LLMs
+from services.predicts import predict_match, predict_ranking
+from utils import drift, execution, registry
+import utils.models_loader as models
+
+# Cenário usado no aquecimento: o primeiro valor de cada enum
+_WARMUP_SCENARIO = tuple(next(iter(enum)) for enum in (TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, DeterminismNeeded, TemperaturePreference, OutputStyle))
+
+
+async def reload_model(version: str | None, logger) -> models.ModelBundle:
+    """Loads and warms a model version off the event loop, then swaps it in.
+
+    Args:
+        version (str | None): Registry version to activate; None reloads the active one.
+        logger: Request logger.
+
+    Raises:
+        HTTPException: 404 when the version does not exist, 409 when it cannot be served.
+    """
+    previous_sha256 = models.bundle.model_sha256 if models.bundle is not None else None
+    try:
+        bundle = await asyncio.to_thread(models.reload_models, version)
+    except ValueError as e:
+        logger.warning("Model reload rejected: %s", str(e))
+        raise HTTPException(status_code=404 if isinstance(e, registry.ModelVersionNotFound) else 409, detail=str(e))
+    except Exception as e:
+        logger.error("Model reload failed: %s", str(e))
+        raise HTTPException(status_code=500, detail="Model reload failed")
+
+    if bundle.model_sha256 == previous_sha256:
+        return bundle
+    # O drift passa a comparar só o tráfego servido pelo novo modelo com o perfil de treino dele
+    drift.monitor.reset()
+    # Só troca (e aquece) o pool de processos quando o artefato servido mudou de fato
+    if execution.predict_executor is not None:
+        try:
+            await execution.predict_executor.refresh(lambda run: warm_executor(logger, run))
+        except Exception as e:
+            logger.error("Prediction pool refresh failed, still serving from the previous pool: %s", str(e))
+    return bundle
+
+
+async def watch_registry(interval: float, logger):
+    """Polls the registry's CURRENT file and swaps in the new version when it changes.
+
+    Every worker runs its own watcher, so activating a version on one worker (or by
+    the training script) reaches all of them within one interval.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        version = registry.current_version()
+        if version is None or version == models.bundle.version:
+            continue
+        try:
+            await reload_model(None, logger)
+        except HTTPException:
+            # Falha já registrada; segue servindo a versão anterior e tenta de novo no próximo ciclo
+            pass
+
+
+async def warm_executor(logger, run=None):
+    """Sends predictions through the executor before the worker reports ready.
+
+    In process mode one call per pool worker goes out at once, so every process is spawned
+    and loads its model now instead of on its first request. The results are serialized
+    too, so the response path is initialized as well.
+
+    Args:
+        logger: Request logger.
+        run: Coroutine function run(func, *args) to send the calls through; defaults to the
+            executor itself, PredictExecutor.refresh passes one bound to the replacement pool.
+    """
+    executor = execution.predict_executor
+    calls = executor.workers if executor.mode == "process" else 1
+    if run is None:
+        run = functools.partial(executor.run, reject_when_full=False)
+    results = await asyncio.gather(*(
+        run(func, *_WARMUP_SCENARIO, *extra, logger)
+        for _ in range(calls)
+        for func, extra in ((predict_match, ()), (predict_ranking, (len(LLMs), [])))
+    ))
+    for result in results:
+        result.model_dump_json(exclude_none=True)
@@ -1,42 +1,209 @@
+import logging
+import time
+
 from fastapi import HTTPException
-import pandas as pd
+import numpy as np
 
 from enums.params import TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, DeterminismNeeded, TemperaturePreference, OutputStyle
-from results.match_result import ModelResult, LLMs
+from results.match_result import LLMs, LLMScore, ModelResult, ScenarioResult, ScenariosResult
+from schemas.batch import RankedScenario
+from utils.constraints import COST_PER_1K, LATENCY_MS
+from utils.features import feature_codes, grid_index, grid_indices
+from utils.predictors import LLM_CLASSES, LLM_CODES, rank_codes
+from utils import metrics
+from utils.logs import sample_success
 import utils.models_loader as models
 
 def predict_match(task_type: TaskType, domain: Domain, input_language: InputLanguage, privacy_requirement: PrivacyRequirement, hardware_available: HardwareAvailable, hallucination_tolerance: HallucinationTolerance, determinism_needed: DeterminismNeeded, temperature_preference: TemperaturePreference, output_style: OutputStyle, logger):
     try:
-        MODEL_PARAMS = ['task_type',
-                        'domain',
-                        'input_language',
-                        'privacy_requirement',
-                        'hardware_available',
-                        'hallucination_tolerance',
-                        'temperature_pref',
-                        'output_style'
-                        ]
-        pred_matrix = pd.DataFrame([{
-            'task_type': task_type.value,
-            'domain': domain.value,
-            'input_language': input_language.value,
-            'privacy_requirement': privacy_requirement.value,
-            'hardware_available': hardware_available.value,
-            'hallucination_tolerance': hallucination_tolerance.value,
-            'temperature_pref': temperature_preference.value,
-            'output_style': output_style.value
-        }], columns=MODEL_PARAMS)
-        
-        logger.debug(f"Prediction Matrix: {pred_matrix}")
-        
-        prediction = models.model_matcher.predict(pred_matrix)
+        start = time.perf_counter()
+        # Uma única leitura do bundle: a requisição inteira usa a mesma versão mesmo durante um reload
+        bundle = models.bundle
+        if bundle.answer_table is not None:
+            index = grid_index(task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, temperature_preference, output_style)
+            encoded = time.perf_counter()
+            prediction = bundle.answer_table[index]
+        else:
+            pred_matrix = np.array([feature_codes(task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, temperature_preference, output_style)], dtype=np.uint8)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Prediction Matrix: %s", pred_matrix.tolist())
+            encoded = time.perf_counter()
+            prediction = bundle.predictor.predict_codes(pred_matrix)[0]
+        predicted = time.perf_counter()
         
-        logger.info("Predict Match called")
+        if sample_success():
+            logger.info("Predict Match called", extra={"prediction": LLM_CLASSES[prediction].value})
         
         best_llm = ModelResult(
-            prediction=LLMs(prediction[0])
+            prediction=LLM_CLASSES[prediction],
+            model_version=bundle.version
         )
+        end = time.perf_counter()
+
+        metrics.PREDICT_STAGE_DURATION.observe(encoded - start, metrics.STAGE_ENCODE)
+        metrics.PREDICT_STAGE_DURATION.observe(predicted - encoded, metrics.STAGE_PREDICT)
+        metrics.PREDICT_STAGE_DURATION.observe(end - predicted, metrics.STAGE_RESULT)
+        metrics.PREDICTIONS_TOTAL.inc(int(prediction))
         return best_llm
     except Exception as e:
-        logger.error(f"Error in Predict Match: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal Server Error")
\ No newline at end of file
+        logger.error("Error in Predict Match: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+def predict_ranking(task_type: TaskType, domain: Domain, input_language: InputLanguage, privacy_requirement: PrivacyRequirement, hardware_available: HardwareAvailable, hallucination_tolerance: HallucinationTolerance, determinism_needed: DeterminismNeeded, temperature_preference: TemperaturePreference, output_style: OutputStyle, top_k: int, exclude: list[LLMs], logger):
+    """Ranks every LLM by the model's predict_proba for one scenario.
+
+    The probabilities come from the precomputed probability table (table mode) or from a
+    single predict_proba call, so the full ranking costs one prediction. Excluded LLMs are
+    removed before the top_k cut and the best remaining one becomes the prediction.
+
+    Args:
+        top_k (int): Number of ranked LLMs to return.
+        exclude (list[LLMs]): LLMs that must not be recommended; must leave at least one.
+        logger: Request logger.
+
+    Returns:
+        ModelResult: prediction, model_version and ranking (list of {"llm", "score"}).
+    """
+    try:
+        bundle = models.bundle
+        codes = np.array([feature_codes(task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, temperature_preference, output_style)], dtype=np.uint8)
+        proba, predicted = _scenario_proba(bundle, codes)
+
+        excluded = {LLM_CODES[llm.value] for llm in exclude}
+        ranked = [int(code) for code in rank_codes(proba, predicted) if int(code) not in excluded][:top_k]
+
+        if sample_success():
+            logger.info("Predict Match ranking called", extra={"prediction": LLM_CLASSES[ranked[0]].value, "excluded": len(excluded)})
+
+        metrics.PREDICTIONS_TOTAL.inc(ranked[0])
+        return ModelResult(
+            prediction=LLM_CLASSES[ranked[0]],
+            model_version=bundle.version,
+            ranking=[LLMScore(llm=LLM_CLASSES[code], score=float(proba[code])) for code in ranked]
+        )
+    except Exception as e:
+        logger.error("Error in Predict Match ranking: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+def _scenario_proba(bundle, codes: np.ndarray) -> tuple[np.ndarray, int]:
+    """Probabilities (LLM_CLASSES order) and predicted LLM code of one scenario, from the table or the predictor."""
+    if bundle.proba_table is not None:
+        index = grid_indices(codes)[0]
+        return bundle.proba_table[index], bundle.answer_table[index]
+    proba = bundle.predictor.predict_proba_codes(codes)[0]
+    # Mesmo critério do predict do sklearn: primeiro máximo na ordem de classes_
+    return proba, bundle.predictor.class_codes[proba[bundle.predictor.class_codes].argmax()]
+
+
+def predict_within_budget(task_type: TaskType, domain: Domain, input_language: InputLanguage, privacy_requirement: PrivacyRequirement, hardware_available: HardwareAvailable, hallucination_tolerance: HallucinationTolerance, determinism_needed: DeterminismNeeded, temperature_preference: TemperaturePreference, output_style: OutputStyle, feasible: list[int], top_k: int | None, logger):
+    """Recommends among the LLMs that passed the budget filters (see utils.constraints).
+
+    The hard filters already ran, so only feasible LLMs are ranked. When a single LLM fits
+    and no ranking was asked for, it is returned without running the model at all.
+
+    Args:
+        feasible (list[int]): Codes of the LLMs allowed by the budgets; must not be empty.
+        top_k (int | None): Number of ranked LLMs to return; None returns only the prediction.
+        logger: Request logger.
+
+    Returns:
+        ModelResult: prediction, model_version and, with top_k, the ranking with each LLM's latency and cost.
+    """
+    try:
+        bundle = models.bundle
+        if len(feasible) == 1 and top_k is None:
+            ranked, proba = feasible, None
+        else:
+            codes = np.array([feature_codes(task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, temperature_preference, output_style)], dtype=np.uint8)
+            proba, predicted = _scenario_proba(bundle, codes)
+            allowed = set(feasible)
+            ranked = [int(code) for code in rank_codes(proba, predicted) if int(code) in allowed][:top_k or 1]
+
+        if sample_success():
+            logger.info("Predict Match budget called", extra={"prediction": LLM_CLASSES[ranked[0]].value, "feasible": len(feasible), "inference": proba is not None})
+
+        metrics.PREDICTIONS_TOTAL.inc(ranked[0])
+        return ModelResult(
+            prediction=LLM_CLASSES[ranked[0]],
+            model_version=bundle.version,
+            ranking=None if top_k is None else [
+                LLMScore(llm=LLM_CLASSES[code], score=float(proba[code]), latency_ms=float(LATENCY_MS[code]), cost_per_1k=float(COST_PER_1K[code]))
+                for code in ranked
+            ]
+        )
+    except Exception as e:
+        logger.error("Error in Predict Match budget: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+def predict_scenarios(scenarios: list[tuple[int, RankedScenario]], logger) -> ScenariosResult:
+    """Recommends a short list of scenarios, each with its own top_k and exclude.
+
+    Repeated scenarios (same model features) are evaluated once, and all distinct ones go
+    through a single vectorized call: the probability tables (table mode) or one
+    predict_proba over the block. Excluded LLMs are removed before the top_k cut, as in
+    predict_ranking.
+
+    Args:
+        scenarios (list[tuple[int, RankedScenario]]): Valid scenarios with their position in the request; must not be empty.
+        logger: Request logger.
+
+    Returns:
+        ScenariosResult: model_version, number of distinct scenarios and one result per scenario, in the given order.
+    """
+    try:
+        bundle = models.bundle
+        codes = np.array([feature_codes(s.task_type, s.domain, s.input_language, s.privacy_requirement, s.hardware_available, s.hallucination_tolerance, s.temperature_preference, s.output_style) for _, s in scenarios], dtype=np.uint8)
+        indices, unique_of = np.unique(grid_indices(codes), return_inverse=True)
+        if bundle.proba_table is not None:
+            proba = np.asarray(bundle.proba_table)[indices]
+            predicted = np.asarray(bundle.answer_table)[indices]
+        else:
+            first = np.unique(unique_of, return_index=True)[1]
+            proba = bundle.predictor.predict_proba_codes(codes[first])
+            # Mesmo critério do predict do sklearn: primeiro máximo na ordem de classes_
+            class_codes = bundle.predictor.class_codes
+            predicted = class_codes[proba[:, class_codes].argmax(axis=1)]
+        # Ordem dos LLMs de cada cenário distinto, calculada uma vez
+        orders = [rank_codes(row, int(code)) for row, code in zip(proba, predicted)]
+
+        results = []
+        for (index, scenario), unique in zip(scenarios, unique_of):
+            excluded = {LLM_CODES[llm.value] for llm in scenario.exclude}
+            ranked = [int(code) for code in orders[unique] if int(code) not in excluded][:scenario.top_k or 1]
+            metrics.PREDICTIONS_TOTAL.inc(ranked[0])
+            results.append(ScenarioResult(
+                index=index,
+                prediction=LLM_CLASSES[ranked[0]],
+                ranking=None if scenario.top_k is None else [LLMScore(llm=LLM_CLASSES[code], score=float(proba[unique][code])) for code in ranked],
+            ))
+
+        if sample_success():
+            logger.info("Predict Match scenarios called", extra={"scenarios": len(scenarios), "unique_scenarios": len(indices)})
+        return ScenariosResult(model_version=bundle.version, unique_scenarios=len(indices), results=results)
+    except Exception as e:
+        logger.error("Error in Predict Match scenarios: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+def predict_match_codes(codes: np.ndarray) -> np.ndarray:
+    """Predicts a whole block of scenarios in a single vectorized call.
+
+    Args:
+        codes (np.ndarray): (n, n_features) matrix of enum ordinals, as built by utils.features.feature_codes.
+
+    Returns:
+        np.ndarray: uint8 array with the predicted LLM code (index in LLM_CLASSES) of each row.
+    """
+    bundle = models.bundle
+    if bundle.answer_table is not None:
+        predictions = np.asarray(bundle.answer_table)[grid_indices(codes)]
+    else:
+        predictions = bundle.predictor.predict_codes(codes)
+
+    for code, count in enumerate(np.bincount(predictions, minlength=len(LLM_CLASSES))):
+        if count:
+            metrics.PREDICTIONS_TOTAL.inc(code, int(count))
+    return predictions
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos da API são importados pelo nome, como em `uvicorn main:app` a partir deste diretório
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
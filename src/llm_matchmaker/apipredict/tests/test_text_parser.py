@@ -0,0 +1,44 @@
+import pytest
+
+from enums.params import TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, DeterminismNeeded, TemperaturePreference, OutputStyle
+from utils.text_parser import parse_text
+
+CASES = [
+    ("I want to run locally on a CPU",
+     dict(task_type=TaskType.GENERATION, domain=Domain.GENERAL, input_language=InputLanguage.ENGLISH,
+          privacy_requirement=PrivacyRequirement.LOCAL, hardware_available=HardwareAvailable.CPU,
+          hallucination_tolerance=HallucinationTolerance.MEDIUM, determinism_needed=DeterminismNeeded.LOW,
+          temperature_preference=TemperaturePreference.MEDIUM, output_style=OutputStyle.FORMAL)),
+    ("We need an on-prem model to summarize legal contracts in English, it must not hallucinate",
+     dict(task_type=TaskType.SUMMARIZATION, domain=Domain.LEGAL, input_language=InputLanguage.ENGLISH,
+          privacy_requirement=PrivacyRequirement.LOCAL, hardware_available=HardwareAvailable.CONSUMER_GPU,
+          hallucination_tolerance=HallucinationTolerance.LOW, determinism_needed=DeterminismNeeded.LOW,
+          temperature_preference=TemperaturePreference.MEDIUM, output_style=OutputStyle.FORMAL)),
+    ("On-device entity extraction on a smartphone, deterministic output",
+     dict(task_type=TaskType.EXTRACTION, domain=Domain.GENERAL, input_language=InputLanguage.ENGLISH,
+          privacy_requirement=PrivacyRequirement.LOCAL, hardware_available=HardwareAvailable.EDGE,
+          hallucination_tolerance=HallucinationTolerance.MEDIUM, determinism_needed=DeterminismNeeded.HIGH,
+          temperature_preference=TemperaturePreference.MEDIUM, output_style=OutputStyle.FORMAL)),
+    ("Preciso classificar prontuários de pacientes localmente, sem GPU, com baixa alucinação",
+     dict(task_type=TaskType.CLASSIFICATION, domain=Domain.MEDICAL, input_language=InputLanguage.PORTUGUESE,
+          privacy_requirement=PrivacyRequirement.LOCAL, hardware_available=HardwareAvailable.CPU,
+          hallucination_tolerance=HallucinationTolerance.LOW, determinism_needed=DeterminismNeeded.LOW,
+          temperature_preference=TemperaturePreference.MEDIUM, output_style=OutputStyle.FORMAL)),
+    ("Quero gerar histórias criativas para uma loja virtual, na nuvem, com uma RTX",
+     dict(task_type=TaskType.GENERATION, domain=Domain.ECOMMERCE, input_language=InputLanguage.PORTUGUESE,
+          privacy_requirement=PrivacyRequirement.CLOUD, hardware_available=HardwareAvailable.CONSUMER_GPU,
+          hallucination_tolerance=HallucinationTolerance.MEDIUM, determinism_needed=DeterminismNeeded.LOW,
+          temperature_preference=TemperaturePreference.HIGH, output_style=OutputStyle.CREATIVE)),
+]
+
+
+@pytest.mark.parametrize("text, expected", CASES)
+def test_parse_text_resolves_every_field(text, expected):
+    assert parse_text(text).scenario.model_dump() == expected
+
+
+def test_defaults_list_only_unmentioned_fields():
+    parsed = parse_text("I want to run locally on a CPU")
+    assert "privacy_requirement" not in parsed.defaults
+    assert "hardware_available" not in parsed.defaults
+    assert "task_type" in parsed.defaults
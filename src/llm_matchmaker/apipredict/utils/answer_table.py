@@ -0,0 +1,149 @@
+import json
+import os
+
+import numpy as np
+
+from utils.artifacts import file_sha256
+from utils.features import GRID_SIZE, feature_schema, grid_codes
+from utils.predictors import LLM_CLASSES
+
+
+def table_paths(model_path: str) -> tuple[str, str]:
+    """Returns the paths of the answer table and its metadata, stored alongside the model file.
+
+    Args:
+        model_path (str): Path of the joblib model artifact.
+
+    Returns:
+        tuple[str, str]: (.table.npy path, .table.json path)
+    """
+    base, _ = os.path.splitext(model_path)
+    return f"{base}.table.npy", f"{base}.table.json"
+
+
+def proba_table_path(model_path: str) -> str:
+    """Returns the path of the probability table (float32, GRID_SIZE x len(LLM_CLASSES)) stored next to the answer table."""
+    base, _ = os.path.splitext(model_path)
+    return f"{base}.proba.npy"
+
+
+def build_answer_table(predictor) -> np.ndarray:
+    """Evaluates the predictor once over the full feature grid.
+
+    Args:
+        predictor: PipelinePredictor or NativePredictor.
+
+    Returns:
+        np.ndarray: uint8 array of length GRID_SIZE indexed by utils.features.grid_index.
+    """
+    return predictor.predict_codes(grid_codes())
+
+
+def build_proba_table(predictor) -> np.ndarray:
+    """Evaluates the predictor's class probabilities once over the full feature grid.
+
+    Returns:
+        np.ndarray: float32 (GRID_SIZE, len(LLM_CLASSES)) array, columns in LLM_CLASSES order.
+    """
+    return predictor.predict_proba_codes(grid_codes()).astype(np.float32)
+
+
+def save_answer_table(table: np.ndarray, model_path: str, proba: np.ndarray | None = None):
+    """Writes the answer table (and optionally the probability table) next to the model,
+    tagged with the model hash and feature schema."""
+    table_path, meta_path = table_paths(model_path)
+    np.save(table_path, table)
+    if proba is not None:
+        np.save(proba_table_path(model_path), proba)
+    meta = {
+        "model_sha256": file_sha256(model_path),
+        "size": int(table.shape[0]),
+        "features": feature_schema(),
+        "classes": [llm.value for llm in LLM_CLASSES],
+        "proba": proba is not None,
+    }
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def _table_meta(model_path: str) -> dict | None:
+    table_path, meta_path = table_paths(model_path)
+    if not (os.path.exists(table_path) and os.path.exists(meta_path)):
+        return None
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+
+    if (meta.get("model_sha256") != file_sha256(model_path)
+            or meta.get("features") != feature_schema()
+            or meta.get("classes") != [llm.value for llm in LLM_CLASSES]):
+        return None
+    return meta
+
+
+def load_answer_table(model_path: str) -> np.ndarray | None:
+    """Memory-maps the answer table if it exists and was built for this model and schema.
+
+    Returns:
+        np.ndarray | None: The read-only table, or None when it is missing or stale.
+    """
+    if _table_meta(model_path) is None:
+        return None
+
+    table = np.load(table_paths(model_path)[0], mmap_mode="r")
+    if table.shape != (GRID_SIZE,) or table.dtype != np.uint8:
+        return None
+    return table
+
+
+def load_proba_table(model_path: str) -> np.ndarray | None:
+    """Memory-maps the probability table if it was saved together with an up-to-date answer table.
+
+    Returns:
+        np.ndarray | None: The read-only table, or None when it is missing or stale.
+    """
+    meta = _table_meta(model_path)
+    if meta is None or not meta.get("proba") or not os.path.exists(proba_table_path(model_path)):
+        return None
+
+    proba = np.load(proba_table_path(model_path), mmap_mode="r")
+    if proba.shape != (GRID_SIZE, len(LLM_CLASSES)) or proba.dtype != np.float32:
+        return None
+    return proba
+
+
+def verify_answer_table(table: np.ndarray, predictor, samples: int = 0, seed: int = 42) -> bool:
+    """Checks that the table agrees with the live predictor.
+
+    Args:
+        table (np.ndarray): Answer table to check.
+        predictor: PipelinePredictor or NativePredictor.
+        samples (int): Number of random grid rows to compare; 0 compares the whole grid.
+        seed (int): Seed for the sampled rows.
+
+    Returns:
+        bool: True when every compared row matches.
+    """
+    codes = grid_codes()
+    if 0 < samples < GRID_SIZE:
+        rows = np.random.default_rng(seed).choice(GRID_SIZE, size=samples, replace=False)
+    else:
+        rows = np.arange(GRID_SIZE)
+    return bool(np.array_equal(np.asarray(table)[rows], predictor.predict_codes(codes[rows])))
+
+
+def verify_proba_table(proba: np.ndarray, predictor, samples: int = 0, seed: int = 42) -> bool:
+    """Checks that the probability table agrees with the live predictor (within float32 precision).
+
+    Args:
+        proba (np.ndarray): Probability table to check.
+        predictor: PipelinePredictor or NativePredictor.
+        samples (int): Number of random grid rows to compare; 0 compares the whole grid.
+        seed (int): Seed for the sampled rows.
+    """
+    codes = grid_codes()
+    if 0 < samples < GRID_SIZE:
+        rows = np.random.default_rng(seed).choice(GRID_SIZE, size=samples, replace=False)
+    else:
+        rows = np.arange(GRID_SIZE)
+    return bool(np.allclose(np.asarray(proba)[rows], predictor.predict_proba_codes(codes[rows]), atol=1e-6))
@@ -0,0 +1,259 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+
+from pydantic import BaseModel
+
+from utils import config, metrics
+
+POLICY_DROP = "drop"
+POLICY_BLOCK = "block"
+
+COLUMNS = ("id", "created_at", "route", "params", "prediction", "model_version", "response")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    route TEXT NOT NULL,
+    params TEXT NOT NULL,
+    prediction TEXT,
+    model_version TEXT,
+    response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS predictions_created_at ON predictions (created_at);
+"""
+_INSERT = "INSERT INTO predictions (created_at, route, params, prediction, model_version, response) VALUES (?, ?, ?, ?, ?, ?)"
+
+AUDIT_RECORDS_TOTAL = metrics.register(metrics.Counter("audit_records_total", "Prediction audit records by outcome", ("result",)))
+RECORD_WRITTEN, RECORD_DROPPED, RECORD_BLOCKED, RECORD_FAILED = (AUDIT_RECORDS_TOTAL.add_labels((result,)) for result in ("written", "dropped", "blocked", "failed"))
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Opens the audit database in WAL mode, creating it if needed.
+
+    WAL lets the export endpoint read while a worker writes, and several gunicorn workers
+    share the file: each batch is one short write transaction, retried for up to
+    busy_timeout while another worker holds the lock.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Com WAL, NORMAL só perde as últimas transações em queda de energia, nunca corrompe o arquivo
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _params_text(params) -> str:
+    # Query string guardada como chegou: o parse_qs custa mais que todo o resto da gravação e só é feito na leitura
+    if isinstance(params, bytes):
+        return params.decode()
+    if isinstance(params, BaseModel):
+        return params.model_dump_json(exclude_defaults=True)
+    return json.dumps(params)
+
+
+def _response_fields(result) -> tuple[str | None, str]:
+    # (prediction, resposta serializada) a partir do corpo JSON já pronto ou do objeto de resultado
+    if isinstance(result, BaseModel):
+        return result.prediction.value, result.model_dump_json(exclude_none=True)
+    text = result.decode() if isinstance(result, bytes) else result
+    return json.loads(text).get("prediction"), text
+
+
+class AuditLog:
+    """Write-behind log of every recommendation served, stored in SQLite.
+
+    The request path only places a reference to the already computed parameters and
+    response in a preallocated ring buffer; serialization and the batched INSERT happen
+    in a worker thread, driven by a background task every flush interval (or sooner when
+    batch_size records are pending). With the buffer full, the "drop" policy discards the
+    record and counts it; "block" makes the request wait for the next flush.
+
+    record and take run on the event loop, so the buffer needs no lock.
+    """
+
+    def __init__(self, path: str, capacity: int, policy: str, batch_size: int):
+        if policy not in (POLICY_DROP, POLICY_BLOCK):
+            raise ValueError(f"Unknown AUDIT_FULL_POLICY: {policy}")
+        self.path = path
+        self.capacity = max(capacity, 1)
+        self.policy = policy
+        self.batch_size = max(batch_size, 1)
+        self._slots: list[tuple | None] = [None] * self.capacity
+        self._head = 0
+        self._pending = 0
+        self._wake = asyncio.Event()
+        self._space = asyncio.Event()
+        self._conn: sqlite3.Connection | None = None
+        # A tarefa periódica e o endpoint de consulta podem gravar ao mesmo tempo pela mesma conexão
+        self._write_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    def pending(self) -> int:
+        return self._pending
+
+    def open(self):
+        """Connects to the database; until then record is a no-op."""
+        if self._conn is None:
+            self._conn = connect(self.path)
+
+    def _offer(self, entry: tuple) -> bool:
+        if self._pending == self.capacity:
+            return False
+        self._slots[(self._head + self._pending) % self.capacity] = entry
+        self._pending += 1
+        if self._pending == self.batch_size:
+            self._wake.set()
+        return True
+
+    async def record(self, route: str, params, result, model_version: str | None):
+        """Queues one served recommendation.
+
+        Args:
+            route (str): Route that served it.
+            params: Raw query string (bytes), request model or dict with the scenario.
+            result: Serialized response body (bytes or str) or result model with a prediction.
+            model_version (str | None): Model version that produced it.
+        """
+        if self._conn is None:
+            return
+        entry = (time.time(), route, params, result, model_version)
+        if self._offer(entry):
+            return
+        if self.policy == POLICY_DROP:
+            AUDIT_RECORDS_TOTAL.inc(RECORD_DROPPED)
+            return
+        AUDIT_RECORDS_TOTAL.inc(RECORD_BLOCKED)
+        while not self._offer(entry):
+            self._space.clear()
+            self._wake.set()
+            await self._space.wait()
+
+    def take(self) -> list[tuple]:
+        """Removes and returns the pending records, oldest first."""
+        entries = []
+        for i in range(self._pending):
+            slot = (self._head + i) % self.capacity
+            entries.append(self._slots[slot])
+            self._slots[slot] = None
+        self._head = (self._head + self._pending) % self.capacity
+        self._pending = 0
+        self._space.set()
+        return entries
+
+    def write(self, entries: list[tuple]):
+        """Serializes a block of records and inserts it in a single transaction (blocking)."""
+        rows = []
+        for created, route, params, result, model_version in entries:
+            prediction, response = _response_fields(result)
+            rows.append((created, route, _params_text(params), prediction, model_version, response))
+        with self._write_lock, self._conn:
+            self._conn.executemany(_INSERT, rows)
+        AUDIT_RECORDS_TOTAL.inc(RECORD_WRITTEN, len(rows))
+
+    async def flush(self):
+        """Writes every pending record now, off the event loop."""
+        entries = self.take()
+        if not entries:
+            return
+        try:
+            await asyncio.to_thread(self.write, entries)
+        except Exception as e:
+            AUDIT_RECORDS_TOTAL.inc(RECORD_FAILED, len(entries))
+            logging.getLogger(__name__).error("Could not write %d audit records: %s", len(entries), str(e))
+
+    async def run(self, interval: float):
+        """Background task: flushes every interval seconds, or as soon as batch_size records are pending."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def close(self):
+        """Flushes the remaining records and closes the database."""
+        if self._conn is None:
+            return
+        await self.flush()
+        with self._write_lock:
+            self._conn.close()
+        self._conn = None
+
+
+def _where(since: datetime | None, until: datetime | None, route: str | None, prediction: str | None, model_version: str | None) -> tuple[str, list]:
+    clauses, args = [], []
+    for column, op, value in (("created_at", ">=", _timestamp(since)), ("created_at", "<", _timestamp(until)), ("route", "=", route), ("prediction", "=", prediction), ("model_version", "=", model_version)):
+        if value is not None:
+            clauses.append(f"{column} {op} ?")
+            args.append(value)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+
+def _timestamp(value: datetime | None) -> float | None:
+    # created_at é gravado em segundos Unix; datas sem fuso são tratadas como UTC
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def query(path: str, since=None, until=None, route=None, prediction=None, model_version=None, limit: int = 100, offset: int = 0) -> list[dict]:
+    """Reads audit records, newest first (blocking).
+
+    Returns:
+        list[dict]: One dict per record (see decode_row).
+    """
+    where, args = _where(since, until, route, prediction, model_version)
+    conn = connect(path)
+    try:
+        rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM predictions{where} ORDER BY id DESC LIMIT ? OFFSET ?", args + [limit, offset]).fetchall()
+    finally:
+        conn.close()
+    return [decode_row(row) for row in rows]
+
+
+def decode_row(row: tuple) -> dict:
+    """Converts a row selected with COLUMNS into a dict: created_at in ISO 8601 (UTC), params and response decoded."""
+    record = dict(zip(COLUMNS, row))
+    record["created_at"] = iso_timestamp(record["created_at"])
+    record["params"] = decode_params(record["params"])
+    record["response"] = json.loads(record["response"])
+    return record
+
+
+def decode_params(text: str) -> dict:
+    """Parameters of a record: the JSON item of POST routes or the query string of GET routes."""
+    if text.startswith("{"):
+        return json.loads(text)
+    # Parâmetros repetidos (ex.: exclude) viram lista
+    return {name: values if len(values) > 1 or name == "exclude" else values[0] for name, values in parse_qs(text).items()}
+
+
+def iso_timestamp(created_at: float) -> str:
+    return datetime.fromtimestamp(created_at, timezone.utc).isoformat(timespec="milliseconds")
+
+
+def export_cursor(path: str, since=None, until=None, route=None, prediction=None, model_version=None) -> tuple[sqlite3.Connection, sqlite3.Cursor]:
+    """Opens a cursor over every matching record, oldest first; the caller closes the connection."""
+    where, args = _where(since, until, route, prediction, model_version)
+    conn = connect(path)
+    return conn, conn.execute(f"SELECT {', '.join(COLUMNS)} FROM predictions{where} ORDER BY id", args)
+
+
+log = AuditLog(config.AUDIT_DB_PATH, config.AUDIT_BUFFER_SIZE, config.AUDIT_FULL_POLICY, config.AUDIT_BATCH_SIZE)
+
+metrics.register(metrics.Gauge("audit_records_pending", "Audit records waiting in the buffer for the next flush", fn=log.pending))
@@ -0,0 +1,72 @@
+import os
+
+# Modo de inferência do /predict-match:
+#   "table"    -> consulta O(1) na tabela pré-computada com todas as combinações
+#   "native"   -> executa a cada requisição o preditor NumPy compilado do pipeline
+#   "pipeline" -> executa o pipeline sklearn a cada requisição (requer requirements-pipeline.txt)
+PREDICT_MODE = os.getenv("PREDICT_MODE", "table")
+
+# Quantidade de combinações sorteadas para conferir a tabela contra o pipeline no startup (0 = todas)
+ANSWER_TABLE_CHECK_SAMPLES = int(os.getenv("ANSWER_TABLE_CHECK_SAMPLES", "1024"))
+
+# Tamanho máximo de cada bloco de cenários enviado ao modelo no /predict-match/batch
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "2048"))
+
+# Onde rodam as predições: "inline" (no event loop), "thread" (pool de threads) ou "process" (pool de processos com o modelo pré-carregado)
+PREDICT_EXECUTOR = os.getenv("PREDICT_EXECUTOR", "thread")
+# Tamanho do pool (0 = número de CPUs)
+PREDICT_WORKERS = int(os.getenv("PREDICT_WORKERS", "0"))
+# Predições executando ao mesmo tempo (0 = PREDICT_WORKERS)
+PREDICT_MAX_CONCURRENCY = int(os.getenv("PREDICT_MAX_CONCURRENCY", "0"))
+# Requisições aguardando vaga antes de responder 503 com Retry-After
+PREDICT_MAX_QUEUE = int(os.getenv("PREDICT_MAX_QUEUE", "64"))
+PREDICT_RETRY_AFTER = int(os.getenv("PREDICT_RETRY_AFTER", "1"))
+
+# Nível mínimo dos logs da aplicação
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Formato dos registros: "json" (um objeto por linha) ou "text"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+# Fração das requisições bem-sucedidas que geram log (erros são sempre registrados)
+LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", "0.01"))
+# Registros aguardando escrita pela thread de log; acima disso novos registros são descartados
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Diretório do registro de modelos versionados (uma subpasta por versão + arquivo CURRENT com a versão ativa).
+# Sem versão ativa, a API serve models/best_llm_matchmaker_model.joblib
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", os.path.join(os.path.dirname(__file__), "..", "models", "registry"))
+# Linhas da grade executadas pelo preditor ao carregar um modelo, antes de ele receber tráfego (0 = sem aquecimento)
+WARMUP_ROWS = int(os.getenv("WARMUP_ROWS", "1024"))
+# Intervalo, em segundos, da verificação do CURRENT para trocar o modelo sem reiniciar (0 = desligado)
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "10"))
+# Textos normalizados guardados no cache LRU do parser de texto livre do /predict-match/text
+TEXT_PARSER_CACHE_SIZE = int(os.getenv("TEXT_PARSER_CACHE_SIZE", "4096"))
+# Tamanho máximo, em caracteres, de cada texto aceito pelo /predict-match/text
+TEXT_MAX_LENGTH = int(os.getenv("TEXT_MAX_LENGTH", "2000"))
+# max-age, em segundos, do Cache-Control das respostas GET de predição (revalidadas pelo ETag, que muda com o modelo)
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "300"))
+# Respostas serializadas guardadas por ETag no cache LRU em memória de cada worker (0 = desligado)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+# Fração dos cenários recebidos pelas rotas de predição amostrados pelo monitor de drift do tráfego (0 = desligado)
+DRIFT_SAMPLE_RATE = float(os.getenv("DRIFT_SAMPLE_RATE", "0.1"))
+# Amostras guardadas entre duas agregações; com o buffer cheio, novas amostras são descartadas até a próxima
+DRIFT_BUFFER_SIZE = int(os.getenv("DRIFT_BUFFER_SIZE", "65536"))
+# Intervalo, em segundos, entre as agregações das amostras e o cálculo da divergência contra o treino
+DRIFT_INTERVAL = float(os.getenv("DRIFT_INTERVAL", "30"))
+# Janela, em segundos, das amostras comparadas com o treino; contagens mais antigas saem a cada DRIFT_INTERVAL
+DRIFT_WINDOW = float(os.getenv("DRIFT_WINDOW", "3600"))
+# Divergência de Jensen-Shannon (0 a 1) acima da qual uma feature, par de features ou a predição é reportada como drift
+DRIFT_THRESHOLD = float(os.getenv("DRIFT_THRESHOLD", "0.1"))
+# Amostras necessárias antes de calcular a divergência
+DRIFT_MIN_SAMPLES = int(os.getenv("DRIFT_MIN_SAMPLES", "500"))
+# Banco SQLite (modo WAL) com o registro de auditoria de cada recomendação servida (vazio = desligado)
+AUDIT_DB_PATH = os.getenv("AUDIT_DB_PATH", os.path.join(os.path.dirname(__file__), "..", "audit", "predictions.db"))
+# Registros aguardando gravação em memória; acima disso vale a AUDIT_FULL_POLICY
+AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "100000"))
+# Com o buffer cheio: "drop" descarta o registro (contado em audit_records_total) e "block" faz a requisição esperar a próxima gravação
+AUDIT_FULL_POLICY = os.getenv("AUDIT_FULL_POLICY", "drop")
+# Registros pendentes que antecipam a gravação, antes do fim do intervalo
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "2000"))
+# Intervalo máximo, em segundos, entre duas gravações do buffer no banco
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1"))
+# Token exigido no header X-Admin-Token pelos endpoints /admin (vazio = endpoints desligados)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
@@ -0,0 +1,65 @@
+import numpy as np
+
+from results.match_result import LLMs
+from utils.predictors import LLM_CLASSES
+
+# Custo de serviço de cada LLM: mesmos valores do model_meta de src/data_gen/synthetic_data_gen.py
+LLM_META = {
+    LLMs.GPT_4O: {"latency_base_ms": 200, "cost_per_1k": 6.0, "offline": False},
+    LLMs.GEMINI: {"latency_base_ms": 240, "cost_per_1k": 15.0, "offline": False},
+    LLMs.CLAUDE_2: {"latency_base_ms": 220, "cost_per_1k": 8.0, "offline": False},
+    LLMs.LLAMA_3_70B: {"latency_base_ms": 180, "cost_per_1k": 0.5, "offline": True},
+    LLMs.DEEPSEEK: {"latency_base_ms": 90, "cost_per_1k": 0.2, "offline": True},
+}
+
+# Valores por código de LLM (posição em LLM_CLASSES)
+LATENCY_MS = np.array([LLM_META[llm]["latency_base_ms"] for llm in LLM_CLASSES], dtype=np.float64)
+COST_PER_1K = np.array([LLM_META[llm]["cost_per_1k"] for llm in LLM_CLASSES], dtype=np.float64)
+
+ALL_LLMS = (1 << len(LLM_CLASSES)) - 1
+
+
+class _ThresholdIndex:
+    """Answers "which LLMs have value <= limit" with one binary search.
+
+    Values are sorted once; prefix_masks[k] is the bitmask (bit i = LLM code i) of the k LLMs
+    with the smallest values, so any limit maps to a precomputed mask.
+    """
+
+    def __init__(self, values: np.ndarray):
+        order = np.argsort(values, kind="stable")
+        self.sorted_values = values[order]
+        self.prefix_masks = [0]
+        for code in order:
+            self.prefix_masks.append(self.prefix_masks[-1] | (1 << int(code)))
+
+    def within(self, limit: float | None) -> int:
+        if limit is None:
+            return ALL_LLMS
+        return self.prefix_masks[int(np.searchsorted(self.sorted_values, limit, side="right"))]
+
+
+_LATENCY_INDEX = _ThresholdIndex(LATENCY_MS)
+_COST_INDEX = _ThresholdIndex(COST_PER_1K)
+
+
+def feasible_mask(max_latency_ms: float | None = None, max_cost_per_1k: float | None = None, exclude: list[LLMs] = ()) -> int:
+    """Bitmask of the LLMs allowed by the budgets (bit i = LLM code i), before any inference.
+
+    Args:
+        max_latency_ms (float | None): Latency budget; None means unbounded.
+        max_cost_per_1k (float | None): Cost budget per 1k tokens; None means unbounded.
+        exclude (list[LLMs]): LLMs removed regardless of the budgets.
+
+    Returns:
+        int: Bitmask of the feasible LLM codes; 0 when no LLM fits.
+    """
+    mask = _LATENCY_INDEX.within(max_latency_ms) & _COST_INDEX.within(max_cost_per_1k)
+    for llm in exclude:
+        mask &= ~(1 << LLM_CLASSES.index(llm))
+    return mask
+
+
+def mask_codes(mask: int) -> list[int]:
+    """LLM codes set in a feasibility bitmask, in LLM_CLASSES order."""
+    return [code for code in range(len(LLM_CLASSES)) if mask >> code & 1]
@@ -1,13 +1,10 @@
 import logging
 
 def get_logger() -> logging.Logger:
-    """Initializes and returns a logger.
-    This function sets up a logger with the INFO logging level.
+    """Returns the request logger.
+    Handlers, level and format are set once at startup by utils.logs.configure_logging.
 
     Returns:
-        logging.Logger: A logger instance configured to log at the INFO level.
+        logging.Logger: The application logger.
     """
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)
-    
-    return logger
\ No newline at end of file
+    return logging.getLogger(__name__)
@@ -0,0 +1,337 @@
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from itertools import combinations
+
+import numpy as np
+
+from utils import config, metrics
+from utils.artifacts import file_sha256
+from utils.features import GRID_SHAPE, MODEL_PARAMS, FEATURE_ENUMS, feature_schema, grid_index
+from utils.predictors import LLM_CLASSES
+
+# Layout dos contadores: um array plano por tipo, com o bloco de cada feature (ou par) a partir do seu offset
+PAIRS = tuple(combinations(range(len(MODEL_PARAMS)), 2))
+FEATURE_OFFSETS = tuple(int(offset) for offset in np.cumsum((0,) + GRID_SHAPE[:-1]))
+FEATURE_SLOTS = int(sum(GRID_SHAPE))
+PAIR_OFFSETS = tuple(int(offset) for offset in np.cumsum([0] + [GRID_SHAPE[i] * GRID_SHAPE[j] for i, j in PAIRS[:-1]]))
+PAIR_SLOTS = int(sum(GRID_SHAPE[i] * GRID_SHAPE[j] for i, j in PAIRS))
+
+STATUS_NO_REFERENCE = "no_reference"
+STATUS_INSUFFICIENT_DATA = "insufficient_data"
+STATUS_OK = "ok"
+STATUS_DRIFT = "drift"
+
+DIMENSIONS = MODEL_PARAMS + ["prediction"]
+
+DRIFT_DIVERGENCE = metrics.register(metrics.Gauge("traffic_drift_divergence", "Jensen-Shannon divergence (base 2) between sampled prediction traffic and the training data", ("dimension",)))
+_DIVERGENCE_INDEX = {dimension: DRIFT_DIVERGENCE.add_labels((dimension,)) for dimension in DIMENSIONS}
+DRIFT_SAMPLES_TOTAL = metrics.register(metrics.Counter("traffic_drift_samples_total", "Requests sampled by the drift monitor, by outcome", ("result",)))
+SAMPLE_RECORDED, SAMPLE_DROPPED = (DRIFT_SAMPLES_TOTAL.add_labels((result,)) for result in ("recorded", "dropped"))
+
+
+def profile_path(model_path: str) -> str:
+    """Returns the path of the training profile (marginals of the training data) stored next to the model."""
+    base, _ = os.path.splitext(model_path)
+    return f"{base}.profile.json"
+
+
+def count_codes(codes: np.ndarray, labels: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Counts a block of scenarios into the monitor layout.
+
+    Args:
+        codes (np.ndarray): (n, n_features) matrix of enum ordinals.
+        labels (np.ndarray | None): LLM code (index in LLM_CLASSES) of each row.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: int64 feature counts (FEATURE_SLOTS), pair
+        counts (PAIR_SLOTS) and class counts (len(LLM_CLASSES)); class counts are zero without labels.
+    """
+    codes = codes.astype(np.int64)
+    features = np.bincount((codes + np.array(FEATURE_OFFSETS)).ravel(), minlength=FEATURE_SLOTS)
+    pairs = np.bincount(np.concatenate([offset + codes[:, i] * GRID_SHAPE[j] + codes[:, j] for offset, (i, j) in zip(PAIR_OFFSETS, PAIRS)]), minlength=PAIR_SLOTS)
+    classes = np.bincount(labels, minlength=len(LLM_CLASSES)) if labels is not None else np.zeros(len(LLM_CLASSES), dtype=np.int64)
+    return features, pairs, classes
+
+
+def save_profile(codes: np.ndarray, labels: np.ndarray, model_path: str, training_data: str, training_data_sha256: str):
+    """Writes the feature, feature-pair and class counts of the training data next to the model.
+
+    Args:
+        codes (np.ndarray): (n, n_features) enum ordinals of the training rows.
+        labels (np.ndarray): LLM code (index in LLM_CLASSES) of each training row's target.
+        model_path (str): Path of the joblib model artifact trained on these rows.
+        training_data (str): Name of the dataset, for reference.
+        training_data_sha256 (str): Hash of the dataset.
+    """
+    features, pairs, classes = count_codes(codes, labels)
+    profile = {
+        "model_sha256": file_sha256(model_path),
+        "training_data": training_data,
+        "training_data_sha256": training_data_sha256,
+        "rows": int(len(codes)),
+        "features": feature_schema(),
+        "classes": [llm.value for llm in LLM_CLASSES],
+        "feature_counts": {name: features[offset:offset + size].tolist() for name, offset, size in zip(MODEL_PARAMS, FEATURE_OFFSETS, GRID_SHAPE)},
+        "pair_counts": {f"{MODEL_PARAMS[i]},{MODEL_PARAMS[j]}": pairs[offset:offset + GRID_SHAPE[i] * GRID_SHAPE[j]].tolist() for offset, (i, j) in zip(PAIR_OFFSETS, PAIRS)},
+        "class_counts": classes.tolist(),
+    }
+    with open(profile_path(model_path), "w") as f:
+        json.dump(profile, f)
+
+
+class TrainingProfile:
+    """Training-data counts of one model, in the same flat layout as the monitor's counters."""
+
+    def __init__(self, rows: int, features: np.ndarray, pairs: np.ndarray, classes: np.ndarray, training_data: str | None = None):
+        self.rows = rows
+        self.features = features
+        self.pairs = pairs
+        self.classes = classes
+        self.training_data = training_data
+
+
+def load_profile(model_path: str) -> TrainingProfile | None:
+    """Reads the training profile if it exists and was written for this model and schema.
+
+    Returns:
+        TrainingProfile | None: The profile, or None when it is missing or stale.
+    """
+    try:
+        with open(profile_path(model_path)) as f:
+            profile = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    if (profile.get("model_sha256") != file_sha256(model_path)
+            or profile.get("features") != feature_schema()
+            or profile.get("classes") != [llm.value for llm in LLM_CLASSES]):
+        return None
+    return TrainingProfile(
+        profile["rows"],
+        np.concatenate([profile["feature_counts"][name] for name in MODEL_PARAMS]).astype(np.int64),
+        np.concatenate([profile["pair_counts"][f"{MODEL_PARAMS[i]},{MODEL_PARAMS[j]}"] for i, j in PAIRS]).astype(np.int64),
+        np.array(profile["class_counts"], dtype=np.int64),
+        profile.get("training_data"),
+    )
+
+
+def js_divergence(p: np.ndarray, q: np.ndarray) -> float:
+    """Jensen-Shannon divergence (base 2, between 0 and 1) of two count vectors over the same categories."""
+    p = p / p.sum()
+    q = q / q.sum()
+    m = (p + q) / 2
+    divergence = 0.0
+    for x in (p, q):
+        support = x > 0
+        divergence += float((x[support] * np.log2(x[support] / m[support])).sum()) / 2
+    return max(divergence, 0.0)
+
+
+def _shares(counts: np.ndarray, values: list[str]) -> dict[str, float]:
+    total = counts.sum()
+    return {value: round(float(count / total), 4) if total else 0.0 for value, count in zip(values, counts)}
+
+
+class TrafficMonitor:
+    """Constant-memory summary of the scenarios sent to the prediction routes.
+
+    The request path only samples and writes the scenario's grid index into a preallocated
+    ring buffer (no per-request allocation, a counter check for unsampled requests). A
+    background task periodically drains the buffer and folds it with a few vectorized
+    bincounts into fixed arrays of counts per feature value, per pair of feature values and
+    per predicted LLM; a full buffer drops new samples until the next drain.
+
+    The counts cover a sliding window: they are kept per time slot of slot_seconds in a
+    ring of window_slots slots, and a slot's counts leave the totals when it is reused.
+    reset drops everything, so after a model swap the traffic is compared with the new
+    model's training profile only.
+
+    record, record_codes, take and reset run on the event loop; add and report may run in a worker thread.
+    """
+
+    def __init__(self, buffer_size: int, sample_rate: float, window_slots: int = 1, slot_seconds: float = float("inf")):
+        self.sample_rate = sample_rate
+        # Amostragem determinística: uma a cada sample_every requisições
+        self.sample_every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+        self._tick = 0
+        self._buffer = np.empty(max(buffer_size, 1), dtype=np.int32)
+        self._pending = 0
+
+        self.window_slots = max(window_slots, 1)
+        self.slot_seconds = slot_seconds
+        self._slot_features = np.zeros((self.window_slots, FEATURE_SLOTS), dtype=np.int64)
+        self._slot_pairs = np.zeros((self.window_slots, PAIR_SLOTS), dtype=np.int64)
+        self._slot_classes = np.zeros((self.window_slots, len(LLM_CLASSES)), dtype=np.int64)
+        self._slot_samples = np.zeros(self.window_slots, dtype=np.int64)
+        self._epoch: int | None = None
+
+        # Totais da janela (soma dos slots), mantidos a cada agregação para o report não somar a janela inteira
+        self.features = np.zeros(FEATURE_SLOTS, dtype=np.int64)
+        self.pairs = np.zeros(PAIR_SLOTS, dtype=np.int64)
+        self.classes = np.zeros(len(LLM_CLASSES), dtype=np.int64)
+        self.samples = 0
+        self.dropped = 0
+        self.snapshot: dict | None = None
+        self._lock = threading.Lock()
+
+    def record(self, task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, temperature_preference, output_style):
+        """Samples one scenario of the request path."""
+        if not self.sample_every:
+            return
+        self._tick += 1
+        if self._tick < self.sample_every:
+            return
+        self._tick = 0
+        if self._pending == len(self._buffer):
+            self.dropped += 1
+            DRIFT_SAMPLES_TOTAL.inc(SAMPLE_DROPPED)
+            return
+        self._buffer[self._pending] = grid_index(task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, temperature_preference, output_style)
+        self._pending += 1
+
+    def record_codes(self, codes: np.ndarray):
+        """Samples a block of scenarios (rows of enum ordinals) with the same every-N rule as record."""
+        if not self.sample_every or not len(codes):
+            return
+        # Linha em que cai a próxima amostra, continuando a contagem das requisições anteriores
+        rows = codes[self.sample_every - self._tick - 1::self.sample_every]
+        self._tick = (self._tick + len(codes)) % self.sample_every
+        space = len(self._buffer) - self._pending
+        if len(rows) > space:
+            self.dropped += len(rows) - space
+            DRIFT_SAMPLES_TOTAL.inc(SAMPLE_DROPPED, len(rows) - space)
+            rows = rows[:space]
+        if len(rows):
+            self._buffer[self._pending:self._pending + len(rows)] = np.ravel_multi_index(rows.T.astype(np.intp), GRID_SHAPE)
+            self._pending += len(rows)
+
+    def take(self) -> np.ndarray:
+        """Removes and returns the grid indices sampled since the last call."""
+        indices = self._buffer[:self._pending].copy()
+        self._pending = 0
+        return indices
+
+    def reset(self):
+        """Drops the pending samples, the whole window and the last snapshot (e.g. after a model swap)."""
+        self._pending = 0
+        with self._lock:
+            for counts in (self._slot_features, self._slot_pairs, self._slot_classes, self._slot_samples, self.features, self.pairs, self.classes):
+                counts[...] = 0
+            self.samples = 0
+            self._epoch = None
+            self.snapshot = None
+
+    def _advance(self, now: float) -> int:
+        # Abre o slot do instante atual; os slots que saíram da janela são descontados dos totais e zerados. Chamado com o lock.
+        epoch = int(now // self.slot_seconds) if self.slot_seconds != float("inf") else 0
+        if self._epoch is None:
+            self._epoch = epoch
+        for expired in range(self._epoch + 1, min(epoch, self._epoch + self.window_slots) + 1):
+            slot = expired % self.window_slots
+            self.features -= self._slot_features[slot]
+            self.pairs -= self._slot_pairs[slot]
+            self.classes -= self._slot_classes[slot]
+            self.samples -= int(self._slot_samples[slot])
+            for counts in (self._slot_features, self._slot_pairs, self._slot_classes, self._slot_samples):
+                counts[slot] = 0
+        self._epoch = max(self._epoch, epoch)
+        return self._epoch % self.window_slots
+
+    def add(self, indices: np.ndarray, bundle):
+        """Folds a drained block of grid indices into the current slot of the window.
+
+        The predicted LLM of each scenario comes from the serving model: the answer table in
+        table mode, a single vectorized predict over the block otherwise.
+        """
+        if not len(indices):
+            return
+        codes = np.stack(np.unravel_index(indices, GRID_SHAPE), axis=1).astype(np.uint8)
+        if bundle.answer_table is not None:
+            predicted = np.asarray(bundle.answer_table)[indices]
+        else:
+            predicted = bundle.predictor.predict_codes(codes)
+        features, pairs, classes = count_codes(codes, predicted.astype(np.int64))
+        with self._lock:
+            slot = self._advance(time.monotonic())
+            self._slot_features[slot] += features
+            self._slot_pairs[slot] += pairs
+            self._slot_classes[slot] += classes
+            self._slot_samples[slot] += len(indices)
+            self.features += features
+            self.pairs += pairs
+            self.classes += classes
+            self.samples += len(indices)
+        DRIFT_SAMPLES_TOTAL.inc(SAMPLE_RECORDED, len(indices))
+
+    def report(self, bundle) -> dict:
+        """Computes the divergence of the sampled traffic from the model's training profile.
+
+        Stores the result as the monitor's snapshot and updates the traffic_drift_divergence gauges.
+
+        Returns:
+            dict: status (ok, drift, insufficient_data or no_reference), sample counts and, per
+            feature and for the predicted LLM, the divergence and both distributions; pairs are
+            listed by descending divergence.
+        """
+        with self._lock:
+            self._advance(time.monotonic())
+            features, pairs, classes, samples = self.features.copy(), self.pairs.copy(), self.classes.copy(), self.samples
+
+        profile = getattr(bundle, "training_profile", None)
+        snapshot = {
+            "computed_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "model_version": bundle.version,
+            "pid": os.getpid(),
+            "sample_rate": self.sample_rate,
+            "samples": samples,
+            "window_seconds": self.window_slots * self.slot_seconds if self.slot_seconds != float("inf") else None,
+            "dropped": self.dropped,
+            "threshold": config.DRIFT_THRESHOLD,
+        }
+        if profile is None:
+            snapshot["status"] = STATUS_NO_REFERENCE
+        elif samples < config.DRIFT_MIN_SAMPLES:
+            snapshot["status"] = STATUS_INSUFFICIENT_DATA
+        if profile is None or samples < config.DRIFT_MIN_SAMPLES:
+            self.snapshot = snapshot
+            return snapshot
+
+        snapshot["training_data"] = profile.training_data
+        snapshot["training_rows"] = profile.rows
+        snapshot["features"] = {}
+        for name, enum, offset, size in zip(MODEL_PARAMS, FEATURE_ENUMS, FEATURE_OFFSETS, GRID_SHAPE):
+            values = [member.value for member in enum]
+            divergence = js_divergence(features[offset:offset + size], profile.features[offset:offset + size])
+            DRIFT_DIVERGENCE.set(divergence, _DIVERGENCE_INDEX[name])
+            snapshot["features"][name] = {
+                "divergence": round(divergence, 4),
+                "traffic": _shares(features[offset:offset + size], values),
+                "training": _shares(profile.features[offset:offset + size], values),
+            }
+
+        values = [llm.value for llm in LLM_CLASSES]
+        divergence = js_divergence(classes, profile.classes)
+        DRIFT_DIVERGENCE.set(divergence, _DIVERGENCE_INDEX["prediction"])
+        # Predições do modelo no tráfego contra os rótulos do treino
+        snapshot["prediction"] = {"divergence": round(divergence, 4), "traffic": _shares(classes, values), "training": _shares(profile.classes, values)}
+
+        snapshot["pairs"] = sorted((
+            {"features": [MODEL_PARAMS[i], MODEL_PARAMS[j]], "divergence": round(js_divergence(pairs[offset:offset + GRID_SHAPE[i] * GRID_SHAPE[j]], profile.pairs[offset:offset + GRID_SHAPE[i] * GRID_SHAPE[j]]), 4)}
+            for offset, (i, j) in zip(PAIR_OFFSETS, PAIRS)
+        ), key=lambda pair: pair["divergence"], reverse=True)
+
+        drifted = [name for name, entry in snapshot["features"].items() if entry["divergence"] > config.DRIFT_THRESHOLD]
+        if snapshot["prediction"]["divergence"] > config.DRIFT_THRESHOLD:
+            drifted.append("prediction")
+        drifted += [",".join(pair["features"]) for pair in snapshot["pairs"] if pair["divergence"] > config.DRIFT_THRESHOLD]
+        snapshot["status"] = STATUS_DRIFT if drifted else STATUS_OK
+        snapshot["drifted"] = drifted
+        self.snapshot = snapshot
+        return snapshot
+
+
+monitor = TrafficMonitor(config.DRIFT_BUFFER_SIZE, config.DRIFT_SAMPLE_RATE, max(1, math.ceil(config.DRIFT_WINDOW / config.DRIFT_INTERVAL)) if config.DRIFT_INTERVAL > 0 else 1, config.DRIFT_INTERVAL if config.DRIFT_INTERVAL > 0 else float("inf"))
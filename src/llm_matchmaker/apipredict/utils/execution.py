@@ -0,0 +1,161 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException
+
+from utils import metrics
+
+predict_executor = None
+
+
+def _init_worker():
+    # Cada processo do pool carrega o próprio modelo uma única vez
+    from utils.logs import configure_logging
+    from utils.models_loader import load_models
+
+    configure_logging()
+    load_models()
+
+
+def _call(func, args):
+    # HTTPException não sobrevive ao pickle entre processos; devolve status e detalhe para o pai relançar
+    try:
+        return func(*args), None
+    except HTTPException as e:
+        return None, (e.status_code, e.detail)
+
+
+def _call_in_worker(func, args):
+    # Métricas de etapa e de classe registradas no processo do pool voltam com o resultado para o /metrics do pai
+    result, error = _call(func, args)
+    return result, error, metrics.take_worker_metrics()
+
+
+class PredictExecutor:
+    """Runs CPU-bound prediction work off the event loop with bounded concurrency.
+
+    Modes:
+        inline  -> runs on the event loop thread (lowest overhead for table lookups)
+        thread  -> runs on a thread pool
+        process -> runs on a process pool whose workers preload the model
+
+    At most max_concurrency calls execute at once; when max_queue calls are already
+    waiting for a slot, new requests are rejected with 503 and a Retry-After header.
+    """
+
+    def __init__(self, mode: str, workers: int, max_concurrency: int, max_queue: int, retry_after: int):
+        self.mode = mode
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.waiting = 0
+        self.running = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._pool: Executor | None = None
+
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="predict")
+        elif mode == "process":
+            self._pool = self._process_pool()
+        elif mode != "inline":
+            raise ValueError(f"Unknown PREDICT_EXECUTOR: {mode}")
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"), initializer=_init_worker)
+
+    async def run(self, func, *args, reject_when_full: bool = True):
+        """Executes func(*args) according to the configured mode.
+
+        Args:
+            func: Module-level callable (must be picklable in process mode).
+            *args: Positional arguments for func.
+            reject_when_full (bool): Raise 503 instead of waiting when the queue is saturated.
+                Streaming endpoints that already started a response pass False.
+
+        Raises:
+            HTTPException: 503 with Retry-After when the queue is full, or any HTTPException raised by func.
+        """
+        if self._slots.locked() and reject_when_full and self.waiting >= self.max_queue:
+            raise HTTPException(status_code=503, detail="Prediction queue is full", headers={"Retry-After": str(self.retry_after)})
+
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        try:
+            return await self._run_on(self._pool, func, args)
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+    async def _run_on(self, pool: Executor | None, func, args: tuple):
+        if pool is None:
+            result, error = _call(func, args)
+        elif self.mode == "process":
+            result, error, taken = await asyncio.get_running_loop().run_in_executor(pool, _call_in_worker, func, args)
+            metrics.merge_worker_metrics(taken)
+        else:
+            result, error = await asyncio.get_running_loop().run_in_executor(pool, _call, func, args)
+
+        if error is not None:
+            raise HTTPException(status_code=error[0], detail=error[1])
+        return result
+
+    async def refresh(self, warm: Callable[[Callable[..., Awaitable]], Awaitable]):
+        """Replaces the process pool after a model swap so new workers load the active version.
+
+        The new pool is warmed before it takes traffic: warm receives a run(func, *args)
+        coroutine function bound to it. Requests keep going to the old pool meanwhile, and
+        calls already running there finish on it. No-op in inline and thread modes, which
+        share the parent's models.bundle.
+        """
+        if self.mode != "process":
+            return
+        pool = self._process_pool()
+        try:
+            await warm(lambda func, *args: self._run_on(pool, func, args))
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        old, self._pool = self._pool, pool
+        old.shutdown(wait=False)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+def start_executor():
+    """Creates the prediction executor from utils.config; called once in the app lifespan."""
+    from utils import config
+
+    global predict_executor
+
+    workers = config.PREDICT_WORKERS or os.cpu_count() or 1
+    predict_executor = PredictExecutor(
+        mode=config.PREDICT_EXECUTOR,
+        workers=workers,
+        max_concurrency=config.PREDICT_MAX_CONCURRENCY or workers,
+        max_queue=config.PREDICT_MAX_QUEUE,
+        retry_after=config.PREDICT_RETRY_AFTER,
+    )
+
+
+def shutdown_executor():
+    global predict_executor
+
+    if predict_executor is not None:
+        predict_executor.shutdown()
+        predict_executor = None
+
+# Estado da fila de predição lido a cada coleta de /metrics
+metrics.register(metrics.Gauge("predict_queue_waiting", "Prediction calls waiting for an executor slot",
+                               fn=lambda: predict_executor.waiting if predict_executor is not None else 0))
+metrics.register(metrics.Gauge("predict_queue_running", "Prediction calls currently executing",
+                               fn=lambda: predict_executor.running if predict_executor is not None else 0))
@@ -0,0 +1,122 @@
+import numpy as np
+
+from enums.params import TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, TemperaturePreference, OutputStyle
+
+# Colunas efetivamente consumidas pelo modelo (determinism_needed é descartado no treino)
+MODEL_PARAMS = ['task_type',
+                'domain',
+                'input_language',
+                'privacy_requirement',
+                'hardware_available',
+                'hallucination_tolerance',
+                'temperature_pref',
+                'output_style'
+                ]
+
+FEATURE_ENUMS = (TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, TemperaturePreference, OutputStyle)
+
+GRID_SHAPE = tuple(len(enum) for enum in FEATURE_ENUMS)
+GRID_SIZE = int(np.prod(GRID_SHAPE))
+
+# Ordinal de cada valor dentro do seu enum e o passo de cada feature no índice linear da grade
+_ORDINALS = tuple({member.value: i for i, member in enumerate(enum)} for enum in FEATURE_ENUMS)
+_STRIDES = tuple(int(np.prod(GRID_SHAPE[i + 1:])) for i in range(len(GRID_SHAPE)))
+# Deslocamento de cada membro no índice linear (ordinal * passo), indexado pelo próprio membro do enum
+_OFFSETS = tuple({member: i * stride for i, member in enumerate(enum)} for enum, stride in zip(FEATURE_ENUMS, _STRIDES))
+
+
+def feature_schema() -> dict[str, list[str]]:
+    """Returns the enum values accepted for each model feature, in ordinal order.
+
+    Returns:
+        dict: Feature name -> list of values, ordered as in the enums.
+    """
+    return {name: [member.value for member in enum] for name, enum in zip(MODEL_PARAMS, FEATURE_ENUMS)}
+
+
+def feature_codes(task_type: TaskType, domain: Domain, input_language: InputLanguage, privacy_requirement: PrivacyRequirement, hardware_available: HardwareAvailable, hallucination_tolerance: HallucinationTolerance, temperature_preference: TemperaturePreference, output_style: OutputStyle) -> tuple[int, ...]:
+    """Maps one scenario to the enum ordinal of each model feature.
+
+    Returns:
+        tuple[int, ...]: One ordinal per entry of MODEL_PARAMS.
+    """
+    values = (task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, temperature_preference, output_style)
+    return tuple(ordinals[value.value] for ordinals, value in zip(_ORDINALS, values))
+
+
+def grid_index(task_type: TaskType, domain: Domain, input_language: InputLanguage, privacy_requirement: PrivacyRequirement, hardware_available: HardwareAvailable, hallucination_tolerance: HallucinationTolerance, temperature_preference: TemperaturePreference, output_style: OutputStyle) -> int:
+    """Maps one scenario to its position in the full feature grid.
+
+    Returns:
+        int: Row-major index of the scenario among all GRID_SIZE combinations.
+    """
+    # Soma direta dos deslocamentos por membro: sem laço nem acesso a .value, é chamada em toda requisição
+    return (_OFFSETS[0][task_type] + _OFFSETS[1][domain] + _OFFSETS[2][input_language] + _OFFSETS[3][privacy_requirement]
+            + _OFFSETS[4][hardware_available] + _OFFSETS[5][hallucination_tolerance] + _OFFSETS[6][temperature_preference] + _OFFSETS[7][output_style])
+
+
+def grid_indices(codes: np.ndarray) -> np.ndarray:
+    """Vectorized grid_index over a matrix of enum ordinals.
+
+    Args:
+        codes (np.ndarray): (n, n_features) matrix of enum ordinals.
+
+    Returns:
+        np.ndarray: int64 array with the grid index of each row.
+    """
+    return codes.astype(np.int64) @ np.array(_STRIDES, dtype=np.int64)
+
+
+def grid_codes() -> np.ndarray:
+    """Enumerates every feature combination as enum ordinals.
+
+    Returns:
+        np.ndarray: (GRID_SIZE, n_features) uint8 matrix, row i being the scenario with grid index i.
+    """
+    return np.indices(GRID_SHAPE, dtype=np.uint8).reshape(len(GRID_SHAPE), -1).T
+
+
+def codes_to_frame(codes: np.ndarray):
+    """Converts an ordinal code matrix into the DataFrame layout expected by the sklearn pipeline.
+
+    Args:
+        codes (np.ndarray): (n, n_features) matrix of enum ordinals.
+
+    Returns:
+        pd.DataFrame: One column per entry of MODEL_PARAMS holding the enum string values.
+    """
+    import pandas as pd
+
+    columns = {}
+    for j, (name, enum) in enumerate(zip(MODEL_PARAMS, FEATURE_ENUMS)):
+        values = np.array([member.value for member in enum], dtype=object)
+        columns[name] = values[codes[:, j]]
+    return pd.DataFrame(columns, columns=MODEL_PARAMS)
+
+
+def frame_to_codes(frame) -> np.ndarray:
+    """Converts a DataFrame with the MODEL_PARAMS columns (e.g. the training CSV) into enum ordinals.
+
+    Args:
+        frame (pd.DataFrame): Frame holding the enum string values.
+
+    Returns:
+        np.ndarray: (n, n_features) uint8 matrix of enum ordinals.
+
+    Raises:
+        ValueError: If a column holds a value that is not part of its enum.
+    """
+    codes = np.empty((len(frame), len(MODEL_PARAMS)), dtype=np.uint8)
+    for j, name in enumerate(MODEL_PARAMS):
+        column = frame[name]
+        # Categórico com as categorias na ordem do enum (formato Parquet do dataset): os códigos já são os ordinais
+        if str(column.dtype) == "category" and list(column.cat.categories) == list(_ORDINALS[j]):
+            if (column.cat.codes < 0).any():
+                raise ValueError(f"Column {name} has values outside {FEATURE_ENUMS[j].__name__}")
+            codes[:, j] = column.cat.codes.to_numpy()
+            continue
+        column = column.astype(str).map(_ORDINALS[j])
+        if column.isna().any():
+            raise ValueError(f"Column {name} has values outside {FEATURE_ENUMS[j].__name__}")
+        codes[:, j] = column.to_numpy()
+    return codes
@@ -0,0 +1,95 @@
+import hashlib
+from collections import OrderedDict
+from enum import Enum
+
+from utils import config, metrics
+
+CACHE_RESULTS = ("hit", "miss", "not_modified")
+
+RESPONSE_CACHE_TOTAL = metrics.register(metrics.Counter("response_cache_total", "GET predictions answered from the response cache, computed, or answered with 304", ("result",)))
+CACHE_HIT, CACHE_MISS, CACHE_NOT_MODIFIED = (RESPONSE_CACHE_TOTAL.add_labels((result,)) for result in CACHE_RESULTS)
+
+
+def canonical_query(**params) -> str:
+    """Canonical form of a request's validated parameters, independent of their order in the URL.
+
+    Enums become their values, lists become their sorted distinct values and None values
+    are dropped, so equivalent query strings share one representation.
+    """
+    parts = []
+    for name in sorted(params):
+        value = params[name]
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = ",".join(sorted({str(item.value if isinstance(item, Enum) else item) for item in value}))
+        elif isinstance(value, Enum):
+            value = value.value
+        parts.append(f"{name}={value}")
+    return "&".join(parts)
+
+
+def etag(model_sha256: str, route: str, canonical: str) -> str:
+    """Strong ETag of a response: a different model artifact or canonical query gives another tag.
+
+    PREDICT_MODE is part of the key too, since the table stores probabilities as float32 and the
+    rankings it serves differ in the last digits from the ones computed by the predictor.
+    """
+    digest = hashlib.sha256(f"{model_sha256}\n{config.PREDICT_MODE}\n{route}\n{canonical}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def not_modified(if_none_match: str | None, tag: str) -> bool:
+    """Whether an If-None-Match header matches the tag (weak comparison, as RFC 9110 requires for it)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == tag:
+            return True
+    return False
+
+
+def cache_headers(tag: str, model_version: str) -> dict[str, str]:
+    return {
+        "ETag": tag,
+        "Cache-Control": f"public, max-age={config.HTTP_CACHE_MAX_AGE}",
+        "X-Model-Version": model_version,
+    }
+
+
+class ResponseCache:
+    """LRU of serialized response bodies keyed by ETag.
+
+    The ETag already includes the model hash, so entries of a previous model are never
+    served; they are dropped as soon as a response of another model is stored. Used only
+    from the event loop, so no locking is needed.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.model_sha256 = None
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+
+    def get(self, tag: str) -> bytes | None:
+        body = self._entries.get(tag)
+        if body is not None:
+            self._entries.move_to_end(tag)
+        return body
+
+    def put(self, tag: str, model_sha256: str, body: bytes):
+        if self.maxsize <= 0:
+            return
+        if model_sha256 != self.model_sha256:
+            self._entries.clear()
+            self.model_sha256 = model_sha256
+        self._entries[tag] = body
+        self._entries.move_to_end(tag)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = ResponseCache(config.RESPONSE_CACHE_SIZE)
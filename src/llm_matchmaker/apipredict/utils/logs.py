@@ -0,0 +1,138 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from utils import metrics
+
+# Atributos padrão de um LogRecord; o restante veio de extra= e vai como campo do JSON
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener: QueueListener | None = None
+_handler: "_NonBlockingQueueHandler | None" = None
+_success_sample_rate = 1.0
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as a single JSON object per line, including fields passed via extra=."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller and leaves message formatting to the listener thread.
+
+    The stock QueueHandler formats the message on the calling thread; here the record
+    goes to the queue with msg and args untouched, so %-style arguments must be
+    immutable values. When the queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # O traceback é renderizado aqui, enquanto os frames ainda existem
+            record = copy.copy(record)
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level: str | None = None, fmt: str | None = None, success_sample_rate: float | None = None, queue_size: int | None = None):
+    """Configures the root logger once per process; later calls are no-ops.
+
+    Records are put on a bounded in-memory queue and formatted/written to stderr by a
+    background QueueListener thread, so request threads never wait on log I/O.
+
+    Args:
+        level (str | None): Minimum level (defaults to config.LOG_LEVEL).
+        fmt (str | None): "json" or "text" (defaults to config.LOG_FORMAT).
+        success_sample_rate (float | None): Fraction of successful requests logged (defaults to config.LOG_SUCCESS_SAMPLE_RATE).
+        queue_size (int | None): Maximum pending records (defaults to config.LOG_QUEUE_SIZE).
+    """
+    from utils import config
+
+    global _listener, _handler, _success_sample_rate
+
+    if _listener is not None:
+        return
+
+    _success_sample_rate = config.LOG_SUCCESS_SAMPLE_RATE if success_sample_rate is None else success_sample_rate
+
+    stream = logging.StreamHandler(sys.stderr)
+    if (fmt or config.LOG_FORMAT) == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    _handler = _NonBlockingQueueHandler(queue.Queue(config.LOG_QUEUE_SIZE if queue_size is None else queue_size))
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(level or config.LOG_LEVEL)
+
+    _listener = QueueListener(_handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def _restart_after_fork():
+    # A thread do listener não sobrevive ao fork (ex.: workers do gunicorn com preload); cada filho sobe a sua
+    global _listener
+
+    if _listener is not None:
+        _handler.queue = queue.Queue(_handler.queue.maxsize)
+        _listener = QueueListener(_handler.queue, *_listener.handlers, respect_handler_level=True)
+        _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def stop_logging():
+    """Flushes the pending records and stops the background writer thread."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def sample_success() -> bool:
+    """Returns True for the fraction of successful requests that should be logged."""
+    return _success_sample_rate >= 1.0 or random.random() < _success_sample_rate
+
+
+def dropped_records() -> int:
+    """Number of records discarded because the log queue was full."""
+    return _handler.dropped if _handler is not None else 0
+
+
+metrics.register(metrics.Gauge("log_records_dropped", "Log records discarded because the log queue was full", fn=dropped_records))
@@ -0,0 +1,280 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable
+
+from results.match_result import LLMs
+
+# Buckets (segundos) das latências: de microssegundos (consulta na tabela) a segundos (pipeline sklearn)
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+PREDICT_STAGES = ("encode", "predict", "result")
+OTHER_ROUTE = "other"
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    """Metric with a fixed, preallocated set of label combinations addressed by index.
+
+    Label combinations are registered up front (add_labels) so the hot path only
+    increments a slot in a list; no dicts or strings are built per observation.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.label_values: list[tuple] = []
+        self._lock = threading.Lock()
+        if not label_names:
+            self.add_labels(())
+
+    def add_labels(self, values: tuple) -> int:
+        """Registers a label combination and returns the index used by the hot path."""
+        self.label_values.append(values)
+        self._grow()
+        return len(self.label_values) - 1
+
+    def _grow(self):
+        raise NotImplementedError
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _grow(self):
+        self.values = getattr(self, "values", []) + [0]
+
+    def inc(self, index: int = 0, amount: int = 1):
+        with self._lock:
+            self.values[index] += amount
+
+    def take(self) -> list[int]:
+        """Returns the counts recorded so far and resets them (see take_worker_metrics)."""
+        with self._lock:
+            values, self.values = self.values, [0] * len(self.values)
+        return values
+
+    def merge(self, values: list[int]):
+        """Adds counts taken from another process's copy of this metric."""
+        with self._lock:
+            self.values = [mine + theirs for mine, theirs in zip(self.values, values)]
+
+    def render(self) -> list[str]:
+        return self.header() + [f"{self.name}{_labels(self.label_names, labels)} {value}" for labels, value in zip(self.label_values, self.values)]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = (), fn: Callable[[], float] | None = None):
+        # fn: valor lido no momento da coleta, para gauges que espelham estado de outro módulo
+        self.fn = fn
+        super().__init__(name, help, label_names)
+
+    def _grow(self):
+        self.values = getattr(self, "values", []) + [0.0]
+
+    def set(self, value: float, index: int = 0):
+        self.values[index] = value
+
+    def inc(self, index: int = 0, amount: float = 1):
+        with self._lock:
+            self.values[index] += amount
+
+    def dec(self, index: int = 0, amount: float = 1):
+        with self._lock:
+            self.values[index] -= amount
+
+    def render(self) -> list[str]:
+        if self.fn is not None:
+            self.values[0] = self.fn()
+        return self.header() + [f"{self.name}{_labels(self.label_names, labels)} {value}" for labels, value in zip(self.label_values, self.values)]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        super().__init__(name, help, label_names)
+
+    def _grow(self):
+        self.counts = getattr(self, "counts", []) + [[0] * (len(self.buckets) + 1)]
+        self.sums = getattr(self, "sums", []) + [0.0]
+
+    def observe(self, value: float, index: int = 0):
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index][bucket] += 1
+            self.sums[index] += value
+
+    def take(self) -> tuple[list[list[int]], list[float]]:
+        """Returns the (bucket counts, sums) recorded so far and resets them (see take_worker_metrics)."""
+        with self._lock:
+            taken = (self.counts, self.sums)
+            self.counts = [[0] * (len(self.buckets) + 1) for _ in self.counts]
+            self.sums = [0.0] * len(self.sums)
+        return taken
+
+    def merge(self, taken: tuple[list[list[int]], list[float]]):
+        """Adds observations taken from another process's copy of this metric."""
+        counts, sums = taken
+        with self._lock:
+            for mine, theirs in zip(self.counts, counts):
+                for bucket, count in enumerate(theirs):
+                    if count:
+                        mine[bucket] += count
+            self.sums = [mine + theirs for mine, theirs in zip(self.sums, sums)]
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, counts, total in zip(self.label_values, self.counts, self.sums):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names + ('le',), labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+def process_memory() -> dict[str, int]:
+    """Reads this process's resident (Rss) and proportional (Pss) memory, in bytes.
+
+    Pss splits shared pages (e.g. memory-mapped model arrays) among the processes
+    mapping them, so summing it across workers gives the real footprint. Returns
+    zeros where /proc/self/smaps_rollup is unavailable (non-Linux).
+    """
+    memory = {"Rss": 0, "Pss": 0}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in memory:
+                    memory[key] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return memory
+
+
+REQUESTS_TOTAL = Counter("http_requests_total", "HTTP requests by route, method and status class", ("route", "method", "status"))
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "HTTP request latency by route and method", ("route", "method"))
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+PREDICT_STAGE_DURATION = Histogram("predict_stage_duration_seconds", "Time spent in each stage of predict_match", ("stage",))
+PREDICTIONS_TOTAL = Counter("predictions_total", "Predicted LLM classes", ("llm",))
+MODEL_LOAD_SECONDS = Gauge("model_load_seconds", "Time spent in load_models")
+
+STAGE_ENCODE, STAGE_PREDICT, STAGE_RESULT = (PREDICT_STAGE_DURATION.add_labels((stage,)) for stage in PREDICT_STAGES)
+for llm in LLMs:
+    PREDICTIONS_TOTAL.add_labels((llm.value,))
+
+
+def take_worker_metrics() -> tuple:
+    """Takes the prediction metrics recorded in a process-pool worker since the last call.
+
+    Workers of PREDICT_EXECUTOR=process record stage timings and predicted classes in
+    their own copies of the metrics; they return these deltas with each result so the
+    parent, which serves /metrics, adds them with merge_worker_metrics.
+    """
+    return PREDICT_STAGE_DURATION.take(), PREDICTIONS_TOTAL.take()
+
+
+def merge_worker_metrics(taken: tuple):
+    stages, predictions = taken
+    PREDICT_STAGE_DURATION.merge(stages)
+    PREDICTIONS_TOTAL.merge(predictions)
+
+
+PROCESS_RSS = Gauge("process_resident_memory_bytes", "Resident memory of this worker", fn=lambda: process_memory()["Rss"])
+PROCESS_PSS = Gauge("process_proportional_memory_bytes", "Proportional set size of this worker (shared pages divided among workers)", fn=lambda: process_memory()["Pss"])
+
+_METRICS: list[_Metric] = [REQUESTS_TOTAL, REQUEST_DURATION, REQUESTS_IN_FLIGHT, PREDICT_STAGE_DURATION, PREDICTIONS_TOTAL, MODEL_LOAD_SECONDS, PROCESS_RSS, PROCESS_PSS]
+
+# (rota, método) -> (índice em REQUESTS_TOTAL por classe de status, -1 até a primeira resposta dela; índice em REQUEST_DURATION)
+_ROUTES: dict[tuple[str, str], tuple[list[int], int]] = {}
+
+
+def register(metric: _Metric) -> _Metric:
+    """Adds a metric defined elsewhere (e.g. executor gauges) to the /metrics output."""
+    _METRICS.append(metric)
+    return metric
+
+
+def register_routes(app):
+    """Preallocates the latency slots of the app's API routes; docs and other unlisted paths share OTHER_ROUTE.
+
+    Request counters get a series per status class only once a response of that class is
+    seen (status_slot), so /metrics carries no permanently-zero series.
+    """
+    routes = [(route.path, method) for route in app.routes if getattr(route, "include_in_schema", False) for method in sorted(getattr(route, "methods", None) or ())]
+    for path, method in routes + [(OTHER_ROUTE, OTHER_ROUTE)]:
+        if (path, method) not in _ROUTES:
+            _ROUTES[(path, method)] = ([-1] * len(STATUS_CLASSES), REQUEST_DURATION.add_labels((path, method)))
+
+
+def status_slot(path: str, method: str, slots: list[int], status: int) -> int:
+    """Returns the REQUESTS_TOTAL index of a route and status class, registering it on first use."""
+    status_class = min(status // 100, len(STATUS_CLASSES)) - 1
+    index = slots[status_class]
+    if index < 0:
+        # add_labels troca a lista de valores: sob o lock, para não perder um inc concorrente
+        with REQUESTS_TOTAL._lock:
+            index = slots[status_class] = REQUESTS_TOTAL.add_labels((path, method, STATUS_CLASSES[status_class]))
+    return index
+
+
+def render() -> str:
+    """Renders every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts, latency and in-flight requests per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # O FastAPI grava a rota casada no scope; o template da rota evita uma série por valor de parâmetro
+            route = scope.get("route")
+            key = (route.path, scope["method"]) if route is not None else None
+            slots = _ROUTES.get(key)
+            if slots is None:
+                key = (OTHER_ROUTE, OTHER_ROUTE)
+                slots = _ROUTES[key]
+            REQUESTS_TOTAL.inc(status_slot(*key, slots[0], status))
+            REQUEST_DURATION.observe(time.perf_counter() - start, slots[1])
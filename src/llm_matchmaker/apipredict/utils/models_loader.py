@@ -1,12 +1,188 @@
-model_matcher = None
+import threading
 
-def load_models():
+
+class ModelBundle:
+    """Everything needed to serve one model version.
+
+    Request handlers read models.bundle once and use that object until they finish,
+    so a reload only has to rebind the module-level reference: the swap is atomic and
+    in-flight requests keep the version they started with.
+    """
+
+    def __init__(self, version: str, path: str, predictor, answer_table=None, model_matcher=None, metadata: dict | None = None, proba_table=None, model_sha256: str = "", training_profile=None):
+        self.version = version
+        self.path = path
+        self.predictor = predictor
+        self.answer_table = answer_table
+        self.proba_table = proba_table
+        self.model_matcher = model_matcher
+        self.metadata = metadata
+        # Hash do artefato servido: entra no ETag das respostas, que assim mudam junto com o modelo
+        self.model_sha256 = model_sha256
+        # Contagens do dataset de treino, referência do monitor de drift (None quando o artefato não tem perfil)
+        self.training_profile = training_profile
+
+
+bundle: ModelBundle | None = None
+_reload_lock = threading.Lock()
+
+
+def load_bundle(model_path: str, metadata: dict | None = None) -> ModelBundle:
+    """Loads the predictor (and answer table) of one model artifact.
+
+    Large arrays are memory-mapped read-only, so when the app is preloaded in the
+    gunicorn master every forked worker shares one physical copy through the page cache.
+
+    Args:
+        model_path (str): Path of the joblib model artifact.
+        metadata (dict | None): Registry metadata of the version, when it comes from the registry.
+
+    Raises:
+        ValueError: When the registry metadata was written for another feature schema, or
+            the model has no native predictor and scikit-learn is not installed.
+    """
     import os
-    import joblib
-    
-    global model_matcher
+    import logging
+    import time
+    from utils import config, metrics
+    from utils.answer_table import build_answer_table, build_proba_table, load_answer_table, load_proba_table, save_answer_table, verify_answer_table, verify_proba_table
+    from utils.artifacts import file_sha256
+    from utils.drift import load_profile
+    from utils.features import feature_schema
+    from utils.native_model import NativePredictor, native_path
+
+    logger = logging.getLogger(__name__)
+    start = time.perf_counter()
+
+    if metadata is not None and metadata.get("features") != feature_schema():
+        raise ValueError(f"Model version {metadata.get('version')} was trained for a different feature schema")
+
+    # Versão servida: a do registro ou o prefixo do hash do artefato, devolvida no header X-Model-Version
+    model_sha256 = file_sha256(model_path)
+    model_version = metadata["version"] if metadata is not None else model_sha256[:12]
+
+    # Preditor NumPy compilado do pipeline: dispensa pandas/sklearn quando presente e atualizado
+    native = None
+    NATIVE_PATH = native_path(model_path)
+    if config.PREDICT_MODE != "pipeline" and os.path.isdir(NATIVE_PATH):
+        try:
+            native = NativePredictor.load(NATIVE_PATH, mmap_mode="r")
+            if native.meta.get("source_sha256") != model_sha256:
+                logger.warning("Native predictor was compiled from another model file, ignoring it")
+                native = None
+        except (OSError, ValueError) as e:
+            logger.warning("Could not load native predictor: %s", str(e))
+            native = None
+
+    if native is not None:
+        model_matcher = None
+        predictor = native
+    else:
+        try:
+            import joblib
+            from utils.predictors import PipelinePredictor
+        except ImportError as e:
+            # Imagem slim (só NumPy): um modelo sem preditor nativo é recusado como uma versão inválida
+            raise ValueError(f"Model {model_version} has no native predictor and scikit-learn is not installed: {e}") from e
+
+        # Arrays do pipeline (dump sem compressão) também via memory-map quando o estimador não os copia
+        model_matcher = joblib.load(model_path, mmap_mode="r")
+        predictor = PipelinePredictor(model_matcher)
+
+    table = proba = None
+    if config.PREDICT_MODE == "table":
+        # Tabelas com a resposta e as probabilidades de todas as combinações; reconstruídas se ausentes, desatualizadas ou divergentes
+        table = load_answer_table(model_path)
+        proba = load_proba_table(model_path)
+        if (table is None or proba is None
+                or not verify_answer_table(table, predictor, config.ANSWER_TABLE_CHECK_SAMPLES)
+                or not verify_proba_table(proba, predictor, config.ANSWER_TABLE_CHECK_SAMPLES)):
+            logger.warning("Answer table missing or out of date, rebuilding from the predictor")
+            table = build_answer_table(predictor)
+            proba = build_proba_table(predictor)
+            try:
+                save_answer_table(table, model_path, proba)
+                # Reabre os arquivos salvos para servir as tabelas via memory-map, compartilhadas entre workers
+                table = load_answer_table(model_path)
+                proba = load_proba_table(model_path)
+            except OSError as e:
+                logger.warning("Could not persist answer table: %s", str(e))
+
+    profile = load_profile(model_path)
+    if profile is None:
+        logger.warning("Training profile missing or out of date, drift monitoring has no reference")
+
+    metrics.MODEL_LOAD_SECONDS.set(time.perf_counter() - start)
+    return ModelBundle(model_version, model_path, predictor, table, model_matcher, metadata, proba, model_sha256, profile)
+
+
+def warm_bundle(new_bundle: ModelBundle):
+    """Runs the new model once and faults in its memory-mapped pages before it takes traffic."""
+    import numpy as np
+    from utils import config
+    from utils.features import grid_codes
+
+    if config.WARMUP_ROWS <= 0:
+        return
+    new_bundle.predictor.predict_codes(grid_codes()[:config.WARMUP_ROWS])
+    for table in (new_bundle.answer_table, new_bundle.proba_table):
+        if table is not None:
+            float(np.asarray(table).sum())
+
+
+def load_models(force: bool = False):
+    """Loads the active model version (see utils.registry) into this process.
+
+    Calls after the first are no-ops unless force is True.
+    """
+    from utils import registry, startup
+
+    global bundle
+
+    if bundle is not None and not force:
+        return
+
+    with startup.phase("model_load"):
+        new_bundle = load_bundle(*registry.resolve_model())
+    with startup.phase("warmup"):
+        warm_bundle(new_bundle)
+    bundle = new_bundle
+
+
+def reload_models(version: str | None = None) -> ModelBundle:
+    """Loads, warms and swaps in a model version without blocking requests.
+
+    Blocking; call it from a worker thread. Requests keep being served by the
+    previous bundle until the new one is fully loaded and warmed.
+
+    Args:
+        version (str | None): Version to activate in the registry first; None reloads the active one.
+
+    Raises:
+        ModelVersionNotFound: When the version does not exist in the registry.
+        ValueError: When the version does not match the API's feature schema.
+    """
+    import logging
+    from utils import registry
+
+    global bundle
+
+    with _reload_lock:
+        if version is None:
+            model_path, metadata = registry.resolve_model()
+        else:
+            model_path, metadata = registry.version_model(version)
+
+        # Versões do registro são imutáveis; o artefato legado pode ter sido sobrescrito e é sempre recarregado
+        if bundle is not None and metadata is not None and bundle.metadata is not None and metadata["version"] == bundle.version:
+            return bundle
 
-    main_path = os.path.dirname(__file__)
-    MODEL_MATCHER_PATH = os.path.join(main_path, '..', 'models/best_llm_matchmaker_model.joblib')
+        new_bundle = load_bundle(model_path, metadata)
+        warm_bundle(new_bundle)
+        # Só ativa a versão no registro depois de carregada, para os demais workers não seguirem um artefato inválido
+        if version is not None:
+            registry.set_current(version)
 
-    model_matcher = joblib.load(MODEL_MATCHER_PATH)
\ No newline at end of file
+        previous, bundle = bundle, new_bundle
+        logging.getLogger(__name__).info("Model swapped", extra={"previous_version": previous.version if previous else None, "model_version": new_bundle.version})
+        return new_bundle
@@ -0,0 +1,294 @@
+import json
+import os
+
+import numpy as np
+
+from utils.artifacts import file_sha256
+from utils.features import MODEL_PARAMS, FEATURE_ENUMS, feature_schema
+from utils.predictors import LLM_CLASSES, LLM_CODES
+
+NATIVE_FORMAT_VERSION = 1
+
+# Linhas avaliadas por vez nas florestas, limitando a matriz (linhas x árvores) em memória
+_FOREST_BLOCK_ROWS = 1024
+
+
+def native_path(model_path: str) -> str:
+    """Returns the directory of the compiled predictor, stored alongside the model file."""
+    base, _ = os.path.splitext(model_path)
+    return f"{base}.native"
+
+
+def _encoder_layout(pipeline) -> tuple[np.ndarray, np.ndarray]:
+    """Maps every one-hot column produced by the pipeline to (feature position, enum ordinal).
+
+    Categories seen in training but absent from the enums get ordinal -1 and never match.
+    """
+    preprocessor = pipeline.named_steps["preprocessor"]
+    columns_feature, columns_ordinal = [], []
+    for name, encoder, columns in preprocessor.transformers_:
+        if isinstance(encoder, str) and encoder == "drop":
+            continue
+        if type(encoder).__name__ != "OneHotEncoder" or getattr(encoder, "drop_idx_", None) is not None:
+            raise ValueError(f"Unsupported transformer for native export: {name}={encoder!r}")
+        for column, categories in zip(columns, encoder.categories_):
+            feature = MODEL_PARAMS.index(column)
+            ordinals = {member.value: i for i, member in enumerate(FEATURE_ENUMS[feature])}
+            for category in categories:
+                columns_feature.append(feature)
+                columns_ordinal.append(ordinals.get(str(category), -1))
+    return np.array(columns_feature, dtype=np.int16), np.array(columns_ordinal, dtype=np.int16)
+
+
+def _ordinal_layout(pipeline) -> list[tuple[int, np.ndarray]]:
+    """Maps every ordinal-encoded column produced by the pipeline to (feature position, enum ordinal of each category).
+
+    Categories seen in training but absent from the enums get ordinal -1 and never match.
+    """
+    preprocessor = pipeline.named_steps["preprocessor"]
+    layout = []
+    for name, encoder, columns in preprocessor.transformers_:
+        if isinstance(encoder, str) and encoder == "drop":
+            continue
+        if type(encoder).__name__ != "OrdinalEncoder":
+            raise ValueError(f"Unsupported transformer for native export: {name}={encoder!r}")
+        for column, categories in zip(columns, encoder.categories_):
+            feature = MODEL_PARAMS.index(column)
+            ordinals = {member.value: i for i, member in enumerate(FEATURE_ENUMS[feature])}
+            layout.append((feature, np.array([ordinals.get(str(category), -1) for category in categories], dtype=np.int16)))
+    return layout
+
+
+def _compile_naive_bayes(classifier, layout) -> tuple[dict, dict]:
+    # log P(classe) + soma de log P(categoria | classe): mesma soma de linhas indexadas pelos ordinais das lineares
+    offsets = np.cumsum([0] + [len(enum) for enum in FEATURE_ENUMS[:-1]]).astype(np.int64)
+    log_prob = np.zeros((sum(len(enum) for enum in FEATURE_ENUMS), len(classifier.classes_)), dtype=np.float64)
+    for column, (feature, ordinals) in enumerate(layout):
+        table = np.asarray(classifier.feature_log_prob_[column], dtype=np.float64)
+        for category, ordinal in enumerate(ordinals):
+            if ordinal >= 0:
+                log_prob[offsets[feature] + ordinal] += table[:, category]
+
+    arrays = {
+        "offsets": offsets,
+        "weights": log_prob,
+        "intercept": np.asarray(classifier.class_log_prior_, dtype=np.float64),
+    }
+    # predict_proba do CategoricalNB normaliza a log-verossimilhança conjunta: o mesmo softmax das lineares
+    return arrays, {"proba": "softmax"}
+
+
+def _compile_linear(classifier, columns_feature, columns_ordinal) -> tuple[dict, dict]:
+    coef = np.asarray(classifier.coef_, dtype=np.float64)
+    if coef.shape[0] != len(classifier.classes_):
+        raise ValueError("Native export of linear models requires a multiclass estimator")
+
+    # Um vetor de pesos por (feature, categoria do enum): o score é a soma das linhas indexadas pelos ordinais
+    offsets = np.cumsum([0] + [len(enum) for enum in FEATURE_ENUMS[:-1]]).astype(np.int64)
+    weights = np.zeros((sum(len(enum) for enum in FEATURE_ENUMS), coef.shape[0]), dtype=np.float64)
+    for column, (feature, ordinal) in enumerate(zip(columns_feature, columns_ordinal)):
+        if ordinal >= 0:
+            weights[offsets[feature] + ordinal] += coef[:, column]
+
+    multi_class = getattr(classifier, "multi_class", "ovr")
+    softmax = type(classifier).__name__ == "LogisticRegression" and (
+        multi_class == "multinomial" or (multi_class == "auto" and classifier.solver != "liblinear"))
+    arrays = {
+        "offsets": offsets,
+        "weights": weights,
+        "intercept": np.asarray(classifier.intercept_, dtype=np.float64),
+    }
+    return arrays, {"proba": "softmax" if softmax else "ovr"}
+
+
+def _compile_forest(classifier, columns_feature, columns_ordinal) -> tuple[dict, dict]:
+    trees = classifier.estimators_ if hasattr(classifier, "estimators_") else [classifier]
+    roots, node_feature, node_ordinal, left, right, node_leaf, leaf_values = [], [], [], [], [], [], []
+    depth = 0
+    n_nodes = 0
+    n_leaves = 0
+    for estimator in trees:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        internal = ~is_leaf
+        # Uma coluna one-hot vale 1 só quando o ordinal coincide: "x <= threshold" manda a igualdade para a direita
+        if np.any(tree.threshold[internal] >= 1) or np.any(tree.threshold[internal] < 0):
+            raise ValueError("Unexpected split threshold on a one-hot column")
+        ids = np.arange(tree.node_count) + n_nodes
+        features = np.where(is_leaf, 0, tree.feature)
+        roots.append(n_nodes)
+        node_feature.append(np.where(is_leaf, 0, columns_feature[features]))
+        # Folhas apontam para si mesmas e nunca casam, então a descida pode rodar max_depth passos sem máscara
+        node_ordinal.append(np.where(is_leaf, -1, columns_ordinal[features]))
+        left.append(np.where(is_leaf, ids, tree.children_left + n_nodes))
+        right.append(np.where(is_leaf, ids, tree.children_right + n_nodes))
+        node_leaf.append(np.where(is_leaf, np.cumsum(is_leaf) - 1 + n_leaves, -1))
+        values = tree.value[is_leaf][:, 0, :]
+        leaf_values.append(values / values.sum(axis=1, keepdims=True))
+        depth = max(depth, int(tree.max_depth))
+        n_nodes += tree.node_count
+        n_leaves += int(is_leaf.sum())
+
+    arrays = {
+        "roots": np.array(roots, dtype=np.int64),
+        "node_feature": np.concatenate(node_feature).astype(np.int64),
+        "node_ordinal": np.concatenate(node_ordinal).astype(np.int16),
+        "left": np.concatenate(left).astype(np.int64),
+        "right": np.concatenate(right).astype(np.int64),
+        "node_leaf": np.concatenate(node_leaf).astype(np.int64),
+        "leaf_values": np.concatenate(leaf_values).astype(np.float64),
+    }
+    return arrays, {"max_depth": depth}
+
+
+def compile_pipeline(pipeline) -> tuple[dict, dict]:
+    """Compiles a fitted preprocessor + classifier pipeline into plain NumPy arrays.
+
+    Linear models become one weight vector per enum category and CategoricalNB one vector
+    of per-class log-probabilities per enum category, both summed over the scenario's
+    ordinals; tree ensembles become flattened node arrays whose splits test an enum
+    ordinal directly.
+
+    Args:
+        pipeline: Fitted sklearn Pipeline with a ColumnTransformer named "preprocessor"
+            (OneHotEncoder, or OrdinalEncoder for CategoricalNB).
+
+    Returns:
+        tuple[dict, dict]: (arrays by name, metadata)
+    """
+    # Só no treino: a API carrega o preditor compilado sem importar o scikit-learn
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.naive_bayes import CategoricalNB
+    from sklearn.tree import DecisionTreeClassifier
+
+    classifier = pipeline.steps[-1][1]
+    if isinstance(classifier, CategoricalNB):
+        arrays, extra = _compile_naive_bayes(classifier, _ordinal_layout(pipeline))
+        return _with_classes(arrays, {"kind": "naive_bayes", **extra}, classifier)
+
+    # Famílias cujo predict_proba o preditor nativo reproduz; as demais (boosting, SVM, SGD sem log_loss...) ficam no sklearn
+    if isinstance(classifier, SGDClassifier) and classifier.loss != "log_loss":
+        raise ValueError(f"Unsupported SGDClassifier loss for native export: {classifier.loss!r} (only 'log_loss' has matching probabilities)")
+    columns_feature, columns_ordinal = _encoder_layout(pipeline)
+    if isinstance(classifier, (LogisticRegression, SGDClassifier)):
+        kind = "linear"
+        arrays, extra = _compile_linear(classifier, columns_feature, columns_ordinal)
+    elif isinstance(classifier, (RandomForestClassifier, ExtraTreesClassifier, DecisionTreeClassifier)):
+        kind = "forest"
+        arrays, extra = _compile_forest(classifier, columns_feature, columns_ordinal)
+    else:
+        raise ValueError(f"Unsupported classifier for native export: {type(classifier).__name__}")
+    return _with_classes(arrays, {"kind": kind, **extra}, classifier)
+
+
+def _with_classes(arrays: dict, extra: dict, classifier) -> tuple[dict, dict]:
+    # Colunas de score seguem a ordem de classes_ do sklearn (mantém o desempate do argmax)
+    arrays["class_codes"] = np.array([LLM_CODES[str(label)] for label in classifier.classes_], dtype=np.uint8)
+    meta = {
+        "format_version": NATIVE_FORMAT_VERSION,
+        "estimator": type(classifier).__name__,
+        "features": feature_schema(),
+        "classes": [str(label) for label in classifier.classes_],
+        **extra,
+    }
+    return arrays, meta
+
+
+def save_native(arrays: dict, meta: dict, path: str):
+    """Writes the compiled predictor as one .npy file per array plus meta.json."""
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({**meta, "arrays": sorted(arrays)}, f, indent=2)
+
+
+def export_native(pipeline, model_path: str) -> str:
+    """Compiles the pipeline saved at model_path and writes the native predictor next to it.
+
+    Returns:
+        str: Directory of the native predictor.
+    """
+    arrays, meta = compile_pipeline(pipeline)
+    meta["source_sha256"] = file_sha256(model_path)
+    path = native_path(model_path)
+    save_native(arrays, meta, path)
+    return path
+
+
+class NativePredictor:
+    """NumPy-only predictor produced by compile_pipeline; needs neither pandas nor scikit-learn."""
+
+    kind = "native"
+
+    def __init__(self, arrays: dict, meta: dict):
+        self.meta = meta
+        self.arrays = arrays
+        self.class_codes = arrays["class_codes"]
+        # Naive Bayes soma log-probabilidades pelo mesmo caminho dos pesos lineares
+        self._scores = self._forest_scores if meta["kind"] == "forest" else self._linear_scores
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str | None = None) -> "NativePredictor":
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("format_version") != NATIVE_FORMAT_VERSION or meta.get("features") != feature_schema():
+            raise ValueError(f"Native model at {path} does not match this API's feature schema")
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in meta["arrays"]}
+        return cls(arrays, meta)
+
+    def _linear_scores(self, codes: np.ndarray) -> np.ndarray:
+        rows = codes.astype(np.int64) + self.arrays["offsets"]
+        return self.arrays["weights"][rows].sum(axis=1) + self.arrays["intercept"]
+
+    def _forest_scores(self, codes: np.ndarray) -> np.ndarray:
+        if codes.shape[0] > _FOREST_BLOCK_ROWS:
+            return np.concatenate([self._forest_scores(codes[i:i + _FOREST_BLOCK_ROWS]) for i in range(0, codes.shape[0], _FOREST_BLOCK_ROWS)])
+
+        node_feature, node_ordinal = self.arrays["node_feature"], self.arrays["node_ordinal"]
+        left, right = self.arrays["left"], self.arrays["right"]
+        roots, leaf_values = self.arrays["roots"], self.arrays["leaf_values"]
+
+        # Desce todas as árvores para todas as linhas em paralelo, um nível por iteração
+        flat_codes = codes.astype(np.int16).ravel()
+        row_offsets = (np.arange(codes.shape[0]) * codes.shape[1])[:, None]
+        nodes = np.broadcast_to(roots, (codes.shape[0], len(roots))).copy()
+        for _ in range(self.meta["max_depth"]):
+            matches = flat_codes[row_offsets + node_feature[nodes]] == node_ordinal[nodes]
+            nodes = np.where(matches, right[nodes], left[nodes])
+
+        # Soma árvore a árvore, na mesma ordem do sklearn, para reproduzir exatamente os empates
+        leaves = self.arrays["node_leaf"][nodes]
+        scores = np.zeros((codes.shape[0], leaf_values.shape[1]), dtype=np.float64)
+        for tree in range(leaves.shape[1]):
+            scores += leaf_values[leaves[:, tree]]
+        return scores / leaves.shape[1]
+
+    def predict_codes(self, codes: np.ndarray) -> np.ndarray:
+        """Predicts a block of scenarios.
+
+        Args:
+            codes (np.ndarray): (n, n_features) matrix of enum ordinals.
+
+        Returns:
+            np.ndarray: uint8 array with the predicted LLM code (index in LLM_CLASSES) of each row.
+        """
+        return self.class_codes[self._scores(codes).argmax(axis=1)]
+
+    def predict_proba_codes(self, codes: np.ndarray) -> np.ndarray:
+        """Class probabilities of a block of scenarios, as the sklearn pipeline would report them.
+
+        Returns:
+            np.ndarray: (n, len(LLM_CLASSES)) float64 matrix with columns in LLM_CLASSES order.
+        """
+        scores = self._scores(codes)
+        if self.meta["kind"] != "forest":
+            if self.meta["proba"] == "softmax":
+                scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+            else:
+                scores = 1.0 / (1.0 + np.exp(-scores))
+            scores /= scores.sum(axis=1, keepdims=True)
+        proba = np.zeros((scores.shape[0], len(LLM_CLASSES)), dtype=np.float64)
+        proba[:, self.class_codes] = scores
+        return proba
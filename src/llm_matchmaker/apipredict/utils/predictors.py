@@ -0,0 +1,62 @@
+import numpy as np
+
+from results.match_result import LLMs
+from utils.features import codes_to_frame
+
+# Ordem fixa das classes: os códigos de LLM trocados entre os módulos são posições neste tuple
+LLM_CLASSES = tuple(LLMs)
+LLM_CODES = {llm.value: i for i, llm in enumerate(LLM_CLASSES)}
+
+
+def rank_codes(proba: np.ndarray, predicted: int) -> np.ndarray:
+    """Orders the LLM codes of one scenario by descending probability.
+
+    Ties are broken in favour of the predicted class (so the ranking always starts with
+    the same answer as predict_codes), then by LLM_CLASSES order.
+
+    Args:
+        proba (np.ndarray): Probabilities of one scenario, in LLM_CLASSES order.
+        predicted (int): LLM code returned by predict_codes for the same scenario.
+
+    Returns:
+        np.ndarray: Every LLM code, best first.
+    """
+    return np.lexsort((np.arange(len(proba)) != predicted, -proba))
+
+
+class PipelinePredictor:
+    """Adapts the fitted sklearn pipeline to the ordinal-code interface used by the API.
+
+    Requires pandas and scikit-learn at runtime.
+    """
+
+    kind = "pipeline"
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        # Código de LLM de cada coluna do predict_proba (ordem de classes_ do sklearn)
+        self.class_codes = np.array([LLM_CODES[str(label)] for label in pipeline.classes_], dtype=np.uint8)
+
+    def predict_codes(self, codes: np.ndarray) -> np.ndarray:
+        """Predicts a block of scenarios.
+
+        Args:
+            codes (np.ndarray): (n, n_features) matrix of enum ordinals.
+
+        Returns:
+            np.ndarray: uint8 array with the predicted LLM code (index in LLM_CLASSES) of each row.
+        """
+        predictions = self.pipeline.predict(codes_to_frame(codes))
+        labels, inverse = np.unique(predictions, return_inverse=True)
+        label_codes = np.array([LLM_CODES[label] for label in labels], dtype=np.uint8)
+        return label_codes[inverse]
+
+    def predict_proba_codes(self, codes: np.ndarray) -> np.ndarray:
+        """Class probabilities of a block of scenarios.
+
+        Returns:
+            np.ndarray: (n, len(LLM_CLASSES)) float64 matrix with columns in LLM_CLASSES order.
+        """
+        proba = np.zeros((codes.shape[0], len(LLM_CLASSES)), dtype=np.float64)
+        proba[:, self.class_codes] = self.pipeline.predict_proba(codes_to_frame(codes))
+        return proba
@@ -0,0 +1,96 @@
+import json
+import os
+
+from utils import config
+
+MODEL_FILENAME = "best_llm_matchmaker_model.joblib"
+METADATA_FILENAME = "metadata.json"
+CURRENT_FILENAME = "CURRENT"
+
+class ModelVersionNotFound(ValueError):
+    """Raised when a requested version is not published in the registry."""
+
+
+# Modelo servido quando o registro não tem versão ativa (artefato original do repositório)
+LEGACY_MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "models", MODEL_FILENAME)
+
+
+def version_path(version: str, registry_dir: str | None = None) -> str:
+    # Versões são nomes de subpastas; barra ou ponto inicial permitiria sair do registro
+    if not version or version.startswith(".") or os.path.basename(version) != version:
+        raise ModelVersionNotFound(f"Invalid model version: {version!r}")
+    return os.path.join(registry_dir or config.MODEL_REGISTRY_DIR, version)
+
+
+def read_metadata(version: str, registry_dir: str | None = None) -> dict:
+    with open(os.path.join(version_path(version, registry_dir), METADATA_FILENAME)) as f:
+        return json.load(f)
+
+
+def write_metadata(path: str, metadata: dict):
+    with open(os.path.join(path, METADATA_FILENAME), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+
+def list_versions(registry_dir: str | None = None) -> list[dict]:
+    """Returns the metadata of every published version, oldest first."""
+    registry_dir = registry_dir or config.MODEL_REGISTRY_DIR
+    if not os.path.isdir(registry_dir):
+        return []
+
+    versions = []
+    for name in sorted(os.listdir(registry_dir)):
+        if not name.startswith(".") and os.path.isfile(os.path.join(registry_dir, name, METADATA_FILENAME)):
+            versions.append(read_metadata(name, registry_dir))
+    return versions
+
+
+def current_version(registry_dir: str | None = None) -> str | None:
+    """Reads the active version from the CURRENT file, or None when the registry has none."""
+    try:
+        with open(os.path.join(registry_dir or config.MODEL_REGISTRY_DIR, CURRENT_FILENAME)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def set_current(version: str, registry_dir: str | None = None):
+    """Activates a published version by atomically replacing the CURRENT file.
+
+    Raises:
+        ModelVersionNotFound: When the version does not exist in the registry.
+    """
+    registry_dir = registry_dir or config.MODEL_REGISTRY_DIR
+    if not os.path.isfile(os.path.join(version_path(version, registry_dir), METADATA_FILENAME)):
+        raise ModelVersionNotFound(f"Model version {version} not found in {registry_dir}")
+
+    current = os.path.join(registry_dir, CURRENT_FILENAME)
+    with open(f"{current}.tmp", "w") as f:
+        f.write(version + "\n")
+    os.replace(f"{current}.tmp", current)
+
+
+def resolve_model(registry_dir: str | None = None) -> tuple[str, dict | None]:
+    """Returns the model file to serve and its registry metadata.
+
+    Returns:
+        tuple[str, dict | None]: (joblib path of the active version, its metadata), or
+        (LEGACY_MODEL_PATH, None) when no version is active.
+    """
+    version = current_version(registry_dir)
+    if version is None:
+        return LEGACY_MODEL_PATH, None
+    return version_model(version, registry_dir)
+
+
+def version_model(version: str, registry_dir: str | None = None) -> tuple[str, dict]:
+    """Returns the joblib path and metadata of a published version.
+
+    Raises:
+        ModelVersionNotFound: When the version does not exist in the registry.
+    """
+    try:
+        metadata = read_metadata(version, registry_dir)
+    except FileNotFoundError:
+        raise ModelVersionNotFound(f"Model version {version} not found in {registry_dir or config.MODEL_REGISTRY_DIR}")
+    return os.path.join(version_path(version, registry_dir), MODEL_FILENAME), metadata
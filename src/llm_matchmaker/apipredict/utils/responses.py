@@ -0,0 +1,21 @@
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """StreamingResponse whose body is produced while the request body is still being read.
+
+    The default StreamingResponse listens for client disconnects on `receive` in parallel with
+    the body iterator, which competes with `request.stream()` for the incoming body messages.
+    Here only the body iterator reads from `receive`; a disconnect surfaces as a failed send.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,54 @@
+import sys
+import time
+from contextlib import contextmanager
+
+from utils import metrics
+
+# Importado antes de qualquer outro módulo da app em main.py: marca o início das importações
+_IMPORT_START = time.perf_counter()
+
+STARTUP_PHASES = ("imports", "logging", "model_load", "warmup", "executor")
+# Dependências pesadas que a API só importa quando o modo de predição precisa delas
+LAZY_MODULES = ("pandas", "sklearn", "joblib")
+
+STARTUP_PHASE_SECONDS = metrics.register(metrics.Gauge("startup_phase_seconds", "Time spent in each startup phase of this worker", ("phase",)))
+_PHASE_INDEX = {phase: STARTUP_PHASE_SECONDS.add_labels((phase,)) for phase in STARTUP_PHASES}
+
+timings: dict[str, float] = {phase: 0.0 for phase in STARTUP_PHASES}
+ready = False
+
+
+def _record(phase: str, seconds: float):
+    # Acumula: com preload no gunicorn, o carregamento feito no master é herdado pelos workers no fork
+    timings[phase] += seconds
+    STARTUP_PHASE_SECONDS.set(timings[phase], _PHASE_INDEX[phase])
+
+
+def imports_done():
+    """Records the import phase; called at the end of main.py's module body."""
+    if not timings["imports"]:
+        _record("imports", time.perf_counter() - _IMPORT_START)
+
+
+@contextmanager
+def phase(name: str):
+    """Adds the time spent inside the block to the startup phase name."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+def set_ready(value: bool):
+    global ready
+
+    ready = value
+
+
+def summary() -> dict:
+    """Per-phase startup seconds plus the heavy modules that ended up imported, for the ready log."""
+    entry = {f"{name}_seconds": round(seconds, 4) for name, seconds in timings.items()}
+    entry["startup_seconds"] = round(sum(timings.values()), 4)
+    entry["lazy_modules_loaded"] = [module for module in LAZY_MODULES if module in sys.modules]
+    return entry
@@ -0,0 +1,236 @@
+import json
+import re
+import unicodedata
+from functools import lru_cache
+from typing import NamedTuple
+
+from enums.params import TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, DeterminismNeeded, TemperaturePreference, OutputStyle
+from schemas.scenario import Scenario
+from utils import config
+from utils.features import feature_codes
+
+# Sinônimos (PT e EN, já sem acentos) de cada valor de cada campo do Scenario. Uma entrada pode ser
+# (frase, peso): peso menor para termos genéricos, que só decidem quando nada mais específico aparece.
+SYNONYMS = {
+    "task_type": {
+        TaskType.SUMMARIZATION: ["resumo", "resumir", "resuma", "sumarizar", "sumarizacao", "sumario", "sintetizar", "sintese",
+                                 "summary", "summarize", "summarise", "summarization", "tldr", "digest"],
+        TaskType.CLASSIFICATION: ["classificar", "classificacao", "classifique", "categorizar", "categorizacao", "rotular", "triagem",
+                                  "analise de sentimento", "classify", "classification", "categorize", "categorization", "label", "labeling",
+                                  "sentiment analysis", "triage"],
+        TaskType.EXTRACTION: ["extrair", "extracao", "extraia", "entidade", "campos de", "extract", "extraction", "entity", "named entity",
+                              "ner", "parse", "parsing", "ocr"],
+        TaskType.REASONING: ["raciocinio", "raciocinar", "logica", "matematica", "resolver problema", "deducao", "planejamento",
+                             "reasoning", "reason", "logic", "math", "solve problem", "problem solving", "planning", "step by step",
+                             ("analise", 0.5), ("analisar", 0.5), ("analysis", 0.5), ("analyze", 0.5)],
+        TaskType.GENERATION: ["gerar texto", "geracao de texto", "redigir", "redacao", "criar conteudo", "chatbot", "assistente virtual",
+                              "text generation", "generate text", "write", "draft", "content creation", "copywriting",
+                              ("gerar", 0.5), ("escrever", 0.5), ("criar", 0.5), ("generate", 0.5), ("chat", 0.5)],
+    },
+    "domain": {
+        Domain.LEGAL: ["juridico", "juridica", "direito", "lei", "contrato", "advocacia", "advogado", "tribunal", "processo judicial",
+                       "legal", "law", "lawyer", "contract", "court", "lawsuit", "compliance"],
+        Domain.MEDICAL: ["medico", "medica", "medicina", "saude", "clinico", "clinica", "hospital", "paciente", "diagnostico", "prontuario",
+                         "medical", "medicine", "health", "healthcare", "clinical", "patient", "diagnosis"],
+        Domain.FINANCE: ["financeiro", "financeira", "financa", "banco", "bancario", "investimento", "contabil", "contabilidade", "fiscal",
+                         "finance", "financial", "bank", "banking", "investment", "accounting", "trading"],
+        Domain.ECOMMERCE: ["ecommerce", "e commerce", "loja", "loja virtual", "varejo", "marketplace", "produto", "carrinho",
+                           "online store", "store", "retail", "product", "shopping", ("review", 0.5), ("avaliacao de cliente", 0.5)],
+        Domain.TECHNICAL: ["tecnico", "tecnica", "codigo", "programacao", "software", "engenharia", "devops", "documentacao tecnica",
+                           "technical", "code", "coding", "programming", "engineering"],
+        Domain.GENERAL: ["geral", "generico", "general", "generic", "general purpose", "uso geral"],
+    },
+    "input_language": {
+        InputLanguage.PORTUGUESE: ["portugues", "pt br", "ptbr", "brasileiro", "portuguese", "brazilian"],
+        InputLanguage.ENGLISH: ["ingles", "english", "en us"],
+        InputLanguage.MULTI: ["multilingue", "multilinguagem", "varios idiomas", "varias linguas", "diversos idiomas", "multiplos idiomas",
+                              "multilingual", "multiple languages", "many languages", "several languages"],
+    },
+    "privacy_requirement": {
+        PrivacyRequirement.LOCAL: ["local", "localmente", "locally", "run locally", "no dispositivo", "on device", "offline",
+                                   "on prem", "on premise", "on premises", "dado sensivel", "dados sensiveis",
+                                   "privado", "privacidade", "lgpd", "sem nuvem", "nao pode sair", "private", "privacy", "sensitive data",
+                                   "no cloud", "air gapped", "self hosted", "gdpr", "hipaa"],
+        PrivacyRequirement.HYBRID: ["hibrido", "hibrida", "hybrid"],
+        PrivacyRequirement.CLOUD: ["nuvem", "cloud", "saas", "api externa", "external api", "hosted"],
+    },
+    "hardware_available": {
+        HardwareAvailable.EDGE: ["edge", "celular", "smartphone", "mobile", "embarcado", "raspberry", "iot", "dispositivo", "device",
+                                 "embedded", ("leve", 0.5), ("lightweight", 0.5)],
+        HardwareAvailable.CPU: ["cpu", "sem gpu", "so cpu", "apenas cpu", "notebook", "laptop", "servidor comum", "no gpu", "cpu only"],
+        HardwareAvailable.PRO_GPU: ["a100", "h100", "gpu profissional", "gpus profissionais", "datacenter", "data center", "cluster",
+                                    "multi gpu", "professional gpu", "server gpu"],
+        HardwareAvailable.CONSUMER_GPU: ["gpu", "placa de video", "rtx", "geforce", "consumer gpu", "gaming gpu", "gpu domestica"],
+    },
+    "hallucination_tolerance": {
+        HallucinationTolerance.LOW: ["baixa alucinacao", "baixa taxa de alucinacao", "pouca alucinacao", "sem alucinacao", "nao pode alucinar",
+                                     "baixa tolerancia a alucinacao", "zero alucinacao", "alta confiabilidade", "low hallucination",
+                                     "no hallucination", "minimal hallucination", "must not hallucinate", "low hallucination tolerance",
+                                     "zero hallucination", "highly reliable"],
+        HallucinationTolerance.MEDIUM: ["alguma alucinacao", "alucinacao moderada", "media tolerancia a alucinacao", "moderate hallucination",
+                                        "some hallucination", "medium hallucination"],
+        HallucinationTolerance.HIGH: ["alta tolerancia a alucinacao", "tolera alucinacao", "alucinacao nao e problema", "alucinacao aceitavel",
+                                      "high hallucination tolerance", "hallucination is fine", "hallucination is ok", "tolerate hallucination"],
+    },
+    "determinism_needed": {
+        DeterminismNeeded.HIGH: ["deterministico", "deterministica", "determinismo", "alto determinismo", "alta determinismo", "reprodutivel",
+                                 "mesma resposta", "sempre igual", "deterministic", "determinism", "reproducible", "consistent output",
+                                 "same answer"],
+        DeterminismNeeded.LOW: ["nao deterministico", "sem determinismo", "baixo determinismo", "respostas variadas", "variedade",
+                                "non deterministic", "nondeterministic", "no determinism", "varied output", "diverse answers"],
+    },
+    "temperature_preference": {
+        TemperaturePreference.LOW: ["temperatura baixa", "baixa temperatura", "temperature low", "low temperature", "temperatura 0",
+                                    "temperature 0"],
+        TemperaturePreference.MEDIUM: ["temperatura media", "temperatura moderada", "medium temperature", "moderate temperature"],
+        TemperaturePreference.HIGH: ["temperatura alta", "alta temperatura", "high temperature", ("criativo", 0.5), ("criativa", 0.5),
+                                     ("creative", 0.5)],
+    },
+    "output_style": {
+        OutputStyle.CREATIVE: ["criativo", "criativa", "criatividade", "poema", "historia", "storytelling", "creative", "poem", "story",
+                               "fiction", "ficcao"],
+        OutputStyle.FORMAL: ["formal", "profissional", "corporativo", "professional", "corporate", "business tone"],
+        OutputStyle.FACTUAL: ["factual", "fato", "fatos", "baseado em fonte", "fact", "facts", "fact based", "grounded"],
+        OutputStyle.PRECISE: ["precisao", "com precisao", "exato", "exata", "exatidao", "precise", "precision", "exact", "accurate"],
+    },
+}
+
+# Valores usados quando o texto não menciona o campo; o idioma cai no idioma detectado do próprio texto
+DEFAULTS = {
+    "task_type": TaskType.GENERATION,
+    "domain": Domain.GENERAL,
+    "privacy_requirement": PrivacyRequirement.CLOUD,
+    "hardware_available": HardwareAvailable.CONSUMER_GPU,
+    "hallucination_tolerance": HallucinationTolerance.MEDIUM,
+    "determinism_needed": DeterminismNeeded.LOW,
+    "temperature_preference": TemperaturePreference.MEDIUM,
+    "output_style": OutputStyle.FORMAL,
+}
+
+_PT_STOPWORDS = frozenset("de em com para um uma que nao os as do da dos das no na nos nas por preciso quero ao mais modelo rodar".split())
+_EN_STOPWORDS = frozenset("the with for and an of to in on need want that is my model run from".split())
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def _stem(token: str) -> str:
+    # Plural simples (PT e EN): "resumos" e "resumo" viram o mesmo token
+    return token[:-1] if len(token) > 3 and token.endswith("s") else token
+
+
+def normalize(text: str) -> tuple[str, ...]:
+    """Lowercases, strips accents and punctuation and stems plurals; returns the tokens."""
+    text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode()
+    return tuple(_stem(token) for token in _NON_WORD.split(text) if token)
+
+
+class _PhraseAutomaton:
+    """Aho-Corasick automaton over tokens: finds every synonym phrase in one pass over the text."""
+
+    def __init__(self, phrases: list[tuple[tuple[str, ...], tuple]]):
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[list[tuple]] = [[]]
+        for tokens, payload in phrases:
+            state = 0
+            for token in tokens:
+                if token not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][token] = len(self.goto) - 1
+                state = self.goto[state][token]
+            self.out[state].append(payload)
+
+        # Links de falha em largura: cada estado herda as saídas do maior sufixo que também é prefixo de uma frase
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for token, child in self.goto[state].items():
+                queue.append(child)
+                if state:
+                    fallback = self.fail[state]
+                    while fallback and token not in self.goto[fallback]:
+                        fallback = self.fail[fallback]
+                    self.fail[child] = self.goto[fallback].get(token, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def find(self, tokens: tuple[str, ...]):
+        """Yields (end position, payload) for every phrase occurrence."""
+        state = 0
+        for position, token in enumerate(tokens):
+            while state and token not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(token, 0)
+            for payload in self.out[state]:
+                yield position, payload
+
+
+def _build_automaton() -> _PhraseAutomaton:
+    phrases = []
+    for field, values in SYNONYMS.items():
+        for value, synonyms in values.items():
+            for synonym in synonyms:
+                phrase, weight = synonym if isinstance(synonym, tuple) else (synonym, 1.0)
+                tokens = normalize(phrase)
+                phrases.append((tokens, (field, value, weight, len(tokens))))
+    return _PhraseAutomaton(phrases)
+
+
+_AUTOMATON = _build_automaton()
+
+
+class ParsedText(NamedTuple):
+    scenario: Scenario
+    # Campos não encontrados no texto e preenchidos com DEFAULTS (ou com o idioma detectado)
+    defaults: tuple[str, ...]
+    codes: tuple[int, ...]
+    # Fragmento JSON com scenario e defaults, serializado uma vez e reaproveitado nas respostas em lote
+    json: str
+
+
+def _detect_language(tokens: tuple[str, ...]) -> InputLanguage:
+    pt = sum(token in _PT_STOPWORDS for token in tokens)
+    en = sum(token in _EN_STOPWORDS for token in tokens)
+    return InputLanguage.ENGLISH if en > pt else InputLanguage.PORTUGUESE
+
+
+@lru_cache(maxsize=config.TEXT_PARSER_CACHE_SIZE)
+def _parse_tokens(tokens: tuple[str, ...]) -> ParsedText:
+    # Por campo vence a frase de maior peso, depois a mais longa, depois a primeira no texto
+    best: dict[str, tuple] = {}
+    for position, (field, value, weight, length) in _AUTOMATON.find(tokens):
+        key = (weight, length, -position)
+        if field not in best or key > best[field][0]:
+            best[field] = (key, value)
+
+    values = {field: value for field, (_, value) in best.items()}
+    defaults = tuple(field for field in Scenario.model_fields if field not in values)
+    for field in defaults:
+        values[field] = _detect_language(tokens) if field == "input_language" else DEFAULTS[field]
+
+    scenario = Scenario(**values)
+    codes = feature_codes(scenario.task_type, scenario.domain, scenario.input_language, scenario.privacy_requirement, scenario.hardware_available, scenario.hallucination_tolerance, scenario.temperature_preference, scenario.output_style)
+    fragment = f'"scenario": {scenario.model_dump_json()}, "defaults": {json.dumps(list(defaults))}'
+    return ParsedText(scenario, defaults, codes, fragment)
+
+
+def parse_text(text: str) -> ParsedText:
+    """Maps Portuguese or English free text to a prediction scenario.
+
+    Deterministic and local: one pass of a precompiled phrase automaton over the normalized
+    tokens. Results are cached per normalized text (TEXT_PARSER_CACHE_SIZE entries, LRU), so
+    texts differing only in case, accents or punctuation share an entry.
+
+    Returns:
+        ParsedText: scenario, fields filled with defaults, enum ordinals and the serialized JSON fragment.
+    """
+    return _parse_tokens(normalize(text))
+
+
+def parse_texts(texts: list[str]) -> list[ParsedText]:
+    """Parses many texts; repeated texts are resolved once through the cache."""
+    return [parse_text(text) for text in texts]
+
+
+def cache_info():
+    return _parse_tokens.cache_info()
@@ -1,10 +1,14 @@
 # %%
-import pandas as pd
+import sys
+
+sys.path.append("src/data_gen")
+from dataset import read_dataset
 
 # %%
-df = pd.read_csv("data/llm_matchmaker_dataset_1000.csv")
+# Sem as colunas score_*, que read_dataset só carrega quando pedidas
+df = read_dataset("data/llm_matchmaker_dataset_1000.csv")
 
-cols_analyse = [col for col in df.columns if not col.startswith("score_")]
+cols_analyse = list(df.columns)
 print(cols_analyse)
 for col in cols_analyse:
     print(f"{col}: {df[col].nunique()} unique values \n {df[col].value_counts()}\n")
\ No newline at end of file
@@ -0,0 +1,377 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+
+import httpx
+
+import config
+from enums.params import TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, TemperaturePreference, OutputStyle
+from logs import LOGGER_NAME
+
+ENDPOINT = "/predict-match"
+READY_ENDPOINT = "/readyz"
+SCENARIOS_ENDPOINT = "/predict-match/scenarios"
+
+# Status em que vale tentar de novo: sobrecarga (429/503 com Retry-After) e falhas transitórias do servidor
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+logger = logging.getLogger(LOGGER_NAME)
+
+# (coluna do modelo, enum, parâmetro da API) na ordem da grade de features usada pela tabela de respostas
+MODEL_FEATURES = (
+    ("task_type", TaskType, "task_type"),
+    ("domain", Domain, "domain"),
+    ("input_language", InputLanguage, "input_language"),
+    ("privacy_requirement", PrivacyRequirement, "privacy_requirement"),
+    ("hardware_available", HardwareAvailable, "hardware_available"),
+    ("hallucination_tolerance", HallucinationTolerance, "hallucination_tolerance"),
+    ("temperature_pref", TemperaturePreference, "temperature_preference"),
+    ("output_style", OutputStyle, "output_style"),
+)
+
+
+class BackendError(Exception):
+    """Raised when a backend cannot produce a recommendation; its message is returned to the AI."""
+
+
+class HttpBackend:
+    """Calls the LLM Matchmaker API through one shared, keep-alive connection pool.
+
+    Transient failures (connection errors, timeouts, 429 and 5xx) are retried with
+    exponential backoff and full jitter, honouring the API's Retry-After header.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        # Atualizado a cada resposta a partir do header X-Model-Version da API e pelas consultas ao /readyz
+        self.model_version: str | None = None
+        self._checked_at = float("-inf")
+        self._check: asyncio.Task | None = None
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(config.READ_TIMEOUT, connect=config.CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=config.MAX_CONNECTIONS, max_keepalive_connections=config.MAX_KEEPALIVE_CONNECTIONS),
+        )
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: str | None) -> float:
+        delay = random.uniform(0, min(config.RETRY_BACKOFF_MAX, config.RETRY_BACKOFF * 2 ** attempt))
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), config.RETRY_BACKOFF_MAX))
+        return delay
+
+    async def _request(self, method: str, path: str, **kwargs) -> dict:
+        for attempt in range(config.MAX_RETRIES + 1):
+            retry_after = None
+            try:
+                response = await self.client.request(method, path, **kwargs)
+            except httpx.TimeoutException as timeout_err:
+                error_msg = f"Timeout Error: {self.base_url} did not answer in time. {timeout_err!r}"
+            except httpx.TransportError as conn_err:
+                error_msg = f"Connection Error: Could not connect to {self.base_url}. {conn_err}"
+            else:
+                if not response.is_error:
+                    self.model_version = response.headers.get("X-Model-Version")
+                    return response.json()
+                error_msg = f"HTTP Error: Status: {response.status_code}. Details: {response.text}"
+                if response.status_code not in RETRY_STATUS:
+                    raise BackendError(error_msg)
+                retry_after = response.headers.get("Retry-After")
+
+            if attempt < config.MAX_RETRIES:
+                logger.warning("Attempt %d failed, retrying: %s", attempt + 1, error_msg)
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        raise BackendError(error_msg)
+
+    async def _check_version(self):
+        # Uma tentativa só, com timeout curto: se a API não responder, vale a última versão conhecida
+        try:
+            response = await self.client.get(READY_ENDPOINT, timeout=config.CONNECT_TIMEOUT)
+        except httpx.HTTPError as err:
+            logger.debug("Model version check failed: %r", err)
+            return
+        if response.status_code == 200:
+            self.model_version = response.json().get("model_version", self.model_version)
+
+    async def current_version(self) -> str | None:
+        """Model version the API is serving now, or None while it is unknown.
+
+        Cache hits never reach the API, so its X-Model-Version alone would only show a
+        model swap on the next miss. At most every VERSION_CHECK_INTERVAL seconds the
+        version is read from GET /readyz instead; lookups arriving during that request
+        wait for the same one.
+        """
+        now = time.monotonic()
+        if self._check is None and now - self._checked_at >= config.VERSION_CHECK_INTERVAL:
+            self._checked_at = now
+            self._check = asyncio.ensure_future(self._check_version())
+            self._check.add_done_callback(self._forget_check)
+        if self._check is not None:
+            await asyncio.shield(self._check)
+        return self.model_version
+
+    def _forget_check(self, task: asyncio.Task):
+        self._check = None
+        if not task.cancelled():
+            task.exception()
+
+    async def predict(self, query_params: dict) -> dict:
+        """Requests one recommendation from GET /predict-match.
+
+        Args:
+            query_params (dict): API query parameters (enum values).
+
+        Returns:
+            dict: The API's JSON response, e.g. {"prediction": "Gemini"}
+
+        Raises:
+            BackendError: When the API answers with an error or cannot be reached after all retries.
+        """
+        return await self._request("GET", ENDPOINT, params=query_params)
+
+    async def predict_many(self, scenarios: list[dict]) -> dict:
+        """Requests several recommendations in one call to POST /predict-match/scenarios.
+
+        Args:
+            scenarios (list[dict]): One dict of query parameters per scenario, as passed to predict.
+
+        Returns:
+            dict: {"model_version", "unique_scenarios", "results"}, with one {"index", "prediction", "ranking"?}
+            or {"index", "error"} per scenario, in the given order.
+
+        Raises:
+            BackendError: When the API answers with an error or cannot be reached after all retries.
+        """
+        return await self._request("POST", SCENARIOS_ENDPOINT, json=scenarios)
+
+    async def aclose(self):
+        if self._check is not None:
+            self._check.cancel()
+        await self.client.aclose()
+
+
+# Mesmo layout do registro da API (utils/registry.py)
+REGISTRY_MODEL_FILENAME = "best_llm_matchmaker_model.joblib"
+REGISTRY_METADATA_FILENAME = "metadata.json"
+REGISTRY_CURRENT_FILENAME = "CURRENT"
+
+
+def current_version(registry_dir: str) -> str | None:
+    """Reads the active version from the registry's CURRENT file, or None when the registry has none."""
+    try:
+        with open(os.path.join(registry_dir, REGISTRY_CURRENT_FILENAME)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_model(registry_dir: str, legacy_path: str) -> tuple[str, str | None]:
+    """Returns the model file to serve and its registry version, like the API's utils.registry.resolve_model.
+
+    Returns:
+        tuple[str, str | None]: (joblib path of the active version, version name), or
+        (legacy_path, None) when the registry has no active version.
+
+    Raises:
+        BackendError: When CURRENT names a version that is not published.
+    """
+    version = current_version(registry_dir)
+    if version is None:
+        return legacy_path, None
+    folder = os.path.join(registry_dir, version)
+    if version.startswith(".") or os.path.basename(version) != version or not os.path.isfile(os.path.join(folder, REGISTRY_METADATA_FILENAME)):
+        raise BackendError(f"Model version {version} not found in {registry_dir}")
+    with open(os.path.join(folder, REGISTRY_METADATA_FILENAME)) as f:
+        metadata = json.load(f)
+    return os.path.join(folder, REGISTRY_MODEL_FILENAME), metadata["version"]
+
+
+class AnswerTable:
+    """Precomputed answer (and probability) table of one model artifact, memory-mapped read-only.
+
+    Args:
+        model_path (str): Path of the joblib model artifact; the table files sit next to it.
+        version (str | None): Registry version of the model; defaults to the artifact hash prefix, as in the API.
+
+    Raises:
+        BackendError: When the table is missing, out of date or built for another feature schema.
+    """
+
+    def __init__(self, model_path: str, version: str | None = None):
+        import numpy as np
+
+        base, _ = os.path.splitext(model_path)
+        try:
+            with open(f"{base}.table.json") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise BackendError(f"No answer table at {base}.table.json")
+
+        schema = {column: [member.value for member in enum] for column, enum, _ in MODEL_FEATURES}
+        if meta.get("features") != schema:
+            raise BackendError(f"Answer table at {base}.table.npy was built for a different feature schema")
+        if os.path.exists(model_path) and meta.get("model_sha256") != _file_sha256(model_path):
+            raise BackendError(f"Answer table at {base}.table.npy is out of date with {model_path}")
+
+        self.model_path = model_path
+        self.model_version = version or meta["model_sha256"][:12]
+        self.classes = meta["classes"]
+        self.table = np.load(f"{base}.table.npy", mmap_mode="r")
+        # Probabilidades por combinação, usadas pelo ranking (top_k/exclude); ausentes em tabelas antigas
+        self.proba = np.load(f"{base}.proba.npy", mmap_mode="r") if meta.get("proba") else None
+        self._ordinals = tuple((param, {member.value: i for i, member in enumerate(enum)}) for _, enum, param in MODEL_FEATURES)
+        sizes = [len(enum) for _, enum, _ in MODEL_FEATURES]
+        self._strides = tuple(int(np.prod(sizes[i + 1:])) for i in range(len(sizes)))
+
+    def lookup(self, query_params: dict) -> dict:
+        """Answers one scenario; same contract as HttpBackend.predict."""
+        import numpy as np
+
+        try:
+            index = sum(ordinals[query_params[param]] * stride for (param, ordinals), stride in zip(self._ordinals, self._strides))
+        except KeyError as key_err:
+            raise BackendError(f"Invalid parameter value: {key_err}")
+
+        predicted = int(self.table[index])
+        top_k, exclude = query_params.get("top_k"), set(query_params.get("exclude", ()))
+        if top_k is None and not exclude:
+            return {"prediction": self.classes[predicted], "model_version": self.model_version}
+        if self.proba is None:
+            raise BackendError(f"Answer table at {self.model_path} has no probabilities; rebuild it to use top_k/exclude")
+
+        # Mesma ordenação da API: probabilidade decrescente, empate a favor da classe prevista
+        proba = self.proba[index]
+        ranked = [self.classes[code] for code in np.lexsort((np.arange(len(proba)) != predicted, -proba))]
+        ranking = [{"llm": llm, "score": float(proba[self.classes.index(llm)])} for llm in ranked if llm not in exclude]
+        if not ranking:
+            raise BackendError("HTTP Error: Status: 422. Details: exclude removes every LLM")
+        result = {"prediction": ranking[0]["llm"], "model_version": self.model_version}
+        if top_k is not None:
+            result["ranking"] = ranking[:top_k]
+        return result
+
+
+class LocalBackend:
+    """Answers in-process from the precomputed answer table of the registry's active model version.
+
+    Only needs NumPy: the table holds the model's prediction for every feature
+    combination, so a recommendation is a single memory-mapped array lookup. The
+    active version is resolved like the API does (registry CURRENT, else the legacy
+    artifact) and CURRENT is re-read at most every watch_interval seconds; a new
+    version's table is loaded in a worker thread and swapped in, while a version that
+    fails to load is logged and the previous table keeps answering.
+    """
+
+    def __init__(self, registry_dir: str, legacy_path: str, watch_interval: float):
+        self.registry_dir = registry_dir
+        self.legacy_path = legacy_path
+        self.watch_interval = watch_interval
+        # Conteúdo do CURRENT já tratado (carregado ou recusado) e instante da última leitura
+        self._current = current_version(registry_dir)
+        self._checked_at = time.monotonic()
+        self._reload: asyncio.Task | None = None
+        self.answers = AnswerTable(*resolve_model(registry_dir, legacy_path))
+
+    @property
+    def model_version(self) -> str:
+        return self.answers.model_version
+
+    @property
+    def model_path(self) -> str:
+        return self.answers.model_path
+
+    async def _load(self, version: str | None):
+        try:
+            answers = await asyncio.to_thread(lambda: AnswerTable(*resolve_model(self.registry_dir, self.legacy_path)))
+        except (BackendError, OSError, ValueError) as err:
+            logger.error("Could not load model version %s, still serving %s: %s", version, self.model_version, err)
+            return
+        logger.info("Model swapped: %s -> %s", self.model_version, answers.model_version)
+        self.answers = answers
+
+    async def refresh(self):
+        """Swaps in the registry's active version if CURRENT changed since the last check."""
+        now = time.monotonic()
+        if now - self._checked_at < self.watch_interval:
+            return
+        self._checked_at = now
+        version = current_version(self.registry_dir)
+        # Uma carga por vez; durante a troca segue respondendo pela tabela anterior e o CURRENT é relido no próximo intervalo
+        if version == self._current or (self._reload is not None and not self._reload.done()):
+            return
+        self._current = version
+        self._reload = asyncio.ensure_future(self._load(version))
+        await asyncio.shield(self._reload)
+
+    async def current_version(self) -> str:
+        """Model version answering now, after following a CURRENT change."""
+        await self.refresh()
+        return self.model_version
+
+    async def predict(self, query_params: dict) -> dict:
+        """Looks up one recommendation; same contract as HttpBackend.predict."""
+        await self.refresh()
+        return self.answers.lookup(query_params)
+
+    async def predict_many(self, scenarios: list[dict]) -> dict:
+        """Looks up several recommendations; same contract as HttpBackend.predict_many."""
+        await self.refresh()
+        # Todos os cenários da chamada respondidos pela mesma versão; repetidos são consultados uma vez, como na API
+        answers = self.answers
+        entries: dict[tuple, dict] = {}
+        results = []
+        for index, query_params in enumerate(scenarios):
+            key = tuple((name, tuple(value) if isinstance(value, list) else value) for name, value in query_params.items())
+            entry = entries.get(key)
+            if entry is None:
+                try:
+                    result = answers.lookup(query_params)
+                except BackendError as err:
+                    entry = {"error": str(err)}
+                else:
+                    entry = {name: value for name, value in result.items() if name != "model_version"}
+                entries[key] = entry
+            results.append({"index": index, **entry})
+        return {"model_version": answers.model_version, "unique_scenarios": len(entries), "results": results}
+
+    async def aclose(self):
+        if self._reload is not None:
+            self._reload.cancel()
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+_backend: HttpBackend | LocalBackend | None = None
+
+
+def get_backend() -> HttpBackend | LocalBackend:
+    """Returns the process-wide backend, creating it on first use from config.BACKEND."""
+    global _backend
+
+    if _backend is None:
+        if config.BACKEND == "local":
+            _backend = LocalBackend(config.MODEL_REGISTRY_DIR, config.MODEL_PATH, config.MODEL_WATCH_INTERVAL)
+        elif config.BACKEND == "http":
+            _backend = HttpBackend(config.BASE_URL)
+        else:
+            raise BackendError(f"Unknown MATCHMAKER_BACKEND: {config.BACKEND}")
+    return _backend
+
+
+async def close_backend():
+    global _backend
+
+    if _backend is not None:
+        await _backend.aclose()
+        _backend = None
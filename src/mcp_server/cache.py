@@ -0,0 +1,80 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class ResultCache:
+    """Bounded in-memory cache with LRU eviction, per-entry TTL and model-version invalidation.
+
+    All entries belong to the backend model version that produced them; looking up or
+    storing under a different version drops every entry first, so a model swap is
+    visible on the next call instead of after the TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.model_version: str | None = None
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, model_version: str | None):
+        if model_version != self.model_version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self.model_version = model_version
+
+    def get(self, key: Hashable, model_version: str | None = None) -> Any | None:
+        """Returns the cached value for key, or None on a miss or expired entry.
+
+        A model_version other than the cached one (None = not known yet) invalidates everything first.
+        """
+        if model_version is not None:
+            self._check_version(model_version)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any, model_version: str | None):
+        """Stores value for key; a new model_version invalidates everything cached so far."""
+        if self.maxsize <= 0:
+            return
+        self._check_version(model_version)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "model_version": self.model_version,
+        }
@@ -0,0 +1,56 @@
+import os
+
+# Backend usado pelas tools:
+#   "http"  -> chama a LLM Matchmaker API em MATCHMAKER_API_URL
+#   "local" -> consulta em processo a tabela de respostas gerada no treino, sem HTTP
+BACKEND = os.getenv("MATCHMAKER_BACKEND", "http")
+
+BASE_URL = os.getenv("MATCHMAKER_API_URL", "http://localhost:8080")
+
+# Transporte MCP:
+#   "stdio"           -> um processo por cliente, iniciado pelo próprio agente (ex.: Claude Desktop)
+#   "streamable-http" -> um processo de longa duração atendendo várias sessões em HOST:PORT/mcp
+#   "sse"             -> idem, pelo transporte SSE legado em HOST:PORT/sse
+TRANSPORT = os.getenv("MATCHMAKER_TRANSPORT", "stdio")
+HOST = os.getenv("MATCHMAKER_HOST", "127.0.0.1")
+PORT = int(os.getenv("MATCHMAKER_PORT", "8000"))
+
+# Chamadas de tool executando ao mesmo tempo em uma mesma sessão; as demais aguardam a vez
+SESSION_MAX_CONCURRENCY = int(os.getenv("MATCHMAKER_SESSION_MAX_CONCURRENCY", "4"))
+
+# Logs (sempre em stderr, escritos por uma thread em segundo plano)
+LOG_LEVEL = os.getenv("MATCHMAKER_LOG_LEVEL", "INFO").upper()
+# Registros aguardando escrita; acima disso novos registros são descartados
+LOG_QUEUE_SIZE = int(os.getenv("MATCHMAKER_LOG_QUEUE_SIZE", "10000"))
+
+# Timeouts (segundos) do cliente HTTP compartilhado
+CONNECT_TIMEOUT = float(os.getenv("MATCHMAKER_CONNECT_TIMEOUT", "2"))
+READ_TIMEOUT = float(os.getenv("MATCHMAKER_READ_TIMEOUT", "10"))
+
+# Pool de conexões keep-alive
+MAX_CONNECTIONS = int(os.getenv("MATCHMAKER_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("MATCHMAKER_MAX_KEEPALIVE_CONNECTIONS", "10"))
+
+# Novas tentativas em falhas de conexão, timeouts, 429 e 5xx, com backoff exponencial e jitter
+MAX_RETRIES = int(os.getenv("MATCHMAKER_MAX_RETRIES", "3"))
+RETRY_BACKOFF = float(os.getenv("MATCHMAKER_RETRY_BACKOFF", "0.2"))
+RETRY_BACKOFF_MAX = float(os.getenv("MATCHMAKER_RETRY_BACKOFF_MAX", "5"))
+
+# Registro de versões publicado pelo treino; o backend "local" serve a versão indicada no arquivo CURRENT, como a API
+MODEL_REGISTRY_DIR = os.getenv(
+    "MATCHMAKER_MODEL_REGISTRY_DIR",
+    os.path.join(os.path.dirname(__file__), "..", "llm_matchmaker", "apipredict", "models", "registry"),
+)
+# Artefato servido pelo backend "local" quando o registro não tem versão ativa (arquivo .joblib; a tabela .table.npy/.table.json fica ao lado)
+MODEL_PATH = os.getenv(
+    "MATCHMAKER_MODEL_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "llm_matchmaker", "apipredict", "models", "best_llm_matchmaker_model.joblib"),
+)
+# Intervalo, em segundos, entre as leituras do CURRENT; quando a versão muda, a nova tabela é carregada sem reiniciar
+MODEL_WATCH_INTERVAL = float(os.getenv("MATCHMAKER_MODEL_WATCH_INTERVAL", "10"))
+
+# Cache em memória dos resultados das tools (0 desativa) e validade, em segundos, de cada entrada
+CACHE_SIZE = int(os.getenv("MATCHMAKER_CACHE_SIZE", "10000"))
+CACHE_TTL = float(os.getenv("MATCHMAKER_CACHE_TTL", "300"))
+# Intervalo, em segundos, entre as consultas ao GET /readyz da API que conferem a versão do modelo antes de confiar no cache
+VERSION_CHECK_INTERVAL = float(os.getenv("MATCHMAKER_VERSION_CHECK_INTERVAL", "5"))
@@ -0,0 +1,60 @@
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+import config
+
+LOGGER_NAME = "matchmaker"
+
+_listener: QueueListener | None = None
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging() -> logging.Logger:
+    """Configures the server's logger once; later calls only return it.
+
+    Records go to a bounded queue and are written to stderr by a background thread, so tool
+    handlers never wait on log I/O. stdout is never used: with the stdio transport it carries
+    the MCP protocol messages.
+    """
+    global _listener
+
+    logger = logging.getLogger(LOGGER_NAME)
+    if _listener is not None:
+        return logger
+
+    log_queue: queue.Queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [MCP Server] %(message)s"))
+    _listener = QueueListener(log_queue, stream, respect_handler_level=False)
+    _listener.start()
+
+    logger.addHandler(_NonBlockingQueueHandler(log_queue))
+    logger.setLevel(config.LOG_LEVEL)
+    # Não repassa ao root, que o FastMCP configura com um handler síncrono
+    logger.propagate = False
+    return logger
+
+
+def stop_logging():
+    """Flushes the pending records; called when the server shuts down."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        logging.getLogger(LOGGER_NAME).handlers.clear()
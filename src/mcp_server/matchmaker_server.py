@@ -1,15 +1,120 @@
-from typing import Any
-import requests
-from mcp.server.fastmcp import FastMCP
+import asyncio
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
+from weakref import WeakKeyDictionary
+import anyio
+from mcp.server.fastmcp import Context, FastMCP
 from enums.params import TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, DeterminismNeeded, TemperaturePreference, OutputStyle
-import logging
+from results.match_result import LLMs
+from schemas.scenario import ScenarioRequest
+from backends import BackendError, ENDPOINT, get_backend, close_backend
+from cache import ResultCache
+from logs import configure_logging, stop_logging
+import config
 
-BASE_URL = "http://localhost:8080"
+logger = configure_logging()
 
-mcp = FastMCP("LLM_Matchmaker_Agent")
+# Resultados compartilhados entre chamadas e sessões, chaveados pelos nove parâmetros da tool
+result_cache = ResultCache(maxsize=config.CACHE_SIZE, ttl=config.CACHE_TTL)
+
+# Chamadas ao backend em andamento por chave: sessões pedindo o mesmo cenário esperam a mesma resposta
+_inflight: dict[tuple, asyncio.Task] = {}
+
+# Semáforo de cada sessão MCP, descartado junto com a sessão
+_session_slots: WeakKeyDictionary = WeakKeyDictionary()
+
+mcp = FastMCP("LLM_Matchmaker_Agent", host=config.HOST, port=config.PORT, log_level=config.LOG_LEVEL)
+
+@asynccontextmanager
+async def shared_resources():
+    """Backend and logging of the whole process, shared by every session.
+
+    Not a FastMCP lifespan: that one is entered once per session, and closing the
+    backend there would cut off the other sessions of an HTTP server.
+    """
+    # Cria o backend (pool de conexões ou tabela em memory-map) antes da primeira sessão
+    try:
+        get_backend()
+    except BackendError as err:
+        logger.error("Backend unavailable: %s", err)
+    try:
+        yield
+    finally:
+        # Fecha o pool de conexões compartilhado ao encerrar o servidor
+        await close_backend()
+        stop_logging()
+
+async def serve(transport: str):
+    runners = {"stdio": mcp.run_stdio_async, "streamable-http": mcp.run_streamable_http_async, "sse": mcp.run_sse_async}
+    if transport not in runners:
+        raise ValueError(f"Unknown MATCHMAKER_TRANSPORT: {transport}")
+    async with shared_resources():
+        await runners[transport]()
+
+def _session_slot(ctx: Context) -> AbstractAsyncContextManager:
+    """Limits the concurrent tool calls of one session to SESSION_MAX_CONCURRENCY."""
+    try:
+        session = ctx.session
+    except ValueError:
+        # Tool chamada fora de uma sessão MCP (ex.: FastMCP.call_tool em processo no benchmark)
+        return nullcontext()
+    slot = _session_slots.get(session)
+    if slot is None:
+        slot = _session_slots[session] = asyncio.Semaphore(config.SESSION_MAX_CONCURRENCY)
+    return slot
+
+async def _call_backend(cache_key: tuple, query_params: dict) -> dict:
+    backend = get_backend()
+    result = await backend.predict(query_params)
+    result_cache.put(cache_key, dict(result), backend.model_version)
+    return result
+
+def _forget(cache_key: tuple, task: asyncio.Task):
+    del _inflight[cache_key]
+    if not task.cancelled():
+        # Marca a exceção como consumida mesmo que nenhuma sessão tenha ficado esperando
+        task.exception()
+
+def _predict(cache_key: tuple, query_params: dict) -> asyncio.Future:
+    """Calls the backend once per key, however many sessions ask for it at the same time.
+
+    The call runs in its own task, so a session that gives up does not cancel it for the others.
+    """
+    task = _inflight.get(cache_key)
+    if task is None:
+        task = _inflight[cache_key] = asyncio.ensure_future(_call_backend(cache_key, query_params))
+        task.add_done_callback(lambda done: _forget(cache_key, done))
+    return asyncio.shield(task)
+
+async def _model_version() -> str | None:
+    # Versão servida agora pelo backend: uma troca de modelo descarta o cache já na próxima consulta
+    try:
+        return await get_backend().current_version()
+    except BackendError:
+        return None
+
+def _query_params(task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, determinism_needed, temperature_preference, output_style, top_k: int | None, exclude: list[LLMs] | None) -> dict:
+    query_params = {
+        "task_type": task_type.value,
+        "domain": domain.value,
+        "input_language": input_language.value,
+        "privacy_requirement": privacy_requirement.value,
+        "hardware_available": hardware_available.value,
+        "hallucination_tolerance": hallucination_tolerance.value,
+        "determinism_needed": determinism_needed.value,
+        "temperature_preference": temperature_preference.value,
+        "output_style": output_style.value
+    }
+    if top_k is not None:
+        query_params["top_k"] = top_k
+    if exclude:
+        query_params["exclude"] = sorted({llm.value for llm in exclude})
+    return query_params
+
+def _cache_key(query_params: dict) -> tuple:
+    return tuple(tuple(value) if isinstance(value, list) else value for value in query_params.values())
 
 @mcp.resource("http://localhost/available_task_types")
-def get_params_enum() -> dict[str, list[str]]:
+async def get_params_enum() -> dict[str, list[str]]:
     """
     Provides the enumerated options for each parameter to the AI.
     
@@ -27,11 +132,21 @@ def get_params_enum() -> dict[str, list[str]]:
         "temperature_preference": [e.value for e in TemperaturePreference],
         "output_style": [e.value for e in OutputStyle]
     }
-    print(f"[MCP Server] Providing parameter enums to AI: {params_enum}")
+    logger.debug("Providing parameter enums to AI: %s", params_enum)
     return params_enum
 
+@mcp.resource("http://localhost/cache_stats")
+async def get_cache_stats() -> dict:
+    """
+    Reports how effective the recommendation cache is.
+    
+    Returns:
+        dict: Hit and miss counters, hit rate, size, evictions, expirations, invalidations and the cached model version.
+    """
+    return result_cache.stats()
+
 @mcp.tool()
-def get_llm_recommendation(
+async def get_llm_recommendation(
     task_type: TaskType,
     domain: Domain,
     input_language: InputLanguage,
@@ -40,12 +155,16 @@ def get_llm_recommendation(
     hallucination_tolerance: HallucinationTolerance,
     determinism_needed: DeterminismNeeded,
     temperature_preference: TemperaturePreference,
-    output_style: OutputStyle
+    output_style: OutputStyle,
+    top_k: int | None = None,
+    exclude: list[LLMs] | None = None,
+    ctx: Context = None
 ) -> dict | str:
     """
     Connects to the LLM Matchmaker API to get a model recommendation.
     
-    This tool will call an external REST API to find the best LLM.
+    This tool calls the REST API through a pooled client with timeouts and retries,
+    or answers in-process from the model's answer table when MATCHMAKER_BACKEND=local.
     
     Args:
         task_type (TaskType): The type of task. 
@@ -66,59 +185,110 @@ def get_llm_recommendation(
                                     Options: "low", "medium", "high"
     output_style (OutputStyle): The desired tone or format. 
                         Options: "formal", "creative", "factual", "precise"
+    top_k (int | None): Also return the top_k LLMs ranked by the model's probability (1 to 5),
+                        so fallbacks come from this single call instead of new queries.
+    exclude (list[LLMs] | None): LLMs that must not be recommended (e.g. blocked by policy).
+                        Options: "Gemini", "Deepseek", "Llama-3-70B", "Claude-2", "GPT-4o"
     
     Returns:
-        dict: A dictionary with the prediction, e.g., {"prediction": "Gemini"}
+        dict: A dictionary with the prediction, e.g., {"prediction": "Gemini", "model_version": "..."},
+              plus "ranking": [{"llm": ..., "score": ...}, ...] when top_k is given
         str: An error message if the API call fails.
     """
     
-    ENDPOINT = "/predict-match"
-    
     # Pack the arguments into the dictionary for the API call
-    query_params = {
-        "task_type": task_type.value,
-        "domain": domain.value,
-        "input_language": input_language.value,
-        "privacy_requirement": privacy_requirement.value,
-        "hardware_available": hardware_available.value,
-        "hallucination_tolerance": hallucination_tolerance.value,
-        "determinism_needed": determinism_needed.value,
-        "temperature_preference": temperature_preference.value,
-        "output_style": output_style.value
-    }
+    query_params = _query_params(task_type, domain, input_language, privacy_requirement, hardware_available, hallucination_tolerance, determinism_needed, temperature_preference, output_style, top_k, exclude)
+    cache_key = _cache_key(query_params)
+    cached = result_cache.get(cache_key, await _model_version())
+    if cached is not None:
+        logger.debug("Cache hit. Returning to AI: %s", cached)
+        return dict(cached)
 
-    print(f"[MCP Server] Calling external API at {BASE_URL}{ENDPOINT}")
-    print(f"[MCP Server] Params: {query_params}")
+    logger.debug("Calling %s backend for %s with params: %s", config.BACKEND, ENDPOINT, query_params)
     
     try:
-        # Make the GET request
-        response = requests.get(f"{BASE_URL}{ENDPOINT}", params=query_params)
-        response.raise_for_status()
+        async with _session_slot(ctx):
+            result = await _predict(cache_key, query_params)
         
         # --- Success ---
-        result = response.json()
-        print(f"[MCP Server] API Success. Returning to AI: {result}")
+        logger.debug("API Success. Returning to AI: %s", result)
         # Return the successful JSON dictionary to the AI
-        return result
+        return dict(result)
 
-    except requests.exceptions.HTTPError as http_err:
-        error_msg = f"HTTP Error: {http_err}. Status: {response.status_code}. Details: {response.text}"
-        print(f"[MCP Server] ERROR: {error_msg}")
+    except BackendError as err:
+        error_msg = str(err)
+        logger.warning("ERROR: %s", error_msg)
         return error_msg # Return the error string to the AI
-        
-    except requests.exceptions.ConnectionError as conn_err:
-        error_msg = f"Connection Error: Could not connect to {BASE_URL}. {conn_err}"
-        print(f"[MCP Server] ERROR: {error_msg}")
-        return error_msg
-        
-    except requests.exceptions.RequestException as err:
-        error_msg = f"An Error Occurred: {err}"
-        print(f"[MCP Server] ERROR: {error_msg}")
-        return error_msg
+
+@mcp.tool()
+async def get_llm_recommendations(scenarios: list[ScenarioRequest], ctx: Context = None) -> dict | str:
+    """
+    Recommends an LLM for each of several scenarios in a single call.
+    
+    Use it instead of repeated get_llm_recommendation calls when planning a pipeline with
+    several stages (e.g. extraction, then summarization, then classification, each with its
+    own constraints). Identical scenarios are evaluated once, cached ones are answered
+    without calling the API, and the rest go to the model in one vectorized prediction.
+    
+    Args:
+        scenarios (list[ScenarioRequest]): One object per stage, with the same fields as the
+                        arguments of get_llm_recommendation (including the optional top_k and exclude).
+    
+    Returns:
+        dict: {"model_version": "...", "unique_scenarios": n, "results": [...]}, with one entry per
+              scenario in input order: {"index", "prediction", "ranking"?} or {"index", "error"}
+        str: An error message if the API call fails.
+    """
+    params = [
+        _query_params(s.task_type, s.domain, s.input_language, s.privacy_requirement, s.hardware_available, s.hallucination_tolerance, s.determinism_needed, s.temperature_preference, s.output_style, s.top_k, s.exclude)
+        for s in scenarios
+    ]
+    keys = [_cache_key(query_params) for query_params in params]
+    results: list[dict | None] = [None] * len(scenarios)
+
+    # Cenários repetidos na lista viram uma única entrada; os já em cache não vão à API
+    missing: dict[tuple, list[int]] = {}
+    model_version = None
+    current = await _model_version()
+    for index, key in enumerate(keys):
+        cached = result_cache.get(key, current) if key not in missing else None
+        if cached is not None:
+            model_version = cached.get("model_version")
+            results[index] = {"index": index, **{name: value for name, value in cached.items() if name != "model_version"}}
+        else:
+            missing.setdefault(key, []).append(index)
+
+    logger.debug("Batch of %d scenarios: %d distinct to request from the %s backend", len(scenarios), len(missing), config.BACKEND)
+
+    if missing:
+        try:
+            backend = get_backend()
+            async with _session_slot(ctx):
+                response = await backend.predict_many([params[indices[0]] for indices in missing.values()])
+        except BackendError as err:
+            error_msg = str(err)
+            logger.warning("ERROR: %s", error_msg)
+            return error_msg # Return the error string to the AI
+
+        model_version = response["model_version"]
+        for (key, indices), entry in zip(missing.items(), response["results"]):
+            fields = {name: value for name, value in entry.items() if name != "index"}
+            if "error" not in fields:
+                result_cache.put(key, {**fields, "model_version": model_version}, backend.model_version)
+            for index in indices:
+                results[index] = {"index": index, **fields}
+
+    return {"model_version": model_version, "unique_scenarios": len(set(keys)), "results": results}
 
 # 3. Run the server
 if __name__ == "__main__":
-    print("Starting MCP server...")
-    print(f"This server will act as a bridge to the API at: {BASE_URL}")
-    print("An AI can connect and use the 'get_llm_recommendation' tool.")
-    mcp.run()
+    logger.info("Starting MCP server with the %s transport...", config.TRANSPORT)
+    if config.BACKEND == "local":
+        logger.info("This server will answer in-process from the active model of the registry at: %s (fallback: %s)", config.MODEL_REGISTRY_DIR, config.MODEL_PATH)
+    else:
+        logger.info("This server will act as a bridge to the API at: %s", config.BASE_URL)
+    if config.TRANSPORT != "stdio":
+        path = mcp.settings.streamable_http_path if config.TRANSPORT == "streamable-http" else mcp.settings.sse_path
+        logger.info("Agents connect to http://%s:%d%s, sharing one backend and cache", config.HOST, config.PORT, path)
+    logger.info("An AI can connect and use the 'get_llm_recommendation' and 'get_llm_recommendations' tools.")
+    anyio.run(serve, config.TRANSPORT)
@@ -8,6 +8,16 @@ class LLMs(Enum):
     CLAUDE_2 = "Claude-2"
     GPT_4O = "GPT-4o"
 
+class LLMScore(BaseModel):
+    llm: LLMs
+    score: float
+    # Preenchidos pelo /predict-match/budget: custo de serviço usado nos filtros de orçamento
+    latency_ms: float | None = None
+    cost_per_1k: float | None = None
+
 class ModelResult(BaseModel):
     prediction: LLMs
+    model_version: str | None = None
+    # Presente quando a requisição pede top_k: LLMs ordenados pela probabilidade do modelo
+    ranking: list[LLMScore] | None = None
 
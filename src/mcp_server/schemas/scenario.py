@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+
+from enums.params import TaskType, Domain, InputLanguage, PrivacyRequirement, HardwareAvailable, HallucinationTolerance, DeterminismNeeded, TemperaturePreference, OutputStyle
+from results.match_result import LLMs
+
+class ScenarioRequest(BaseModel):
+    """One scenario of get_llm_recommendations, with the same arguments as get_llm_recommendation."""
+    task_type: TaskType
+    domain: Domain
+    input_language: InputLanguage
+    privacy_requirement: PrivacyRequirement
+    hardware_available: HardwareAvailable
+    hallucination_tolerance: HallucinationTolerance
+    determinism_needed: DeterminismNeeded
+    temperature_preference: TemperaturePreference
+    output_style: OutputStyle
+    top_k: int | None = Field(None, ge=1, le=len(LLMs))
+    exclude: list[LLMs] | None = None
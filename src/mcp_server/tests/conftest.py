@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do servidor são importados pelo nome, como em `python matchmaker_server.py`
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
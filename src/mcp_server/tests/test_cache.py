@@ -0,0 +1,84 @@
+import asyncio
+
+import httpx
+
+import backends
+import config
+import matchmaker_server as server
+
+SCENARIO = {
+    "task_type": "reasoning",
+    "domain": "finance",
+    "input_language": "en",
+    "privacy_requirement": "cloud",
+    "hardware_available": "cpu",
+    "hallucination_tolerance": "low",
+    "determinism_needed": 1,
+    "temperature_preference": "low",
+    "output_style": "formal",
+}
+
+
+class FakeApi:
+    """Answers /readyz and /predict-match like the API, serving whatever version is set."""
+
+    def __init__(self, version: str):
+        self.version = version
+        self.predictions = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == backends.READY_ENDPOINT:
+            return httpx.Response(200, json={"status": "ready", "model_version": self.version})
+        self.predictions += 1
+        prediction = "Gemini" if self.version == "v1" else "Claude-2"
+        return httpx.Response(200, json={"prediction": prediction, "model_version": self.version}, headers={"X-Model-Version": self.version})
+
+
+def _http_backend(api: FakeApi) -> backends.HttpBackend:
+    backend = backends.HttpBackend("http://api")
+    backend.client = httpx.AsyncClient(base_url="http://api", transport=httpx.MockTransport(api))
+    return backend
+
+
+async def _recommend() -> dict:
+    _, structured = await server.mcp.call_tool("get_llm_recommendation", SCENARIO)
+    return structured["result"]
+
+
+def test_model_swap_invalidates_cache_hits(monkeypatch):
+    api = FakeApi("v1")
+    monkeypatch.setattr(backends, "_backend", _http_backend(api))
+    monkeypatch.setattr(config, "VERSION_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(server, "result_cache", server.ResultCache(maxsize=100, ttl=300))
+
+    async def scenario():
+        assert (await _recommend())["model_version"] == "v1"
+        assert (await _recommend())["model_version"] == "v1"
+        assert api.predictions == 1
+
+        # A API troca de modelo: a próxima consulta tem de ir à API, não ao cache
+        api.version = "v2"
+        result = await _recommend()
+        assert result == {"prediction": "Claude-2", "model_version": "v2"}
+        assert api.predictions == 2
+        assert server.result_cache.stats()["invalidations"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_version_check_is_throttled(monkeypatch):
+    api = FakeApi("v1")
+    backend = _http_backend(api)
+    checks = []
+    handler = backend.client._transport.handler
+    backend.client._transport.handler = lambda request: checks.append(request.url.path) or handler(request)
+    monkeypatch.setattr(config, "VERSION_CHECK_INTERVAL", 60)
+
+    async def scenario():
+        versions = await asyncio.gather(*(backend.current_version() for _ in range(10)))
+        assert versions == ["v1"] * 10
+        api.version = "v2"
+        assert await backend.current_version() == "v1"
+
+    asyncio.run(scenario())
+    assert checks == [backends.READY_ENDPOINT]
@@ -0,0 +1,52 @@
+import asyncio
+
+import backends
+import config
+import matchmaker_server as server
+
+SCENARIO = {
+    "task_type": "reasoning",
+    "domain": "finance",
+    "input_language": "en",
+    "privacy_requirement": "cloud",
+    "hardware_available": "cpu",
+    "hallucination_tolerance": "low",
+    "determinism_needed": 1,
+    "temperature_preference": "low",
+    "output_style": "formal",
+}
+OTHER = {**SCENARIO, "task_type": "extraction", "privacy_requirement": "local"}
+
+
+def _local_backend(tmp_path) -> backends.LocalBackend:
+    # Registro vazio: serve o modelo legado do repositório
+    return backends.LocalBackend(str(tmp_path), config.MODEL_PATH, 60)
+
+
+def test_local_predict_many_counts_distinct_scenarios(tmp_path):
+    backend = _local_backend(tmp_path)
+    response = asyncio.run(backend.predict_many([SCENARIO, OTHER, SCENARIO, {**SCENARIO, "top_k": 2}]))
+
+    assert response["unique_scenarios"] == 3
+    assert [entry["index"] for entry in response["results"]] == [0, 1, 2, 3]
+    assert response["results"][0] == {**response["results"][2], "index": 0}
+    assert len(response["results"][3]["ranking"]) == 2
+
+
+def test_batch_tool_with_duplicate_scenarios(tmp_path, monkeypatch):
+    backend = _local_backend(tmp_path)
+    monkeypatch.setattr(backends, "_backend", backend)
+    monkeypatch.setattr(server, "result_cache", server.ResultCache(maxsize=100, ttl=300))
+
+    async def scenario():
+        single = await server.mcp.call_tool("get_llm_recommendation", SCENARIO)
+        _, structured = await server.mcp.call_tool("get_llm_recommendations", {"scenarios": [SCENARIO, OTHER, SCENARIO, OTHER, SCENARIO]})
+        return single[1]["result"], structured["result"]
+
+    single, batch = asyncio.run(scenario())
+    assert batch["unique_scenarios"] == 2
+    assert batch["model_version"] == backend.model_version
+    assert [entry["index"] for entry in batch["results"]] == [0, 1, 2, 3, 4]
+    for index in (0, 2, 4):
+        assert batch["results"][index] == {"index": index, "prediction": single["prediction"]}
+    assert batch["results"][1]["prediction"] == batch["results"][3]["prediction"]
@@ -1,9 +1,12 @@
 # %% 
+import sys
 import tempfile
-import pandas as pd
+
+sys.path.append("src/data_gen")
+from dataset import read_dataset
 
 # %%
-df = pd.read_csv("data/llm_matchmaker_dataset_1000.csv")
+df = read_dataset("data/llm_matchmaker_dataset_1000.csv")
 original_df = df.copy()
 print(df.info())
 df.sample(5)
@@ -141,12 +144,34 @@ disp.plot(cmap="Blues")
 best_rf_score = random_search.best_score_
 
 # %%
-import joblib
+print(f"Scores: Baseline: {baseline_score:.4f}, Best RF: {best_rf_score:.4f}")
 
 # %%
-print(f"Scores: Baseline: {baseline_score:.4f}, Best RF: {best_rf_score:.4f}")
-best_model = best_rf_model if best_rf_score > baseline_score else baseline_pipeline
+# Escolha considerando custo de serviço: latência (uma linha e lote) e tamanho de cada candidato, medidos no conjunto de teste.
+# Com OBJECTIVE = "latency_budget", fica o candidato mais rápido entre os de maior acurácia de CV que cabem no orçamento
+from selection import print_report, profile_pipeline, select_model, selection_report
+
+OBJECTIVE = "latency_budget"
+BUDGETS = {"max_p99_ms": 1.0, "max_size_mb": None, "accuracy_tolerance": 0.005}
+
+baseline_pipeline.fit(X_train, y_train)
+finalists = [("logistic_regression", baseline_pipeline, baseline_score), ("random_forest", best_rf_model, best_rf_score)]
+candidates = [
+    {"name": name, "cv_accuracy": float(cv_score), "test_accuracy": float(model.score(X_test, y_test)), "profile": profile_pipeline(model, X_test)}
+    for name, model, cv_score in finalists
+]
+chosen, reason = select_model(candidates, OBJECTIVE, **BUDGETS)
+selection = selection_report(candidates, chosen, reason, OBJECTIVE, **BUDGETS)
+print_report(selection)
+
+best_model = finalists[chosen][1]
 print("Best Model:", best_model)
-best_model_filepath = "src/llm_matchmaker/apipredict/models/best_llm_matchmaker_model.joblib"
-joblib.dump(best_model, best_model_filepath)
-print(f"Best model saved to {best_model_filepath}")
\ No newline at end of file
+
+# %%
+# Publica no registro de modelos da API: joblib, preditor NumPy compilado (conferido contra o pipeline no CSV
+# de treino), tabela pré-computada com a predição de todas as combinações e metadata; a API troca para a nova versão sem reiniciar
+from publish_model import publish_model
+
+scores = {key: candidates[chosen][key] for key in ("cv_accuracy", "test_accuracy")}
+version = publish_model(best_model, original_df, "data/llm_matchmaker_dataset_1000.csv", scores, report=selection)
+print(f"Best model published as version {version}")
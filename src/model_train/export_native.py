@@ -0,0 +1,70 @@
+# Compila o pipeline treinado em um preditor somente NumPy e confere contra o sklearn no CSV de treino.
+#
+#   python src/model_train/export_native.py [--model ...joblib] [--data data/...csv]
+import argparse
+import shutil
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append("src/llm_matchmaker/apipredict")
+sys.path.append("src/data_gen")
+from dataset import read_dataset
+from utils.features import frame_to_codes
+from utils.native_model import NativePredictor, export_native
+from utils.predictors import PipelinePredictor
+
+DEFAULT_MODEL_PATH = "src/llm_matchmaker/apipredict/models/best_llm_matchmaker_model.joblib"
+DEFAULT_DATA_PATH = "data/llm_matchmaker_dataset_1000.csv"
+
+
+def verify_native(native: NativePredictor, pipeline, df: pd.DataFrame) -> tuple[int, float]:
+    """Compares the native predictor with the sklearn pipeline on every row of df.
+
+    Returns:
+        tuple[int, float]: (rows whose predicted class differs, max absolute probability difference)
+
+    Raises:
+        ValueError: When the pipeline has no predict_proba, which the API's ranking needs.
+    """
+    if not hasattr(pipeline, "predict_proba"):
+        raise ValueError(f"{type(pipeline[-1]).__name__} has no predict_proba")
+    codes = frame_to_codes(df)
+    mismatches = int((native.predict_codes(codes) != PipelinePredictor(pipeline).predict_codes(codes)).sum())
+
+    sklearn_proba = pipeline.predict_proba(df)
+    native_proba = native.predict_proba_codes(codes)
+    class_codes = native.arrays["class_codes"]
+    proba_diff = float(np.abs(native_proba[:, class_codes] - sklearn_proba).max())
+    return mismatches, proba_diff
+
+
+def export_and_verify(pipeline, model_path: str, df: pd.DataFrame) -> bool:
+    """Exports the native predictor next to model_path; removes it again if it disagrees with sklearn."""
+    path = None
+    try:
+        path = export_native(pipeline, model_path)
+        mismatches, proba_diff = verify_native(NativePredictor.load(path), pipeline, df)
+    except ValueError as e:
+        if path is not None:
+            shutil.rmtree(path)
+        print(f"No native predictor for this pipeline, the API will serve it through scikit-learn: {e}")
+        return False
+    print(f"Native predictor at {path}: {mismatches} mismatches on {len(df)} rows, max |proba diff| = {proba_diff:.2e}")
+    if mismatches or proba_diff > 1e-9:
+        shutil.rmtree(path)
+        print("Native predictor does not match the sklearn pipeline and was discarded")
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta o preditor nativo (NumPy) do pipeline treinado")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH)
+    args = parser.parse_args()
+
+    ok = export_and_verify(joblib.load(args.model), args.model, read_dataset(args.data))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,36 @@
+# Grava ao lado do modelo o perfil do dataset de treino (contagens por feature, por par de features e por classe),
+# referência do monitor de drift do tráfego da API.
+#
+#   python src/model_train/export_profile.py [--model ...joblib] [--data data/...csv]
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append("src/llm_matchmaker/apipredict")
+sys.path.append("src/data_gen")
+from dataset import TARGET, dataset_sha256, read_dataset
+from utils.drift import profile_path, save_profile
+from utils.features import frame_to_codes
+from utils.predictors import LLM_CODES
+
+DEFAULT_MODEL_PATH = "src/llm_matchmaker/apipredict/models/best_llm_matchmaker_model.joblib"
+DEFAULT_DATA_PATH = "data/llm_matchmaker_dataset_1000.csv"
+
+
+def export_profile(df: pd.DataFrame, model_path: str, data_path: str) -> str:
+    """Writes the training profile of df next to model_path and returns its path."""
+    labels = df[TARGET].astype(str).map(LLM_CODES).to_numpy()
+    save_profile(frame_to_codes(df), labels, model_path, os.path.basename(data_path), dataset_sha256(data_path))
+    return profile_path(model_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta o perfil do dataset de treino usado pelo monitor de drift da API")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH)
+    args = parser.parse_args()
+
+    path = export_profile(read_dataset(args.data), args.model, args.data)
+    print(f"Training profile written to {path}")
@@ -0,0 +1,101 @@
+# Publica um pipeline treinado como nova versão no registro de modelos da API e, por padrão, a ativa.
+# A API em execução detecta a troca do CURRENT e carrega a versão sem reiniciar.
+#
+#   python src/model_train/publish_model.py --model modelo.joblib [--data data/...csv] [--no-activate]
+import argparse
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+
+import joblib
+import pandas as pd
+
+sys.path.append("src/llm_matchmaker/apipredict")
+sys.path.append("src/data_gen")
+from dataset import dataset_sha256, read_dataset
+from export_native import export_and_verify
+from export_profile import export_profile
+from selection import write_report
+from utils import registry
+from utils.answer_table import build_answer_table, build_proba_table, save_answer_table
+from utils.artifacts import file_sha256
+from utils.features import feature_schema
+from utils.predictors import LLM_CLASSES, PipelinePredictor
+
+DEFAULT_REGISTRY_DIR = "src/llm_matchmaker/apipredict/models/registry"
+DEFAULT_DATA_PATH = "data/llm_matchmaker_dataset_1000.csv"
+
+
+def publish_model(pipeline, df: pd.DataFrame, data_path: str, scores: dict, registry_dir: str = DEFAULT_REGISTRY_DIR, activate: bool = True, report: dict | None = None) -> str:
+    """Writes a new registry version with the joblib model, native predictor, answer table, training profile and metadata.
+
+    The version is assembled in a hidden staging folder and renamed into place, so the
+    API never sees a partially written version.
+
+    Args:
+        pipeline: Fitted sklearn pipeline.
+        df (pd.DataFrame): Training data, used to verify the native predictor and as the drift monitor's reference.
+        data_path (str): Dataset (Parquet or CSV) the model was trained on; its hash identifies the training data.
+        scores (dict): Evaluation scores stored in the metadata (e.g. {"cv_accuracy": 0.91}).
+        registry_dir (str): Registry directory.
+        activate (bool): Point CURRENT at the new version; skipped when no verified native
+            predictor could be exported for it.
+        report (dict | None): Model selection report (latency, size and accuracy of every finalist),
+            saved as <model>.selection.json in the version folder.
+
+    Returns:
+        str: The new version name.
+    """
+    os.makedirs(registry_dir, exist_ok=True)
+    staging = os.path.join(registry_dir, f".staging-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    model_path = os.path.join(staging, registry.MODEL_FILENAME)
+    joblib.dump(pipeline, model_path)
+    model_sha256 = file_sha256(model_path)
+    version = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{model_sha256[:8]}"
+
+    native = export_and_verify(pipeline, model_path, df)
+    predictor = PipelinePredictor(pipeline)
+    save_answer_table(build_answer_table(predictor), model_path, build_proba_table(predictor))
+    export_profile(df, model_path, data_path)
+    registry.write_metadata(staging, {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "model_sha256": model_sha256,
+        "training_data": os.path.basename(data_path),
+        "training_data_sha256": dataset_sha256(data_path),
+        "estimator": type(pipeline[-1]).__name__,
+        "scores": scores,
+        "features": feature_schema(),
+        "classes": [llm.value for llm in LLM_CLASSES],
+    })
+
+    if report is not None:
+        write_report(report, model_path)
+
+    os.rename(staging, os.path.join(registry_dir, version))
+    if activate and not native:
+        # A imagem slim da API (requirements.txt) não tem joblib/sklearn para servir o pipeline
+        print(f"Version {version} was published but not activated: it has no native predictor, so only an API "
+              "with scikit-learn installed can serve it (activate it with POST /admin/reload?version=...)")
+    elif activate:
+        registry.set_current(version, registry_dir)
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publica um modelo treinado no registro de versões da API")
+    parser.add_argument("--model", required=True, help="Pipeline sklearn salvo com joblib")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH)
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY_DIR)
+    parser.add_argument("--no-activate", action="store_true", help="Publica sem trocar a versão ativa")
+    args = parser.parse_args()
+
+    df = read_dataset(args.data)
+    pipeline = joblib.load(args.model)
+    scores = {"data_accuracy": float(pipeline.score(df.drop(columns="best_model"), df["best_model"]))}
+    version = publish_model(pipeline, df, args.data, scores, args.registry, activate=not args.no_activate)
+    print(f"Published model version {version} to {args.registry}" + (" (active)" if registry.current_version(args.registry) == version else ""))
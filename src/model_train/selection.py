@@ -0,0 +1,143 @@
+# Escolha do modelo final considerando custo de serviço: latência de inferência (uma linha e lote) e tamanho
+# do artefato de cada candidato, combinados com a acurácia por um objetivo configurável.
+import io
+import json
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+sys.path.append("src/llm_matchmaker/apipredict")
+from utils.features import frame_to_codes
+from utils.native_model import NativePredictor, compile_pipeline
+
+OBJECTIVES = ("accuracy", "latency_budget")
+
+
+def _percentiles_ms(samples_ns: list[int]) -> dict:
+    values = np.array(samples_ns, dtype=np.float64) / 1e6
+    return {"p50_ms": float(np.percentile(values, 50)), "p99_ms": float(np.percentile(values, 99))}
+
+
+def _time_predict(predict, single_inputs: list, batch_input, repeats: int) -> dict:
+    predict(single_inputs[0])  # aquecimento
+    single = []
+    for row in single_inputs:
+        start = time.perf_counter_ns()
+        predict(row)
+        single.append(time.perf_counter_ns() - start)
+
+    batch = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        predict(batch_input)
+        batch.append(time.perf_counter_ns() - start)
+    batch_ms = float(np.median(batch)) / 1e6
+    rows = len(batch_input)
+    return {"single": _percentiles_ms(single), "batch": {"rows": rows, "ms": batch_ms, "rows_per_s": rows / (batch_ms / 1e3)}}
+
+
+def profile_pipeline(pipeline, frame, single_rows: int = 200, batch_rows: int = 1000, repeats: int = 5, seed: int = 42) -> dict:
+    """Measures what serving a fitted pipeline costs.
+
+    Times single-row and batch predictions both through sklearn (PREDICT_MODE=pipeline) and
+    through the compiled NumPy predictor (PREDICT_MODE=native), and the size of each artifact.
+
+    Args:
+        pipeline: Fitted sklearn pipeline.
+        frame (pd.DataFrame): Rows with the model features to predict (e.g. the test set).
+        single_rows (int): Number of single-row predictions timed.
+        batch_rows (int): Rows in the timed batch (sampled with replacement when frame is smaller).
+        repeats (int): Timed batch repetitions; the median is reported.
+
+    Returns:
+        dict: {"pipeline": {...}, "native": {...} | None, "serving": "native" | "pipeline"}; every entry
+        holds size_bytes, single p50/p99 latency in ms and batch latency/throughput.
+    """
+    rng = np.random.default_rng(seed)
+    single_idx = rng.integers(0, len(frame), size=single_rows)
+    batch_idx = rng.integers(0, len(frame), size=batch_rows)
+
+    buffer = io.BytesIO()
+    joblib.dump(pipeline, buffer)
+    report = {"pipeline": {"size_bytes": buffer.getbuffer().nbytes,
+                           **_time_predict(pipeline.predict, [frame.iloc[[i]] for i in single_idx], frame.iloc[batch_idx], repeats)}}
+
+    try:
+        arrays, meta = compile_pipeline(pipeline)
+    except ValueError:
+        # Estimador sem versão compilada: a API serviria o pipeline sklearn
+        report["native"] = None
+    else:
+        native = NativePredictor(arrays, meta)
+        codes = frame_to_codes(frame)
+        report["native"] = {"size_bytes": int(sum(array.nbytes for array in arrays.values())),
+                            **_time_predict(native.predict_codes, [codes[[i]] for i in single_idx], codes[batch_idx], repeats)}
+
+    report["serving"] = "native" if report["native"] is not None else "pipeline"
+    return report
+
+
+def select_model(candidates: list[dict], objective: str = "accuracy", max_p99_ms: float | None = None,
+                 max_size_mb: float | None = None, accuracy_tolerance: float = 0.0) -> tuple[int, str]:
+    """Picks the candidate to ship.
+
+    Args:
+        candidates (list[dict]): One entry per candidate with "name", "cv_accuracy" and "profile"
+            (as returned by profile_pipeline).
+        objective (str): "accuracy" keeps the highest CV accuracy; "latency_budget" keeps the highest
+            CV accuracy among the candidates whose serving p99 single-row latency and artifact size
+            fit the budgets, preferring the fastest one among those within accuracy_tolerance of it.
+        max_p99_ms (float | None): Serving p99 single-row latency budget.
+        max_size_mb (float | None): Serving artifact size budget.
+        accuracy_tolerance (float): Accuracy a faster candidate may give up (e.g. 0.005).
+
+    Returns:
+        tuple[int, str]: (index of the chosen candidate, human-readable reason)
+    """
+    def serving(candidate: dict) -> dict:
+        return candidate["profile"][candidate["profile"]["serving"]]
+
+    if objective == "accuracy":
+        best = max(range(len(candidates)), key=lambda i: candidates[i]["cv_accuracy"])
+        return best, "highest CV accuracy"
+    if objective != "latency_budget":
+        raise ValueError(f"Unknown objective: {objective}")
+
+    eligible = [i for i, candidate in enumerate(candidates)
+                if (max_p99_ms is None or serving(candidate)["single"]["p99_ms"] <= max_p99_ms)
+                and (max_size_mb is None or serving(candidate)["size_bytes"] <= max_size_mb * 1024 * 1024)]
+    if not eligible:
+        fastest = min(range(len(candidates)), key=lambda i: serving(candidates[i])["single"]["p99_ms"])
+        return fastest, "no candidate fits the budget; chose the lowest p99 latency"
+
+    top = max(candidates[i]["cv_accuracy"] for i in eligible)
+    close = [i for i in eligible if candidates[i]["cv_accuracy"] >= top - accuracy_tolerance]
+    best = min(close, key=lambda i: (serving(candidates[i])["single"]["p99_ms"], -candidates[i]["cv_accuracy"]))
+    return best, f"lowest p99 latency within {accuracy_tolerance:.4f} of the best CV accuracy inside the budget"
+
+
+def selection_report(candidates: list[dict], chosen: int, reason: str, objective: str, **budgets) -> dict:
+    return {"objective": objective, "budgets": budgets, "chosen": candidates[chosen]["name"], "reason": reason, "candidates": candidates}
+
+
+def write_report(report: dict, model_path: str) -> str:
+    """Writes the selection report next to the model file (<model>.selection.json)."""
+    base, _ = os.path.splitext(model_path)
+    path = f"{base}.selection.json"
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    return path
+
+
+def print_report(report: dict):
+    print(f"{'candidate':<40} {'cv acc':>7} {'test acc':>8} {'serving':>8} {'p50 ms':>8} {'p99 ms':>8} {'batch rows/s':>13} {'size KB':>9}")
+    for candidate in report["candidates"]:
+        profile = candidate["profile"]
+        serving = profile[profile["serving"]]
+        marker = " *" if candidate["name"] == report["chosen"] else ""
+        print(f"{candidate['name']:<40} {candidate['cv_accuracy']:>7.4f} {candidate.get('test_accuracy', float('nan')):>8.4f} {profile['serving']:>8} "
+              f"{serving['single']['p50_ms']:>8.3f} {serving['single']['p99_ms']:>8.3f} {serving['batch']['rows_per_s']:>13.0f} {serving['size_bytes'] / 1024:>9.1f}{marker}")
+    print(f"Chosen: {report['chosen']} ({report['reason']})")
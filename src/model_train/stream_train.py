@@ -0,0 +1,178 @@
+# Treino fora da memória: percorre o dataset em lotes (Parquet particionado ou CSV) e ajusta estimadores
+# incrementais sobre os códigos ordinais das features. Uma fração fixa das linhas, escolhida pelo hash do índice
+# global da linha, fica de fora do treino e é avaliada também em streaming. O pico de memória depende de
+# --batch-rows, não do tamanho do dataset, e o resultado é um pipeline sklearn servido normalmente pela API.
+#
+#   python src/model_train/stream_train.py --data data/llm_matchmaker_dataset_10000000.parquet [--estimator sgd|categorical_nb]
+import argparse
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import classification_report
+from sklearn.naive_bayes import CategoricalNB
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OrdinalEncoder
+
+sys.path.append("src/llm_matchmaker/apipredict")
+sys.path.append("src/data_gen")
+from dataset import iter_batches
+from train import DEFAULT_DATA_PATH, TARGET, make_pipeline, one_hot
+from utils.features import FEATURE_ENUMS, GRID_SHAPE, MODEL_PARAMS, codes_to_frame, frame_to_codes
+from utils.predictors import LLM_CLASSES
+
+ESTIMATORS = ("sgd", "categorical_nb")
+CLASSES = np.array([llm.value for llm in LLM_CLASSES], dtype=object)
+
+
+def holdout_mask(start: int, n: int, fraction: float, seed: int) -> np.ndarray:
+    """Marks the held-out rows among global row indices [start, start + n).
+
+    Depends only on the row index and the seed (splitmix64 hash), so the partition is the same
+    across epochs and for any batch size.
+    """
+    with np.errstate(over="ignore"):
+        x = np.arange(start, start + n, dtype=np.uint64) + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53) < fraction
+
+
+def make_estimator(name: str, alpha: float, seed: int):
+    if name == "sgd":
+        # Regressão logística ajustada por SGD (um-contra-todos), exportável para o preditor nativo como as lineares
+        return SGDClassifier(loss="log_loss", alpha=alpha, random_state=seed)
+    # Contagens de categoria por classe: o ajuste incremental é só somar o histograma de cada lote
+    return CategoricalNB(alpha=alpha, min_categories=list(GRID_SHAPE))
+
+
+def encode(name: str, codes: np.ndarray) -> np.ndarray:
+    """Input of the estimator for a block of enum ordinals, laid out as its pipeline's preprocessor does."""
+    return one_hot(codes) if name == "sgd" else codes
+
+
+def make_served_pipeline(name: str, estimator) -> Pipeline:
+    """Wraps the incrementally fitted estimator in a pipeline that takes the API's DataFrame layout.
+
+    The encoders have fixed categories, so fitting them on a single row only sets up their output layout.
+    """
+    if name == "sgd":
+        pipeline = make_pipeline(estimator)
+    else:
+        encoder = OrdinalEncoder(categories=[[member.value for member in enum] for enum in FEATURE_ENUMS])
+        pipeline = Pipeline(steps=[
+            ("preprocessor", ColumnTransformer(transformers=[("cat", encoder, MODEL_PARAMS)])),
+            ("classifier", estimator),
+        ])
+    pipeline.named_steps["preprocessor"].fit(codes_to_frame(np.zeros((1, len(MODEL_PARAMS)), dtype=np.uint8)))
+    return pipeline
+
+
+def stream(args):
+    """Yields (codes, y, held-out mask) for every batch of the dataset, in row order."""
+    start = 0
+    for batch in iter_batches(args.data, columns=MODEL_PARAMS + [TARGET], batch_rows=args.batch_rows):
+        codes = frame_to_codes(batch)
+        # Categorias de best_model na ordem de LLMs: o código do categórico é a posição em CLASSES
+        y = batch[TARGET].cat.codes.to_numpy()
+        yield codes, y, holdout_mask(start, len(batch), args.holdout, args.seed)
+        start += len(batch)
+
+
+def fit(args):
+    estimator = make_estimator(args.estimator, args.alpha, args.seed)
+    rng = np.random.default_rng(args.seed)
+    epochs = args.epochs if args.estimator == "sgd" else 1
+    for epoch in range(epochs):
+        start, rows = time.perf_counter(), 0
+        for codes, y, held_out in stream(args):
+            train = np.flatnonzero(~held_out)
+            if not len(train):
+                continue
+            if args.estimator == "sgd":
+                rng.shuffle(train)
+            estimator.partial_fit(encode(args.estimator, codes[train]), CLASSES[y[train]], classes=CLASSES)
+            rows += len(train)
+        seconds = time.perf_counter() - start
+        print(f"Epoch {epoch + 1}/{epochs}: {rows} training rows in {seconds:.1f}s ({rows / seconds:.0f} rows/s)")
+    return estimator
+
+
+def evaluate(args, estimator) -> tuple[np.ndarray, pd.DataFrame]:
+    """Streams over the held-out rows.
+
+    Returns:
+        tuple: (confusion matrix indexed by CLASSES positions, uniform sample of at most
+        args.sample_rows held-out rows, used to verify the exported artifacts)
+    """
+    confusion = np.zeros((len(CLASSES), len(CLASSES)), dtype=np.int64)
+    # Posição em CLASSES de cada entrada de classes_ (que o sklearn ordena alfabeticamente)
+    positions = np.array([list(CLASSES).index(label) for label in estimator.classes_])
+    sample_codes = np.empty((0, len(MODEL_PARAMS)), dtype=np.uint8)
+    sample_y = np.empty(0, dtype=np.int64)
+    sample_keys = np.empty(0)
+    rng = np.random.default_rng(args.seed)
+    for codes, y, held_out in stream(args):
+        codes, y = codes[held_out], y[held_out]
+        if not len(y):
+            continue
+        predicted = positions[np.searchsorted(estimator.classes_, estimator.predict(encode(args.estimator, codes)))]
+        np.add.at(confusion, (y, predicted), 1)
+
+        # Amostragem por chaves aleatórias: mantém as sample_rows menores chaves vistas até aqui
+        sample_codes = np.concatenate([sample_codes, codes])
+        sample_y = np.concatenate([sample_y, y])
+        sample_keys = np.concatenate([sample_keys, rng.random(len(y))])
+        if len(sample_keys) > args.sample_rows:
+            keep = np.argpartition(sample_keys, args.sample_rows)[:args.sample_rows]
+            sample_codes, sample_y, sample_keys = sample_codes[keep], sample_y[keep], sample_keys[keep]
+
+    sample = codes_to_frame(sample_codes)
+    sample[TARGET] = CLASSES[sample_y]
+    return confusion, sample
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Treina o LLM Matchmaker em streaming, sem carregar o dataset inteiro na memória")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="Dataset Parquet (arquivo ou diretório particionado) ou CSV")
+    parser.add_argument("--estimator", choices=ESTIMATORS, default="sgd")
+    parser.add_argument("--batch-rows", type=int, default=100_000, help="Linhas por lote; limita o pico de memória")
+    parser.add_argument("--epochs", type=int, default=3, help="Passadas sobre o dataset (só sgd; categorical_nb é exato em uma)")
+    parser.add_argument("--alpha", type=float, default=None, help="Regularização do sgd (padrão 1e-5) ou suavização do categorical_nb (padrão 1.0)")
+    parser.add_argument("--holdout", type=float, default=0.1, help="Fração das linhas separada para avaliação")
+    parser.add_argument("--sample-rows", type=int, default=20_000, help="Linhas do holdout guardadas para verificar o preditor nativo e a tabela de respostas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Também salva o pipeline final neste caminho .joblib")
+    parser.add_argument("--no-publish", action="store_true", help="Não publica o modelo no registro da API")
+    args = parser.parse_args()
+    if args.alpha is None:
+        args.alpha = 1e-5 if args.estimator == "sgd" else 1.0
+
+    estimator = fit(args)
+    confusion, sample = evaluate(args, estimator)
+    held_out = int(confusion.sum())
+    accuracy = float(np.trace(confusion) / held_out)
+    true, predicted = np.nonzero(confusion)
+    report = classification_report(CLASSES[true], CLASSES[predicted], sample_weight=confusion[true, predicted], labels=CLASSES, zero_division=0)
+    print(f"Held-out Classification Report ({held_out} rows): {report}")
+    print(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    pipeline = make_served_pipeline(args.estimator, estimator)
+
+    if args.output:
+        import joblib
+
+        joblib.dump(pipeline, args.output)
+        print(f"Pipeline saved to {args.output}")
+
+    if not args.no_publish:
+        from publish_model import publish_model
+
+        scores = {"holdout_accuracy": accuracy, "holdout_rows": held_out, "estimator": args.estimator, "training": "stream"}
+        version = publish_model(pipeline, sample, args.data, scores)
+        print(f"Model published as version {version}")
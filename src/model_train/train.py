@@ -0,0 +1,313 @@
+# CLI de treino: busca de hiperparâmetros por successive halving, com folds e matrizes one-hot guardados em disco
+# (chaveados pelo hash do dataset e reaproveitados entre execuções), estado retomável e publicação no registro da API.
+#
+#   python src/model_train/train.py [--data data/...csv] [--search halving|random] [--candidates 200] [--restart]
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import classification_report
+from sklearn.model_selection import ParameterGrid, ParameterSampler, StratifiedKFold, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+sys.path.append("src/llm_matchmaker/apipredict")
+sys.path.append("src/data_gen")
+from dataset import dataset_sha256, read_dataset
+from utils.features import FEATURE_ENUMS, MODEL_PARAMS, feature_schema, frame_to_codes
+from selection import OBJECTIVES, print_report, profile_pipeline, select_model, selection_report, write_report
+
+TARGET = "best_model"
+DEFAULT_DATA_PATH = "data/llm_matchmaker_dataset_1000.csv"
+DEFAULT_CACHE_DIR = ".train_cache"
+CACHE_FORMAT_VERSION = 1
+
+# Espaços de busca por estimador (o de random_forest é o mesmo usado no classifier_train.py)
+SEARCH_SPACES = {
+    "random_forest": (RandomForestClassifier, {
+        "n_estimators": [100, 300],
+        "max_depth": [None, 10, 20],
+        "min_samples_split": [2, 5, 10],
+        "min_samples_leaf": [1, 2, 4],
+        "max_features": ["sqrt", "log2", None],
+        "bootstrap": [True, False],
+        "max_leaf_nodes": [None, 50, 100],
+    }),
+    "logistic_regression": (LogisticRegression, {
+        "C": [0.01, 0.1, 1.0, 10.0, 100.0],
+        "max_iter": [1000],
+    }),
+}
+
+
+def make_estimator(name: str, params: dict, seed: int):
+    estimator_cls, _ = SEARCH_SPACES[name]
+    return estimator_cls(random_state=seed, **params)
+
+
+def make_pipeline(estimator) -> Pipeline:
+    """Wraps an estimator in the pipeline layout served by the API (one-hot over the enum categories)."""
+    encoder = OneHotEncoder(categories=[[member.value for member in enum] for enum in FEATURE_ENUMS], handle_unknown="ignore")
+    return Pipeline(steps=[
+        ("preprocessor", ColumnTransformer(transformers=[("cat", encoder, MODEL_PARAMS)])),
+        ("classifier", estimator),
+    ])
+
+
+def one_hot(codes: np.ndarray) -> np.ndarray:
+    """One-hot encodes enum ordinals exactly like make_pipeline's encoder, without fitting anything."""
+    sizes = [len(enum) for enum in FEATURE_ENUMS]
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    encoded = np.zeros((codes.shape[0], sum(sizes)), dtype=np.uint8)
+    encoded[np.arange(codes.shape[0])[:, None], codes.astype(np.int64) + offsets] = 1
+    return encoded
+
+
+def _digest(payload: dict) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def load_folds(data_path: str, cache_dir: str, test_size: float, n_splits: int, seed: int) -> tuple[str, dict]:
+    """Returns the encoded dataset and its splits, building them only on the first run for this dataset.
+
+    The cache entry is keyed on the CSV's SHA-256 together with the split settings and the
+    feature schema, so any change to the data or the enums produces a new entry. Arrays are
+    stored as .npy files and memory-mapped on later runs.
+
+    Returns:
+        tuple[str, dict]: (cache entry directory, arrays X, y, train_idx, test_idx, fold, order)
+    """
+    key = _digest({
+        "format_version": CACHE_FORMAT_VERSION,
+        "data_sha256": dataset_sha256(data_path),
+        "features": feature_schema(),
+        "test_size": test_size,
+        "n_splits": n_splits,
+        "seed": seed,
+    })
+    entry = os.path.join(cache_dir, key)
+    names = ("X", "y", "train_idx", "test_idx", "fold", "order")
+
+    if not all(os.path.exists(os.path.join(entry, f"{name}.npy")) for name in names):
+        df = read_dataset(data_path, columns=MODEL_PARAMS + [TARGET])
+        codes = frame_to_codes(df)
+        # As categorias de best_model seguem a ordem de LLMs, então os códigos do categórico já são os LLM_CODES
+        y = df[TARGET].cat.codes.to_numpy().astype(np.uint8)
+        train_idx, test_idx = train_test_split(np.arange(len(df)), test_size=test_size, random_state=seed, stratify=y)
+
+        # Fold de validação de cada linha de treino e uma permutação fixa usada para subamostrar nas rodadas iniciais
+        fold = np.empty(len(train_idx), dtype=np.int8)
+        for k, (_, val) in enumerate(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(train_idx, y[train_idx])):
+            fold[val] = k
+        order = np.random.default_rng(seed).permutation(len(train_idx))
+
+        os.makedirs(entry, exist_ok=True)
+        arrays = {"X": one_hot(codes), "y": y, "train_idx": train_idx, "test_idx": test_idx, "fold": fold, "order": order}
+        for name, array in arrays.items():
+            np.save(os.path.join(entry, f"{name}.npy"), array)
+        with open(os.path.join(entry, "meta.json"), "w") as f:
+            json.dump({"data_path": data_path, "rows": len(df), "test_size": test_size, "n_splits": n_splits, "seed": seed}, f, indent=2)
+        print(f"Encoded {len(df)} rows into {entry}")
+    else:
+        print(f"Reusing encoded folds from {entry}")
+
+    return entry, {name: np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r") for name in names}
+
+
+def evaluate(candidate: dict, arrays: dict, n_splits: int, resources: int, seed: int) -> tuple[float, float]:
+    """Cross-validates one candidate training on at most `resources` rows of each fold.
+
+    Returns:
+        tuple[float, float]: (mean validation accuracy, seconds spent)
+    """
+    start = time.perf_counter()
+    X, y = arrays["X"][arrays["train_idx"]], arrays["y"][arrays["train_idx"]]
+    fold, order = arrays["fold"], arrays["order"]
+    estimator = make_estimator(candidate["estimator"], candidate["params"], seed)
+
+    scores = []
+    for k in range(n_splits):
+        # Linhas de treino do fold na ordem da permutação fixa: cada rodada usa um prefixo maior
+        rows = order[fold[order] != k][:resources]
+        val = fold == k
+        model = clone(estimator).fit(X[rows], y[rows])
+        scores.append(float((model.predict(X[val]) == y[val]).mean()))
+    return float(np.mean(scores)), time.perf_counter() - start
+
+
+def _evaluate_tagged(j: int, *args) -> tuple[int, float, float]:
+    return (j, *evaluate(*args))
+
+
+def sample_candidates(estimators: list[str], n_candidates: int, seed: int) -> list[dict]:
+    candidates = []
+    for name in estimators:
+        _, space = SEARCH_SPACES[name]
+        n_iter = min(n_candidates, len(ParameterGrid(space)))
+        candidates += [{"estimator": name, "params": params} for params in ParameterSampler(space, n_iter=n_iter, random_state=seed)]
+    return candidates
+
+
+def halving_schedule(n_candidates: int, max_resources: int, min_resources: int, factor: int, search: str) -> list[int]:
+    """Training rows per fold for each round; the last round always uses every row."""
+    if search == "random":
+        return [max_resources]
+    n_rounds = 1 + int(math.log(max(n_candidates, 1), factor))
+    first = max(min_resources, max_resources // factor ** (n_rounds - 1))
+    # Rodadas intermediárias que já chegariam perto do treino completo são puladas
+    return [r for r in (first * factor ** i for i in range(n_rounds - 1)) if r * factor <= max_resources] + [max_resources]
+
+
+class SearchState:
+    """Append-only JSONL log of evaluated (round, candidate) pairs; lets an interrupted search resume."""
+
+    def __init__(self, path: str, config: dict, restart: bool):
+        self.path = path
+        self.results: dict[tuple[int, int], float] = {}
+
+        if os.path.exists(path) and not restart:
+            with open(path) as f:
+                header = json.loads(f.readline())
+                if header.get("config") != config:
+                    raise SystemExit(f"{path} was written by a search with different settings; use --restart")
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.results[(entry["round"], entry["candidate"])] = entry["score"]
+            print(f"Resuming search: {len(self.results)} evaluations already in {path}")
+        else:
+            with open(path, "w") as f:
+                f.write(json.dumps({"config": config}) + "\n")
+
+    def record(self, round_: int, candidate: int, resources: int, score: float, seconds: float):
+        self.results[(round_, candidate)] = score
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"round": round_, "candidate": candidate, "resources": resources, "score": score, "seconds": round(seconds, 3)}) + "\n")
+
+
+def search(args) -> tuple[list[tuple[dict, float]], dict]:
+    """Runs (or resumes) the successive-halving search.
+
+    Returns:
+        tuple: (finalists as (candidate, CV accuracy with the full training folds), cached arrays).
+        Finalists are the args.finalists best of the last round plus the best candidate of each
+        estimator, so the model selection can trade accuracy for serving cost across families.
+    """
+    entry, arrays = load_folds(args.data, args.cache_dir, args.test_size, args.cv, args.seed)
+    candidates = sample_candidates(args.estimators, args.candidates, args.seed)
+    max_resources = int(min((arrays["fold"] != k).sum() for k in range(args.cv)))
+    schedule = halving_schedule(len(candidates), max_resources, args.min_resources, args.factor, args.search)
+
+    config = {"search": args.search, "estimators": args.estimators, "candidates": args.candidates, "factor": args.factor,
+              "min_resources": args.min_resources, "schedule": schedule, "seed": args.seed}
+    state = SearchState(os.path.join(entry, f"search-{_digest(config)}.jsonl"), config, args.restart)
+
+    def run(round_: int, indices: list[int]):
+        pending = [j for j in indices if (round_, j) not in state.results]
+        # Resultados chegam na ordem de término e são gravados um a um: uma interrupção perde só as avaliações em andamento
+        jobs = (delayed(_evaluate_tagged)(j, candidates[j], arrays, args.cv, schedule[round_], args.seed) for j in pending)
+        for j, score, seconds in Parallel(n_jobs=args.n_jobs, return_as="generator_unordered")(jobs):
+            state.record(round_, j, schedule[round_], score, seconds)
+
+    survivors = list(range(len(candidates)))
+    reached = {}
+    for round_, resources in enumerate(schedule):
+        print(f"Round {round_}: {len(survivors)} candidates, {resources} rows per fold")
+        run(round_, survivors)
+        reached.update({j: round_ for j in survivors})
+        survivors = sorted(survivors, key=lambda j: (-state.results[(round_, j)], j))
+        if round_ < len(schedule) - 1:
+            survivors = survivors[:max(1, math.ceil(len(survivors) / args.factor))]
+
+    # Melhor candidato de cada estimador (pela última rodada que alcançou), avaliado também com o treino completo
+    last = len(schedule) - 1
+    finalists = survivors[:args.finalists]
+    for name in args.estimators:
+        family = [j for j in reached if candidates[j]["estimator"] == name]
+        if family:
+            best = max(family, key=lambda j: (reached[j], state.results[(reached[j], j)], -j))
+            if best not in finalists:
+                finalists.append(best)
+    run(last, finalists)
+    finalists.sort(key=lambda j: (-state.results[(last, j)], j))
+    return [(candidates[j], state.results[(last, j)]) for j in finalists], arrays
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Treina o LLM Matchmaker com busca de hiperparâmetros por successive halving")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH)
+    parser.add_argument("--search", choices=("halving", "random"), default="halving",
+                        help="halving descarta candidatos ruins treinando com amostras crescentes; random avalia todos com o treino completo")
+    parser.add_argument("--estimators", type=lambda value: value.split(","), default=["random_forest", "logistic_regression"],
+                        help=f"Lista separada por vírgula entre: {', '.join(SEARCH_SPACES)}")
+    parser.add_argument("--candidates", type=int, default=200, help="Candidatos sorteados por estimador")
+    parser.add_argument("--factor", type=int, default=3, help="A cada rodada mantém 1/factor dos candidatos e multiplica as amostras por factor")
+    parser.add_argument("--min-resources", type=int, default=60, help="Mínimo de linhas de treino por fold na primeira rodada")
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--test-size", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Cache persistente de folds codificados e estado das buscas")
+    parser.add_argument("--restart", action="store_true", help="Descarta o estado salvo desta busca e recomeça")
+    parser.add_argument("--finalists", type=int, default=3, help="Melhores candidatos da última rodada comparados em latência e tamanho (além do melhor de cada estimador)")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="latency_budget",
+                        help="accuracy: maior acurácia de CV; latency_budget: maior acurácia dentro dos orçamentos, preferindo o mais rápido dentro da tolerância")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="Orçamento de latência p99 de uma predição no modo de serviço (native ou pipeline)")
+    parser.add_argument("--max-size-mb", type=float, default=None, help="Orçamento de tamanho do artefato servido")
+    parser.add_argument("--accuracy-tolerance", type=float, default=0.005, help="Acurácia de CV que um candidato mais rápido pode perder")
+    parser.add_argument("--output", help="Também salva o pipeline final neste caminho .joblib")
+    parser.add_argument("--no-publish", action="store_true", help="Não publica o modelo no registro da API")
+    args = parser.parse_args()
+
+    unknown = set(args.estimators) - set(SEARCH_SPACES)
+    if unknown:
+        parser.error(f"Unknown estimators: {', '.join(sorted(unknown))}")
+
+    finalists, arrays = search(args)
+
+    # Cada finalista é treinado com todo o conjunto de treino no layout servido pela API e tem o custo de serviço medido
+    df = read_dataset(args.data, columns=MODEL_PARAMS + [TARGET])
+    train, test = df.iloc[np.asarray(arrays["train_idx"])], df.iloc[np.asarray(arrays["test_idx"])]
+    pipelines, reports = [], []
+    for candidate, cv_accuracy in finalists:
+        pipeline = make_pipeline(make_estimator(candidate["estimator"], candidate["params"], args.seed)).fit(train[MODEL_PARAMS], train[TARGET])
+        pipelines.append(pipeline)
+        reports.append({
+            "name": f"{candidate['estimator']}#{len(reports)}",
+            "estimator": candidate["estimator"],
+            "params": candidate["params"],
+            "cv_accuracy": cv_accuracy,
+            "test_accuracy": float(pipeline.score(test[MODEL_PARAMS], test[TARGET])),
+            "profile": profile_pipeline(pipeline, test[MODEL_PARAMS], seed=args.seed),
+        })
+
+    budgets = {"max_p99_ms": args.max_p99_ms, "max_size_mb": args.max_size_mb, "accuracy_tolerance": args.accuracy_tolerance}
+    chosen, reason = select_model(reports, args.objective, **budgets)
+    report = selection_report(reports, chosen, reason, args.objective, **budgets)
+    print_report(report)
+
+    pipeline = pipelines[chosen]
+    print(f"Test Set Classification Report: {classification_report(test[TARGET], pipeline.predict(test[MODEL_PARAMS]))}")
+
+    if args.output:
+        import joblib
+
+        joblib.dump(pipeline, args.output)
+        print(f"Pipeline saved to {args.output}, selection report at {write_report(report, args.output)}")
+
+    if not args.no_publish:
+        from publish_model import publish_model
+
+        scores = {key: reports[chosen][key] for key in ("cv_accuracy", "test_accuracy", "params")}
+        version = publish_model(pipeline, df, args.data, {**scores, "search": args.search}, report=report)
+        print(f"Model published as version {version}")